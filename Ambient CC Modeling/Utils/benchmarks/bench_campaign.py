@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+"""
+Run campaign.py on a synthetic example with the fake solver, pipelined and one source at a time.
+
+The driving-source and assembly stages are the real scripts (under the MPI
+launcher); only the SPECFEM binaries are replaced by fake_solver.py.
+
+Usage: python bench_campaign.py [--n-sources K] [--solver-seconds S] [--ranks R] [--launcher CMD] [--workdir DIR]
+"""
+
+import os
+import sys
+import glob
+import shlex
+import shutil
+import argparse
+import tempfile
+import yaml
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+UTILS_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, UTILS_DIR)
+import campaign
+from station_geometry import grid_table, write_stations
+from noise_mask import write_mask
+
+def make_campaign_example(example_dir, n_noise=8, n_obn=5, spacing=450.3):
+    """
+    Example directory with the DATA files campaign.py needs (no mesh model, no binaries).
+    """
+    data_dir = os.path.join(example_dir, 'DATA')
+    os.makedirs(data_dir, exist_ok=True)
+    os.makedirs(os.path.join(example_dir, 'bin'), exist_ok=True)
+    repo_data = os.path.join(os.path.dirname(UTILS_DIR), 'DATA')
+    shutil.copy(os.path.join(repo_data, 'Par_file'), data_dir)
+    shutil.copy(os.path.join(UTILS_DIR, 'FORCESOLUTION'), data_dir)
+    campaign.update_solution(os.path.join(data_dir, 'FORCESOLUTION'), 'hdurorf0', 0.4)
+
+    noise_axis = 3000.0 + spacing * np.arange(n_noise)
+    obn_axis = 3000.0 + 2 * spacing * np.arange(n_obn)
+    write_stations(os.path.join(data_dir, 'STATIONS_NOISE'), grid_table(noise_axis, noise_axis, 20.0))
+    write_stations(os.path.join(data_dir, 'STATIONS_OBN'), grid_table(obn_axis, obn_axis, 850.0))
+    write_mask(os.path.join(data_dir, 'NOISE_DISTRIBUTION.bin'), np.ones((n_noise, n_noise)),
+               3000.0, 3000.0, spacing, spacing)
+
+def write_config(path, n_sources, solver_seconds, launcher, ranks, max_in_flight):
+    fake = f'{{python}} {shlex.quote(os.path.join(BENCH_DIR, "fake_solver.py"))}'
+    mpi = f'{launcher} -n {ranks} ' if ranks > 1 else ''
+    config = {'sources': [[25500.0 + 1000.0 * k, 16500.0, 850.0] for k in range(n_sources)],
+              'nstep': 1000, 'dt': 0.01, 'aux_slots': 1, 'max_in_flight': max_in_flight,
+              'commands': {'mesher': f'{fake} mesher --seconds 0.5',
+                           'databases': f'{fake} databases --seconds 0.5',
+                           'solver': f'{fake} solver --seconds {solver_seconds}',
+                           'driving': f'{mpi}{{python}} {{utils_dir}}/create_driving_source_mpi.py {{run_dir}} velocity 2',
+                           'assemble': f'{mpi}{{python}} {{utils_dir}}/m8r_CC_mpi.py {{run_dir}} v Z all {{name}}'}}
+    with open(path, 'w') as f:
+        yaml.safe_dump(config, f)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--n-sources', type=int, default=3)
+    parser.add_argument('--solver-seconds', type=float, default=3.0, help='emulated solver run time')
+    parser.add_argument('--ranks', type=int, default=2, help='MPI ranks of the aux commands (1 runs without a launcher)')
+    parser.add_argument('--launcher', default='mpirun', help="MPI launcher, e.g. 'srun' or 'mpirun --oversubscribe'")
+    parser.add_argument('--workdir', default=None)
+    args = parser.parse_args()
+
+    example_dir = args.workdir or tempfile.mkdtemp(prefix='bench_campaign_')
+    make_campaign_example(example_dir)
+    results = {}
+    for label, max_in_flight in (('one source at a time', 1), ('pipelined', 2)):
+        config = os.path.join(example_dir, f'campaign_{max_in_flight}.yaml')
+        out_dir = os.path.join(example_dir, f'CAMPAIGN_{max_in_flight}')
+        write_config(config, args.n_sources, args.solver_seconds, args.launcher, args.ranks, max_in_flight)
+        print(f"  - {label}:")
+        results[label] = campaign.run_campaign(example_dir, config, out_dir, poll=0.1)
+        cubes = glob.glob(os.path.join(out_dir, 'src_*', 'RSF', 'CZZ_*.rsf'))
+        if len(cubes) != args.n_sources:
+            raise SystemExit(f"Expected {args.n_sources} CZZ cubes in {out_dir}, found {len(cubes)}.")
+
+    serial, pipelined = results['one source at a time']['wall'], results['pipelined']['wall']
+    print(f"  - {args.n_sources} sources: {serial:.1f} s one at a time, {pipelined:.1f} s pipelined "
+          f"({serial / pipelined:.2f}x)")
+
+if __name__ == "__main__":
+    main()
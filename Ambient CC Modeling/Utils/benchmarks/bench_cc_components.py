@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+"""
+Benchmark three concurrent single-component m8r_CC_mpi jobs against one fused pass.
+
+Usage: python bench_cc_components.py [--n-stations N] [--nt NT] [--ranks R] [--launcher CMD] [--workdir DIR]
+"""
+
+import os
+import sys
+import time
+import shlex
+import argparse
+import tempfile
+import subprocess
+import numpy as np
+import mpi4py
+mpi4py.rc.initialize = False  # rsf_io imports MPI; the benchmarked jobs start their own
+
+UTILS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, UTILS_DIR)
+from rsf_io import read_rsf
+from synthetic import make_step2_tree, grid_shape
+
+SCRIPT = os.path.join(UTILS_DIR, 'm8r_CC_mpi.py')
+
+def command(launcher, ranks, example_dir, jcomp, fname):
+    prefix = shlex.split(launcher) + ['-n', str(ranks)] if ranks > 1 else []
+    return prefix + [sys.executable, SCRIPT, example_dir, 'v', 'Z', jcomp, fname]
+
+def run(commands):
+    """
+    Run the commands concurrently, like the background tasks in makeCCrsf.slurm.
+    """
+    start = time.perf_counter()
+    procs = [subprocess.Popen(cmd, stdout=subprocess.DEVNULL) for cmd in commands]
+    if any(proc.wait() for proc in procs):
+        raise RuntimeError(f"m8r_CC_mpi.py failed: {commands}")
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--n-stations', type=int, default=400)
+    parser.add_argument('--nt', type=int, default=4000, help='step-2 samples per trace')
+    parser.add_argument('--ranks', type=int, default=2, help='MPI ranks per job (1 runs without a launcher)')
+    parser.add_argument('--launcher', default='mpirun', help="MPI launcher, e.g. 'srun' or 'mpirun --oversubscribe'")
+    parser.add_argument('--workdir', default=None, help='reuse/keep the synthetic example here')
+    args = parser.parse_args()
+
+    example_dir = args.workdir or tempfile.mkdtemp(prefix='bench_cc_components_')
+    if not os.path.isdir(os.path.join(example_dir, 'OUTPUT_FILES_step2')):
+        nx, ny = grid_shape(args.n_stations)
+        print(f"  - Writing {3 * nx * ny} synthetic traces ({args.nt} samples) to {example_dir}")
+        make_step2_tree(example_dir, nx, ny, args.nt)
+
+    t_split = run([command(args.launcher, args.ranks, example_dir, c, 'split') for c in 'XYZ'])
+    t_fused = run([command(args.launcher, args.ranks, example_dir, 'XYZ', 'fused')])
+
+    rsf_dir = os.path.join(example_dir, 'RSF')
+    identical = all(np.array_equal(read_rsf(os.path.join(rsf_dir, f'CZ{c}_split.rsf'))[0],
+                                   read_rsf(os.path.join(rsf_dir, f'CZ{c}_fused.rsf'))[0]) for c in 'XYZ')
+    print(f"  - three jobs ({3 * args.ranks} ranks): {t_split:8.2f} s")
+    print(f"  - fused job  ({args.ranks} ranks): {t_fused:8.2f} s")
+    print(f"  - speed-up   : {t_split / t_fused:8.2f}x, cubes identical: {identical}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+"""
+Benchmark dispersion.py on a synthetic cube with a known dispersion curve.
+
+The cube holds a symmetric correlation of one dispersive mode travelling
+radially from the virtual source, c(f) = CINF + (C0 - CINF) exp(-f / F0).
+The phase-shift and f-k picks are checked against c(f), and the traced
+peak memory against the --memory-mb budget.
+
+Usage: python bench_dispersion.py [--n N] [--nt NT] [--memory-mb MB] [--threads T] [--workdir DIR]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+import numpy as np
+import mpi4py
+mpi4py.rc.initialize = False  # rsf_io imports MPI; nothing here is parallel
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from rsf_io import rsf_axis, write_rsf_header
+import dispersion
+
+C0, CINF, F0 = 1.2, 0.4, 0.5    # km/s, km/s, Hz
+
+def phase_velocity(f):
+    return CINF + (C0 - CINF) * np.exp(-f / F0)
+
+def make_cube(path, n, nt, dt=0.02, spacing=0.05, fpeak=1.0):
+    """
+    n-by-n receiver RSF cube (t, y, x) with nt = 2 * ntc - 1 samples; returns the source (sx, sy) in m.
+    """
+    ntc = (nt + 1) // 2
+    nfft = 4 * ntc
+    f = np.fft.rfftfreq(nfft, dt)
+    wavelet = (f / fpeak) ** 2 * np.exp(-(f / fpeak) ** 2)
+    slowness = 1.0 / phase_velocity(f)
+    axis = spacing * np.arange(n)
+    sx = sy = 0.5 * axis[-1]
+    axes = [rsf_axis(n, spacing, 0.0, 'X', 'km'), rsf_axis(n, spacing, 0.0, 'Y', 'km'),
+            rsf_axis(2 * ntc - 1, dt, -(ntc - 1) * dt, 't', 's')]
+    data_path = write_rsf_header(path, axes)
+    cube = np.memmap(data_path, dtype=np.float32, mode='w+', shape=(2 * ntc - 1, n, n))
+    for y in range(n):
+        r = np.hypot(axis - sx, axis[y] - sy)
+        causal = np.fft.irfft(wavelet[:, None] * np.exp(-2j * np.pi * f[:, None] * slowness[:, None] * r[None, :]),
+                              nfft, axis=0)[:ntc]
+        cube[ntc - 1:, y] = causal
+        cube[:ntc, y] = causal[::-1]
+    cube.flush()
+    return sx * 1000, sy * 1000
+
+def run(cube, source, method, memory_mb, threads):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = dispersion.dispersion(cube, source, method, fmin=0.2, fmax=2.0, memory_mb=memory_mb, threads=threads)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+def pick_error(result):
+    """
+    Median relative error of the picked phase velocity against c(f) over 0.3-1.5 Hz.
+    """
+    f = result['frequency']
+    band = (f >= 0.3) & (f <= 1.5)
+    if 'velocity' in result:
+        picked = result['velocity'][np.argmax(result['panel'][band], axis=1)]
+    else:
+        k = result['wavenumber'][np.argmax(result['panel'][band], axis=1)]
+        picked = f[band] / np.maximum(k, 1e-12)
+    return float(np.median(np.abs(picked / phase_velocity(f[band]) - 1)))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--n', type=int, default=120, help='receivers per side (n * n in total)')
+    parser.add_argument('--nt', type=int, default=4001, help='samples per correlation')
+    parser.add_argument('--memory-mb', type=float, default=128)
+    parser.add_argument('--threads', type=int, default=os.cpu_count())
+    parser.add_argument('--workdir', default=None)
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='bench_dispersion_')
+    os.makedirs(workdir, exist_ok=True)
+    cube = os.path.join(workdir, 'CZZ_synthetic.rsf')
+    print(f"  - Writing a {args.n} x {args.n} receiver cube ({args.nt} samples) to {workdir}")
+    source = make_cube(cube, args.n, args.nt)
+    size = args.n * args.n * args.nt * 4 / 2**20
+
+    for method in dispersion.METHODS:
+        for threads in sorted({1, args.threads}):
+            result, elapsed, peak = run(cube, source, method, args.memory_mb, threads)
+            print(f"  - {method:11s} {threads:3d} threads: {elapsed:7.2f} s, peak {peak:7.1f} MiB "
+                  f"(budget {args.memory_mb:g}, cube {size:.0f} MiB), pick error {100 * pick_error(result):.1f}%")
+            if peak > args.memory_mb:
+                raise SystemExit(f"Traced peak {peak:.1f} MiB exceeds the {args.memory_mb:g} MiB budget.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+"""
+Benchmark per-trace against batched processing in create_driving_source_mpi.
+
+Usage: python bench_driving_source.py [--n-stations N] [--nt NT] [--batch-size B] [--workdir DIR]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import create_driving_source_mpi as cds
+from noise_mask import load_mask
+from synthetic import make_example_dir, grid_shape
+
+def run(files, batch_size, example_dir, sources_dir, cc_type, freq_lp):
+    seismogram_dir = os.path.join(example_dir, 'OUTPUT_FILES_step1')
+    noise_mask = load_mask(os.path.join(example_dir, 'DATA'))
+    os.makedirs(sources_dir, exist_ok=True)
+    start = time.perf_counter()
+    if batch_size > 1:
+        for i in range(0, len(files), batch_size):
+            cds.process_batch(files[i:i + batch_size], noise_mask, seismogram_dir, sources_dir, cc_type, freq_lp)
+    else:
+        for file in files:
+            cds.process_trace(file, noise_mask, seismogram_dir, sources_dir, cc_type, freq_lp)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--n-stations', type=int, default=400)
+    parser.add_argument('--nt', type=int, default=19000, help='step-1 samples per trace')
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--cc-type', default='velocity')
+    parser.add_argument('--freq-lp', default='2')
+    parser.add_argument('--workdir', default=None, help='reuse/keep the synthetic example here')
+    args = parser.parse_args()
+    freq_lp = float(args.freq_lp) if args.freq_lp != 'None' else 'None'
+
+    example_dir = args.workdir or tempfile.mkdtemp(prefix='bench_driving_source_')
+    if not os.path.isdir(os.path.join(example_dir, 'OUTPUT_FILES_step1')):
+        nx, ny = grid_shape(args.n_stations)
+        print(f"  - Writing {nx * ny} synthetic traces ({args.nt} samples) to {example_dir}")
+        make_example_dir(example_dir, nx, ny, args.nt)
+    files = sorted(f.name for f in os.scandir(os.path.join(example_dir, 'OUTPUT_FILES_step1'))
+                   if f.name.endswith('P.semp'))
+
+    out_trace = os.path.join(example_dir, 'SOURCES_per_trace')
+    out_batch = os.path.join(example_dir, 'SOURCES_batched')
+    t_trace = run(files, 1, example_dir, out_trace, args.cc_type, freq_lp)
+    t_batch = run(files, args.batch_size, example_dir, out_batch, args.cc_type, freq_lp)
+
+    identical = all(
+        open(os.path.join(out_trace, name), 'rb').read() == open(os.path.join(out_batch, name), 'rb').read()
+        for name in os.listdir(out_trace))
+    print(f"  - per-trace : {len(files) / t_trace:8.1f} traces/s")
+    print(f"  - batched   : {len(files) / t_batch:8.1f} traces/s (batch size {args.batch_size})")
+    print(f"  - speed-up  : {t_trace / t_batch:8.2f}x, outputs bit-identical: {identical}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+"""
+Check and time the noise_distribution generators against their original implementations.
+
+Usage: python bench_noise_distribution.py [--n N] [--spacing M] [--n-blocks B] [--n-blobs G] [--truncate K] [--repeat R]
+"""
+
+import os
+import sys
+import time
+import argparse
+import contextlib
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import noise_distribution as nd
+
+# --------------------- ORIGINAL IMPLEMENTATIONS --------------------- #
+def legacy_gaussian(d, n, mask_noise, xcoor, ycoor):
+    x0 = d['center_x'][n]
+    y0 = d['center_y'][n]
+    theta = np.deg2rad(d.get('azimuth', [0]*len(d['center_x']))[n])
+    cos_theta, sin_theta = np.cos(theta), np.sin(theta)
+
+    x_rot = (xcoor - x0) * cos_theta + (ycoor - y0) * sin_theta
+    y_rot = -(xcoor - x0) * sin_theta + (ycoor - y0) * cos_theta
+
+    gaussian = np.exp(-((x_rot**2 / (2 * d['sigma_x'][n]**2)) +
+                        (y_rot**2 / (2 * d['sigma_y'][n]**2))))
+    mask_noise += gaussian * d['weight'][n]
+    return mask_noise
+
+def legacy_blocks(d, n, mask_noise, xcoor, ycoor):
+    x0, y0 = d['center_x'][n], d['center_y'][n]
+    wx, wy = d['width_x'][n] / 2, d['width_y'][n] / 2
+
+    dx, dy = np.diff(np.unique(xcoor))[0], np.diff(np.unique(ycoor))[0]
+    x1, x2 = int((x0 - wx) // dx), int((x0 + wx) // dx)
+    y1, y2 = int((y0 - wy) // dy), int((y0 + wy) // dy)
+
+    mask = np.zeros_like(mask_noise)
+    mask[x1:x2, y1:y2] = d['weight'][n]
+
+    for _ in range(10):
+        mask = np.apply_along_axis(
+            lambda row: np.convolve(row, np.ones(6) / 6, mode='same'), axis=1, arr=mask
+        )
+    for _ in range(10):
+        mask = np.apply_along_axis(
+            lambda col: np.convolve(col, np.ones(6) / 6, mode='same'), axis=0, arr=mask
+        )
+
+    mask_noise += mask
+    return mask_noise
+
+def legacy_random(d, mask_noise):
+    nx, ny = mask_noise.shape
+    mask = np.zeros_like(mask_noise)
+    for _ in range(mask_noise.size // 10):
+        idx = np.random.randint(0, nx)
+        idy = np.random.randint(0, ny)
+        mask[idx, idy] = d['weight']
+    mask_noise += mask
+    return mask_noise
+
+# --------------------- HELPERS --------------------- #
+def station_grid(n, spacing=450.3, origin=3000.0):
+    """
+    (xcoor, ycoor) of an n-by-n noise grid laid out like STATIONS_NOISE.
+    """
+    axis = origin + spacing * np.arange(n)
+    xcoor, ycoor = np.meshgrid(axis, axis, indexing='ij')
+    return xcoor, ycoor
+
+def random_blocks(n_blocks, xcoor, ycoor, rng):
+    extent = xcoor.max() - xcoor.min()
+    return {'n_blocks': n_blocks,
+            'weight': rng.uniform(0.5, 2.0, n_blocks).tolist(),
+            'center_x': rng.uniform(xcoor.min(), xcoor.max(), n_blocks).tolist(),
+            'center_y': rng.uniform(ycoor.min(), ycoor.max(), n_blocks).tolist(),
+            'width_x': (rng.uniform(0.02, 0.2, n_blocks) * extent).tolist(),
+            'width_y': (rng.uniform(0.02, 0.2, n_blocks) * extent).tolist()}
+
+def random_blobs(n_blobs, xcoor, ycoor, rng, spacing):
+    return {'n_blobs': n_blobs,
+            'weight': rng.uniform(0.5, 2.0, n_blobs).tolist(),
+            'center_x': rng.uniform(xcoor.min(), xcoor.max(), n_blobs).tolist(),
+            'center_y': rng.uniform(ycoor.min(), ycoor.max(), n_blobs).tolist(),
+            'sigma_x': (rng.uniform(2, 10, n_blobs) * spacing).tolist(),
+            'sigma_y': (rng.uniform(2, 10, n_blobs) * spacing).tolist(),
+            'azimuth': rng.uniform(0, 180, n_blobs).tolist()}
+
+def timed(func, repeat):
+    """
+    Best wall time of `repeat` calls (generator progress messages suppressed).
+    """
+    best = np.inf
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func()
+            best = min(best, time.perf_counter() - start)
+    return result, best
+
+# --------------------- BENCHMARKS --------------------- #
+def bench_blocks(xcoor, ycoor, n_blocks, repeat, rng):
+    d = random_blocks(n_blocks, xcoor, ycoor, rng)
+
+    def legacy():
+        mask = np.zeros(xcoor.shape)
+        for n in range(d['n_blocks']):
+            mask = legacy_blocks(d, n, mask, xcoor, ycoor)
+        return mask
+
+    nd.boxcar_operator.cache_clear()
+    reference, t_legacy = timed(legacy, 1)
+    result, t_new = timed(lambda: nd.blocks(d, np.zeros(xcoor.shape), xcoor, ycoor), repeat)
+    error = np.abs(result - reference).max() / max(np.abs(reference).max(), np.finfo(float).tiny)
+    print(f"  - blocks ({n_blocks} blocks): legacy {t_legacy * 1e3:9.1f} ms, new {t_new * 1e3:8.2f} ms "
+          f"({t_legacy / t_new:7.1f}x), max relative difference {error:.1e}")
+    return error
+
+def bench_gaussian(xcoor, ycoor, n_blobs, truncate, repeat, rng):
+    d = random_blobs(n_blobs, xcoor, ycoor, rng, xcoor[1, 0] - xcoor[0, 0])
+
+    def legacy():
+        mask = np.zeros(xcoor.shape)
+        for n in range(d['n_blobs']):
+            mask = legacy_gaussian(d, n, mask, xcoor, ycoor)
+        return mask
+
+    reference, t_legacy = timed(legacy, 1)
+    print(f"  - gaussian ({n_blobs} blobs): legacy {t_legacy * 1e3:9.1f} ms")
+    for k in (None, truncate):
+        par = dict(d, truncate=k)
+        result, t_new = timed(lambda: nd.gaussian_distribution(par, np.zeros(xcoor.shape), xcoor, ycoor), repeat)
+        error = np.abs(result - reference).max() / reference.max()
+        label = f"truncate {k}" if k else "full grid"
+        print(f"  - gaussian ({label:>12s}): {t_new * 1e3:9.2f} ms ({t_legacy / t_new:7.1f}x), "
+              f"max relative difference {error:.1e}")
+        if not k and error:
+            raise SystemExit("gaussian_distribution() does not match the original implementation.")
+
+def bench_random(xcoor, ycoor, repeat):
+    """
+    Time each random pattern; the original loop is timed for the uniform case.
+    """
+    d = {'weight': 1.0, 'seed': 12345, 'min_distance': 4 * (xcoor[1, 0] - xcoor[0, 0]),
+         'n_clusters': 20, 'mean_children': 40, 'cluster_sigma': 1500.0}
+    _, t_legacy = timed(lambda: legacy_random(d, np.zeros(xcoor.shape)), 1)
+    print(f"  - random (original loop): {t_legacy * 1e3:9.1f} ms")
+    for pattern in nd.RANDOM_PATTERNS:
+        par = dict(d, pattern=pattern)
+        result, t_new = timed(lambda: nd.random(par, np.zeros(xcoor.shape), xcoor, ycoor), repeat)
+        again, _ = timed(lambda: nd.random(par, np.zeros(xcoor.shape), xcoor, ycoor), 1)
+        print(f"  - random ({pattern:>12s}): {t_new * 1e3:9.2f} ms, {int(result.sum()):8d} sources, "
+              f"reproducible: {np.array_equal(result, again)}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--n', type=int, default=174, help='noise grid points per side')
+    parser.add_argument('--spacing', type=float, default=450.3)
+    parser.add_argument('--n-blocks', type=int, default=4)
+    parser.add_argument('--n-blobs', type=int, default=200)
+    parser.add_argument('--truncate', type=float, default=5.0, help='k-sigma support of the truncated path')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    xcoor, ycoor = station_grid(args.n, args.spacing)
+    print(f"  - {args.n} x {args.n} noise grid, spacing {args.spacing} m")
+    if bench_blocks(xcoor, ycoor, args.n_blocks, args.repeat, rng) > 1e-12:
+        raise SystemExit("blocks() does not match the original implementation.")
+    bench_gaussian(xcoor, ycoor, args.n_blobs, args.truncate, args.repeat, rng)
+    bench_random(xcoor, ycoor, args.repeat)
+
+if __name__ == "__main__":
+    main()
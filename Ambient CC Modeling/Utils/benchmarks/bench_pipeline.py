@@ -0,0 +1,226 @@
+#!/usr/bin/env python
+"""
+End-to-end benchmark of the Utils stages on a synthetic example, with a run history.
+
+A fake example directory is generated once in the work directory. It holds
+step-1 P.semp and step-2 sem{v} trees for the requested station counts and
+NSTEP, STATIONS files and a random noise mask (synthetic.py), plus the
+example's parfile_noise.yaml, so that any subset of the stages can run.
+Each stage is then run as its own job, like in run_this_example.slurm and
+makeCCrsf.slurm:
+
+    stations  stations_setup.py, NOISE and OBN grids (serial)
+    noise     noise_distribution.py (serial)
+    driving   create_driving_source_mpi.py, at every --ranks count
+    cubes     m8r_CC_mpi.py all components, at every --ranks count
+
+One rank runs the script directly and more ranks go through --launcher.
+For every job the wall time, throughput (stations, grid cells or files per
+second) and peak RSS are appended as one JSON line to the history file,
+together with the git commit and the problem size. The printed table gives
+the change against the last recorded run of the same job and size, so the
+history can be kept across commits to follow an optimization.
+
+Usage: python bench_pipeline.py [--n-stations N] [--n-obn N] [--nstep NT] [--ranks R ...]
+                                [--stages S ...] [--launcher CMD] [--workdir DIR] [--history FILE]
+"""
+
+import os
+import sys
+import json
+import time
+import shlex
+import shutil
+import socket
+import argparse
+import tempfile
+import subprocess
+
+UTILS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXAMPLE_DATA = os.path.join(os.path.dirname(UTILS_DIR), 'DATA')
+sys.path.insert(0, UTILS_DIR)
+from synthetic import make_example_dir, make_step2_tree, grid_shape
+
+STAGES = ('stations', 'noise', 'driving', 'cubes')
+MPI_STAGES = ('driving', 'cubes')
+SPACING = 450.3     # m, station spacing of the synthetic grids (synthetic.write_stations)
+ORIGIN = 3000.0     # m
+DT = 0.004          # s, band code C
+
+# --------------------- SYNTHETIC EXAMPLE --------------------- #
+def make_example(example_dir, config):
+    """
+    Write the seismogram trees and DATA inputs for config unless they are already there.
+    """
+    meta_path = os.path.join(example_dir, 'bench_example.json')
+    if os.path.exists(meta_path):
+        with open(meta_path, 'r') as f:
+            if json.load(f) == config:
+                return
+    shutil.rmtree(example_dir, ignore_errors=True)
+    nx, ny = config['noise_grid']
+    nxo, nyo = config['obn_grid']
+    nstep = config['nstep']
+    print(f"  - Writing {nx * ny} step-1 traces ({nstep} samples) and {3 * nxo * nyo} step-2 traces "
+          f"({2 * nstep - 1} samples) to {example_dir}")
+    make_example_dir(example_dir, nx, ny, nstep, DT, binary=config['binary'])
+    make_step2_tree(example_dir, nxo, nyo, 2 * nstep - 1, DT, binary=config['binary'])
+    shutil.copy(os.path.join(EXAMPLE_DATA, 'parfile_noise.yaml'), os.path.join(example_dir, 'DATA'))
+    with open(meta_path, 'w') as f:
+        json.dump(config, f)
+
+def station_args(example_dir, rtype, nx, ny, z):
+    """
+    stations_setup.py arguments for an nx-by-ny grid (arange stops half a step past the last station).
+    """
+    xend, yend = ORIGIN + SPACING * (nx - 0.5), ORIGIN + SPACING * (ny - 0.5)
+    extent = ORIGIN + SPACING * max(nx, ny)
+    args = [0, extent, SPACING, ORIGIN, yend, 0, extent, SPACING, ORIGIN, xend, z, 1, rtype, example_dir]
+    if rtype == 'OBN':
+        args += [ORIGIN + SPACING * (nx // 2), ORIGIN + SPACING * (ny // 2), z]
+    return [str(arg) for arg in args]
+
+# --------------------- JOBS --------------------- #
+def script(name):
+    return [sys.executable, os.path.join(UTILS_DIR, name)]
+
+def stage_jobs(stage, example_dir, profile_dir, config, ranks, batch_size):
+    """
+    (commands, items, cleanup paths) of one stage; the commands run one after another.
+    """
+    nx, ny = config['noise_grid']
+    nxo, nyo = config['obn_grid']
+    data_dir = os.path.join(example_dir, 'DATA')
+    profile = os.path.join(profile_dir, f'{stage}_{ranks}.json')
+    if stage == 'stations':
+        return ([script('stations_setup.py') + station_args(example_dir, 'NOISE', nx, ny, 20.0) + ['--no-plot'],
+                 script('stations_setup.py') + station_args(example_dir, 'OBN', nxo, nyo, 800.0) + ['--no-plot']],
+                nx * ny + nxo * nyo, [])
+    if stage == 'noise':
+        return [script('noise_distribution.py') + [example_dir, '--no-plot', '--profile', profile]], nx * ny, []
+    if stage == 'driving':
+        return ([script('create_driving_source_mpi.py') + [example_dir, 'velocity', '2', '--batch-size',
+                                                           str(batch_size), '--profile', profile]],
+                nx * ny, [os.path.join(data_dir, 'SOURCES')])
+    return ([script('m8r_CC_mpi.py') + [example_dir, 'v', 'Z', 'all', 'bench', '--profile', profile]],
+            3 * nxo * nyo, [os.path.join(example_dir, 'RSF')])
+
+def launch(command, ranks, launcher, log):
+    """
+    Run one command to completion; returns (seconds, peak RSS in MiB of its largest process).
+    """
+    if ranks > 1:
+        command = shlex.split(launcher) + ['-n', str(ranks)] + command
+    start = time.perf_counter()
+    proc = subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT)
+    _, status, usage = os.wait4(proc.pid, 0)   # rusage of this job only (and of the ranks it waited for)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    elapsed = time.perf_counter() - start
+    if proc.returncode:
+        raise RuntimeError(f"{' '.join(command)} failed with code {proc.returncode}, see {log.name}")
+    peak = usage.ru_maxrss / 2**20 if sys.platform == 'darwin' else usage.ru_maxrss / 2**10
+    return elapsed, peak
+
+def run_stage(stage, ranks, args, example_dir, config):
+    profile_dir = os.path.join(args.workdir, 'profiles')
+    log_dir = os.path.join(args.workdir, 'logs')
+    os.makedirs(profile_dir, exist_ok=True)
+    os.makedirs(log_dir, exist_ok=True)
+    commands, items, cleanup = stage_jobs(stage, example_dir, profile_dir, config, ranks, args.batch_size)
+    profile = os.path.join(profile_dir, f'{stage}_{ranks}.json')
+    if os.path.exists(profile):
+        os.remove(profile)
+    for path in cleanup:
+        shutil.rmtree(path, ignore_errors=True)
+    if stage == 'driving':
+        os.makedirs(cleanup[0])
+
+    wall, peak = 0.0, 0.0
+    with open(os.path.join(log_dir, f'{stage}_{ranks}.log'), 'w') as log:
+        for command in commands:
+            elapsed, rss = launch(command, ranks, args.launcher, log)
+            wall, peak = wall + elapsed, max(peak, rss)
+
+    result = {'stage': stage, 'ranks': ranks, 'wall': wall, 'items': items, 'items_per_s': items / wall,
+              'peak_rss_mib': peak}
+    if os.path.exists(profile):
+        with open(profile, 'r') as f:
+            report = json.load(f)
+        result['rss_sum_mib'] = report['peak_rss_mib']['sum']
+        result['throughput'] = report['throughput']
+        result['phases'] = {name: phase['seconds']['max'] for name, phase in report['phases'].items()}
+    return result
+
+# --------------------- HISTORY --------------------- #
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=UTILS_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def previous_result(history, config, stage, ranks):
+    for entry in reversed(history):
+        if entry['config'] == config:
+            for result in entry['results']:
+                if result['stage'] == stage and result['ranks'] == ranks:
+                    return result
+    return None
+
+def describe(result, previous):
+    line = (f"  - {result['stage']:9s} {result['ranks']:3d} ranks: {result['wall']:8.2f} s  "
+            f"{result['items_per_s']:9.1f} items/s  peak RSS {result['peak_rss_mib']:7.1f} MiB")
+    if previous is not None:
+        line += (f"  ({result['items_per_s'] / previous['items_per_s'] - 1:+.1%} throughput, "
+                 f"{result['peak_rss_mib'] - previous['peak_rss_mib']:+.1f} MiB vs last run)")
+    return line
+
+# --------------------- MAIN --------------------- #
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--n-stations', type=int, default=400, help='noise stations (step-1 traces)')
+    parser.add_argument('--n-obn', type=int, default=None, help='OBN receivers (default: --n-stations)')
+    parser.add_argument('--nstep', type=int, default=2000, help='step-1 NSTEP; step-2 traces have 2 * NSTEP - 1')
+    parser.add_argument('--binary', action='store_true', help='binary instead of ASCII seismograms')
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=list(STAGES))
+    parser.add_argument('--ranks', type=int, nargs='+', default=[1, 2],
+                        help='rank counts for the MPI stages (1 runs without a launcher)')
+    parser.add_argument('--launcher', default='mpirun', help="MPI launcher, e.g. 'srun' or 'mpirun --oversubscribe'")
+    parser.add_argument('--batch-size', type=int, default=64, help='driving-source --batch-size')
+    parser.add_argument('--workdir', default=None, help='reuse/keep the synthetic example and history here')
+    parser.add_argument('--history', default=None, help='JSON-lines run history (default: WORKDIR/history.jsonl)')
+    args = parser.parse_args()
+
+    args.workdir = args.workdir or tempfile.mkdtemp(prefix='bench_pipeline_')
+    history_path = args.history or os.path.join(args.workdir, 'history.jsonl')
+    example_dir = os.path.join(args.workdir, 'example')
+    config = {'noise_grid': list(grid_shape(args.n_stations)),
+              'obn_grid': list(grid_shape(args.n_obn or args.n_stations)),
+              'nstep': args.nstep, 'binary': args.binary}
+    make_example(example_dir, config)
+
+    history = load_history(history_path)
+    results = []
+    for stage in STAGES:
+        if stage not in args.stages:
+            continue
+        for ranks in (args.ranks if stage in MPI_STAGES else [1]):
+            result = run_stage(stage, ranks, args, example_dir, config)
+            print(describe(result, previous_result(history, config, stage, ranks)))
+            results.append(result)
+
+    entry = {'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'commit': git_commit(), 'host': socket.gethostname(),
+             'cpus': os.cpu_count(), 'launcher': args.launcher, 'batch_size': args.batch_size,
+             'config': config, 'results': results}
+    with open(history_path, 'a') as f:
+        f.write(json.dumps(entry) + '\n')
+    print(f"  - Appended to {history_path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+"""
+Benchmark read-ahead and write-behind (--prefetch, --write-depth) against a slow filesystem.
+
+A parallel filesystem is stood in for by a local directory whose every
+open() costs --latency seconds (builtins.open and os.open are throttled for
+paths below the work directory). Driving-source creation and cube assembly
+run in this process, as one MPI rank, at queue depth 0 (in line, as before)
+and at each --depth. The outputs must match the depth-0 run byte for byte.
+
+Usage: python bench_prefetch.py [--n-stations N] [--nt NT] [--latency S] [--depth D ...] [--batch-size B] [--workdir DIR]
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import builtins
+import tempfile
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import create_driving_source_mpi as cds
+import m8r_CC_mpi as m8r
+from cc_backends import make_backend
+from rsf_io import read_rsf
+from synthetic import make_example_dir, make_step2_tree, grid_shape
+
+@contextmanager
+def throttled(root, latency):
+    """
+    Sleep `latency` seconds in every open() of a file below root (the GIL is released meanwhile).
+    """
+    root = os.path.abspath(root) + os.sep
+    real_open, real_os_open = builtins.open, os.open
+
+    def slow(path):
+        if isinstance(path, (str, bytes, os.PathLike)) and os.path.abspath(os.fsdecode(path)).startswith(root):
+            time.sleep(latency)
+
+    def open_(file, *args, **kwargs):
+        slow(file)
+        return real_open(file, *args, **kwargs)
+
+    def os_open(path, *args, **kwargs):
+        slow(path)
+        return real_os_open(path, *args, **kwargs)
+
+    builtins.open, os.open = open_, os_open
+    try:
+        yield
+    finally:
+        builtins.open, os.open = real_open, real_os_open
+
+def snapshot(directory, suffix):
+    return {name: open(os.path.join(directory, name), 'rb').read()
+            for name in sorted(os.listdir(directory)) if name.endswith(suffix)}
+
+def driving_sources(example_dir, depth, batch_size):
+    sources_dir = os.path.join(example_dir, 'DATA', 'SOURCES')
+    shutil.rmtree(sources_dir, ignore_errors=True)
+    os.makedirs(sources_dir)
+    start = time.perf_counter()
+    cds.main([example_dir, 'velocity', '2', '--batch-size', str(batch_size),
+              '--prefetch', str(depth), '--write-depth', str(depth)])
+    return time.perf_counter() - start, snapshot(sources_dir, '.bin')
+
+def cubes(example_dir, depth):
+    backend = make_backend('rsf', m8r.comm, example_dir)
+    start = time.perf_counter()
+    m8r.make_data_volume(example_dir, 'v', 'Z', 'XYZ', 'bench', backend=backend, prefetch=depth)
+    elapsed = time.perf_counter() - start
+    return elapsed, {c: read_rsf(os.path.join(backend.out_dir, f'CZ{c}_bench.rsf'))[0].tobytes() for c in 'XYZ'}
+
+def compare(name, runs, n_files):
+    (_, (t_ref, ref)), rest = runs[0], runs[1:]
+    print(f"  - {name}: depth 0 {n_files / t_ref:8.1f} files/s")
+    for depth, (elapsed, outputs) in rest:
+        print(f"  - {name}: depth {depth} {n_files / elapsed:8.1f} files/s, speed-up {t_ref / elapsed:5.2f}x, "
+              f"outputs identical: {outputs == ref}")
+        if outputs != ref:
+            raise SystemExit(f"{name} outputs at depth {depth} differ from the in-line run.")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--n-stations', type=int, default=400)
+    parser.add_argument('--nt', type=int, default=2000, help='samples per trace')
+    parser.add_argument('--latency', type=float, default=0.005, help='seconds added to every open()')
+    parser.add_argument('--depth', type=int, nargs='+', default=[4, 16])
+    parser.add_argument('--batch-size', type=int, default=1)
+    parser.add_argument('--workdir', default=None)
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='bench_prefetch_')
+    nx, ny = grid_shape(args.n_stations)
+    step1_dir, step2_dir = os.path.join(workdir, 'step1'), os.path.join(workdir, 'step2')
+    if not os.path.isdir(os.path.join(step1_dir, 'OUTPUT_FILES_step1')):
+        print(f"  - Writing {nx * ny} step-1 and {3 * nx * ny} step-2 traces ({args.nt} samples) to {workdir}")
+        make_example_dir(step1_dir, nx, ny, args.nt)
+        make_step2_tree(step2_dir, nx, ny, args.nt)
+    print(f"  - {args.latency * 1000:g} ms per open() below {workdir}")
+
+    depths = [0] + [depth for depth in args.depth if depth > 0]
+    with throttled(workdir, args.latency):
+        compare('driving sources', [(d, driving_sources(step1_dir, d, args.batch_size)) for d in depths], nx * ny)
+        compare('cube assembly  ', [(d, cubes(step2_dir, d)) for d in depths], 3 * nx * ny)
+
+if __name__ == "__main__":
+    main()
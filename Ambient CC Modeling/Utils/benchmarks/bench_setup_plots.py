@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+"""
+Time the setup steps (stations_setup.py NOISE/OBN, noise_distribution.py) with and without plots.
+
+Each step runs as its own process, as in sou_rec_setup.sh, so interpreter
+and import start-up is included. The example's Mesh_Par_file and
+parfile_noise.yaml are copied into a scratch directory.
+
+Usage: python bench_setup_plots.py [--example-dir DIR] [--workdir DIR] [--repeat R]
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+import numpy as np
+
+UTILS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXAMPLE_DIR = os.path.dirname(UTILS_DIR)
+
+# Same receiver layout as sou_rec_setup.sh (mesh: 84 km, 280 elements per side)
+NOISE_ARGS = ['0.0', '84000', '300', '3000', '81000', '0.0', '84000', '300', '3000', '81000', '20', '1.501', 'NOISE']
+OBN_ARGS = ['0.0', '84000', '300', '12000', '72000', '0.0', '84000', '300', '12000', '72000', '850', '0.501', 'OBN']
+OBN_SOURCE = ['25500', '16500', '850']
+
+def prepare(example_dir, workdir):
+    data_dir = os.path.join(workdir, 'DATA')
+    os.makedirs(os.path.join(data_dir, 'meshfem3D_files'), exist_ok=True)
+    shutil.copy(os.path.join(example_dir, 'DATA', 'meshfem3D_files', 'Mesh_Par_file'),
+                os.path.join(data_dir, 'meshfem3D_files'))
+    shutil.copy(os.path.join(example_dir, 'DATA', 'parfile_noise.yaml'), data_dir)
+
+def steps(workdir, plot_opt):
+    utils = lambda name: os.path.join(UTILS_DIR, name)
+    return [('stations NOISE', [sys.executable, utils('stations_setup.py')] + NOISE_ARGS + [workdir] + plot_opt),
+            ('stations OBN', [sys.executable, utils('stations_setup.py')] + OBN_ARGS + [workdir] + OBN_SOURCE + plot_opt),
+            ('noise_distribution', [sys.executable, utils('noise_distribution.py'), workdir] + plot_opt)]
+
+def run(command):
+    start = time.perf_counter()
+    subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--example-dir', default=EXAMPLE_DIR)
+    parser.add_argument('--workdir', default=None)
+    parser.add_argument('--repeat', type=int, default=1)
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='bench_setup_plots_')
+    prepare(args.example_dir, workdir)
+    print(f"  - Scratch example in {workdir}")
+
+    totals = {}
+    for label, plot_opt in (('plots', []), ('--no-plot', ['--no-plot'])):
+        times = {}
+        for _ in range(args.repeat):
+            for name, command in steps(workdir, plot_opt):
+                times[name] = min(times.get(name, np.inf), run(command))
+        totals[label] = sum(times.values())
+        print(f"  - {label:>9s}: " + ", ".join(f"{name} {t:6.2f} s" for name, t in times.items())
+              + f", total {totals[label]:6.2f} s")
+    print(f"  - Skipping plots saves {totals['plots'] - totals['--no-plot']:.2f} s "
+          f"({totals['plots'] / totals['--no-plot']:.1f}x faster setup)")
+
+if __name__ == "__main__":
+    main()
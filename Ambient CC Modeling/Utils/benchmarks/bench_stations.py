@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+"""
+Check and time the STATIONS writer and reader against the original pandas/text versions.
+
+Usage: python bench_stations.py [--n N] [--spacing M] [--repeat R] [--workdir DIR]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import station_geometry as sg
+
+# --------------------- ORIGINAL IMPLEMENTATIONS --------------------- #
+def legacy_write(file_path, ry, rx, z):
+    import pandas as pd
+
+    nrec_y, nrec_x = len(ry), len(rx)
+    rec = np.empty((nrec_y * nrec_x, 4))
+    rec[:, 0] = np.tile(ry, nrec_x)
+    rec[:, 1] = np.repeat(rx, nrec_y)
+    rec[:, 2] = 0.0
+    rec[:, 3] = z
+    y_index = [str(j) for _ in rx for j in range(nrec_y)]
+    x_index = [str(i) for i in range(nrec_x) for _ in ry]
+    df = pd.DataFrame(rec, columns=["Y", "X", "Z_dummy", "Z"])
+    df.insert(0, "sta_x_index", x_index)
+    df.insert(0, "sta_y_index", y_index)
+    output_str = df.to_string(header=False, col_space=8, index=False)
+    output_str = "\n".join(line.lstrip() for line in output_str.split("\n"))
+    with open(file_path, "w") as f:
+        f.write(output_str)
+
+def legacy_read(file_path):
+    with open(file_path, 'r') as f:
+        return [line.strip().split() for line in f]
+
+# --------------------- BENCHMARK --------------------- #
+def timed(func, repeat):
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--n', type=int, default=174, help='stations per side')
+    parser.add_argument('--spacing', type=float, default=450.3)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--workdir', default=None)
+    args = parser.parse_args()
+
+    axis = 3000.0 + args.spacing * np.arange(args.n)
+    workdir = args.workdir or tempfile.mkdtemp(prefix='bench_stations_')
+    old_file, new_file = os.path.join(workdir, 'STATIONS_OLD'), os.path.join(workdir, 'STATIONS_NEW')
+    print(f"  - {args.n} x {args.n} stations in {workdir}")
+
+    _, t_old = timed(lambda: legacy_write(old_file, axis, axis, 20.0), 1)
+    _, t_new = timed(lambda: sg.write_stations(new_file, sg.grid_table(axis, axis, 20.0)), args.repeat)
+    with open(old_file, 'rb') as f_old, open(new_file, 'rb') as f_new:
+        identical = f_old.read() == f_new.read()
+    print(f"  - write: pandas {t_old * 1e3:9.1f} ms, new {t_new * 1e3:8.1f} ms ({t_old / t_new:6.1f}x), "
+          f"identical: {identical}")
+    if not identical:
+        raise SystemExit("write_stations() does not match the original STATIONS layout.")
+
+    _, t_split = timed(lambda: legacy_read(old_file), args.repeat)
+    table, t_parse = timed(lambda: sg.load_stations(old_file, use_cache=False), args.repeat)
+    cached, t_cache = timed(lambda: sg.load_stations(new_file), args.repeat)
+    print(f"  - read: split {t_split * 1e3:8.1f} ms, loadtxt {t_parse * 1e3:8.1f} ms, "
+          f"sidecar {t_cache * 1e3:6.2f} ms, sidecar matches text: {np.array_equal(table, cached)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+"""
+Benchmark trace_io against the np.loadtxt path of create_driving_source_mpi.
+
+Usage: python bench_trace_io.py [--n-stations N] [--nt NT] [--sample N] [--binary] [--workdir DIR]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from trace_io import read_seismogram
+from synthetic import make_step1_tree, grid_shape
+
+def loadtxt_reader(file_path):
+    trace = np.loadtxt(file_path, dtype=float, comments='#')
+    return trace[:, 1], trace[0, 0], trace[1, 0] - trace[0, 0]
+
+def time_reader(reader, paths):
+    start = time.perf_counter()
+    for path in paths:
+        reader(path)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--n-stations', type=int, default=30276, help='noise stations in the synthetic grid (default: 174x174)')
+    parser.add_argument('--nt', type=int, default=2000, help='samples per trace (production step 1: 19000)')
+    parser.add_argument('--sample', type=int, default=500, help='number of traces timed per reader')
+    parser.add_argument('--binary', action='store_true', help='write SPECFEM binary seismograms instead of ASCII')
+    parser.add_argument('--workdir', default=None, help='reuse/keep the synthetic tree here')
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='bench_trace_io_')
+    seismogram_dir = os.path.join(workdir, 'OUTPUT_FILES_step1')
+    nx, ny = grid_shape(args.n_stations)
+
+    if not os.path.isdir(seismogram_dir):
+        print(f"  - Writing {nx * ny} synthetic traces ({args.nt} samples) to {seismogram_dir}")
+        make_step1_tree(seismogram_dir, nx, ny, args.nt, binary=args.binary)
+
+    files = sorted(f.path for f in os.scandir(seismogram_dir) if f.name.endswith('P.semp'))
+    paths = files[:args.sample]
+
+    # Correctness: same samples and time axis as the loadtxt path
+    if not args.binary:
+        for path in paths[:20]:
+            ref, ref_t0, ref_dt = loadtxt_reader(path)
+            amp, t0, dt = read_seismogram(path, dtype=np.float64)
+            assert np.array_equal(ref, amp) and ref_t0 == t0 and ref_dt == dt, path
+
+    buf = np.empty(args.nt, dtype=np.float32)
+    fast = time_reader(lambda p: read_seismogram(p, out=buf), paths)
+    print(f"  - trace_io.read_seismogram : {len(paths) / fast:9.1f} traces/s")
+
+    if not args.binary:
+        slow = time_reader(loadtxt_reader, paths)
+        print(f"  - np.loadtxt               : {len(paths) / slow:9.1f} traces/s")
+        print(f"  - speed-up                 : {slow / fast:9.1f}x")
+        print(f"  - projected for {len(files)} traces: {slow * len(files) / len(paths):.1f} s -> {fast * len(files) / len(paths):.1f} s")
+
+if __name__ == "__main__":
+    main()
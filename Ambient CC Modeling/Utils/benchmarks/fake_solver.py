@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+"""
+Local stand-in for the SPECFEM binaries, for testing campaign.py scheduling.
+
+Run from a run directory like the real binaries. Each mode sleeps for
+--seconds and writes the files the next stage reads:
+
+    mesher     OUTPUT_FILES/values_from_mesher.h, surface_from_mesher.h
+    databases  one database file in LOCAL_PATH
+    solver     OUTPUT_FILES/{net}.{sta}.?XP.semp (pressure) and/or .?X[XYZ].semv
+               (velocity) for DATA/STATIONS, NSTEP samples at DT; the band
+               code ? follows DT as in m8r_CC_mpi.py (F, C or H)
+
+The solver fails when LOCAL_PATH holds no database or, with
+USE_EXTERNAL_SOURCE_FILE, when a CMTSOLUTION source file is missing.
+
+Usage: python fake_solver.py mesher|databases|solver [--seconds S]
+"""
+
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from synthetic import synthetic_trace, write_ascii_seismogram
+
+DATABASE_FILE = 'proc000000_external_mesh.bin'
+
+def read_par(file_path):
+    """
+    KEY = value pairs of a SPECFEM parameter file (comments dropped).
+    """
+    par = {}
+    with open(file_path, 'r') as f:
+        for line in f:
+            key, sep, value = line.split('#')[0].partition('=')
+            if sep:
+                par[key.strip()] = value.strip()
+    return par
+
+def is_true(value):
+    return value.strip().lower() in ('.true.', 'true')
+
+def ricker_t0(force_file):
+    """
+    Start time SPECFEM uses for a Ricker force: -1.2 / f0 (0 without a frequency).
+    """
+    f0 = 0.0
+    with open(force_file, 'r') as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            if key.strip() == 'hdurorf0':
+                f0 = float(value.split()[0].replace('d', 'e'))
+    return -1.2 / f0 if f0 > 0 else 0.0
+
+def band_code(dt):
+    if round(dt, 3) <= .001:
+        return 'F'
+    return 'C' if round(dt, 3) <= .004 else 'H'
+
+def solver(par, rng):
+    local_path = par['LOCAL_PATH']
+    if not os.path.exists(os.path.join(local_path, DATABASE_FILE)):
+        raise SystemExit(f"No database in {local_path}: run the mesher and databases first.")
+    nstep, dt = int(par['NSTEP']), float(par['DT'].replace('d', 'e'))
+
+    t0 = 0.0
+    if is_true(par.get('USE_EXTERNAL_SOURCE_FILE', '.false.')):
+        with open('DATA/CMTSOLUTION', 'r') as f:
+            missing = [line.strip() for line in f if line.startswith('DATA/SOURCES/') and not os.path.exists(line.strip())]
+        if missing:
+            raise SystemExit(f"{len(missing)} external source files missing, e.g. {missing[0]}")
+    elif is_true(par.get('USE_FORCE_POINT_SOURCE', '.false.')):
+        t0 = ricker_t0('DATA/FORCESOLUTION')
+
+    time_axis = t0 + dt * np.arange(nstep)
+    band, suffixes = band_code(dt), []
+    if is_true(par.get('SAVE_SEISMOGRAMS_PRESSURE', '.false.')):
+        suffixes.append(f'{band}XP.semp')
+    if is_true(par.get('SAVE_SEISMOGRAMS_VELOCITY', '.false.')):
+        suffixes += [f'{band}X{comp}.semv' for comp in 'XYZ']
+    stations = np.loadtxt('DATA/STATIONS', dtype=str, ndmin=2)
+    for station, network in stations[:, :2]:
+        for suffix in suffixes:
+            write_ascii_seismogram(f'OUTPUT_FILES/{network}.{station}.{suffix}', time_axis,
+                                   synthetic_trace(nstep, dt, rng))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('mode', choices=['mesher', 'databases', 'solver'])
+    parser.add_argument('--seconds', type=float, default=1.0, help="emulated run time")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    par = read_par('DATA/Par_file')
+    os.makedirs('OUTPUT_FILES', exist_ok=True)
+    if args.mode == 'mesher':
+        for name in ('values_from_mesher.h', 'surface_from_mesher.h'):
+            with open(os.path.join('OUTPUT_FILES', name), 'w') as f:
+                f.write('! fake mesher output\n')
+    elif args.mode == 'databases':
+        os.makedirs(par['LOCAL_PATH'], exist_ok=True)
+        with open(os.path.join(par['LOCAL_PATH'], DATABASE_FILE), 'wb') as f:
+            f.write(b'\0' * 1024)
+    else:
+        solver(par, np.random.default_rng(os.getpid()))
+    time.sleep(max(0.0, args.seconds - (time.perf_counter() - start)))
+
+if __name__ == "__main__":
+    main()
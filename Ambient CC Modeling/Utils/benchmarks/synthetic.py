@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+"""
+Synthetic SPECFEM seismogram trees for benchmarking the Utils scripts.
+"""
+
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from noise_mask import MASK_FILE, write_mask
+
+ASCII_FMT = '%14.6f %15.7E\n'
+
+def synthetic_trace(nt, dt, rng):
+    """
+    Band-limited random trace standing in for a step-1 pressure recording.
+    """
+    white = rng.standard_normal(nt + 64)
+    kernel = np.hanning(64)
+    return np.convolve(white, kernel / kernel.sum(), mode='valid')[:nt]
+
+def write_ascii_seismogram(file_path, time_axis, amplitude):
+    """
+    Write a two-column ASCII seismogram the way SPECFEM does.
+    """
+    pairs = np.column_stack((time_axis, amplitude)).ravel()
+    with open(file_path, 'w') as f:
+        f.write((ASCII_FMT * time_axis.size) % tuple(pairs))
+
+def write_binary_seismogram(file_path, time_axis, amplitude):
+    """
+    Write a binary seismogram as a stream of float32 (time, amplitude) pairs.
+    """
+    np.column_stack((time_axis, amplitude)).astype(np.float32).tofile(file_path)
+
+def make_step1_tree(out_dir, nx, ny, nt, dt=0.004, t0=-1.2, binary=False, seed=0):
+    """
+    Create OUTPUT_FILES_step1/{x}.{y}.P.semp for an nx-by-ny noise grid.
+
+    Returns the list of file names written.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    time_axis = t0 + dt * np.arange(nt)
+    writer = write_binary_seismogram if binary else write_ascii_seismogram
+
+    names = []
+    for x in range(nx):
+        for y in range(ny):
+            name = f'{x}.{y}.P.semp'
+            writer(os.path.join(out_dir, name), time_axis, synthetic_trace(nt, dt, rng))
+            names.append(name)
+    return names
+
+def grid_shape(n_stations):
+    """
+    Closest square (nx, ny) noise grid holding at least n_stations receivers.
+    """
+    nx = int(np.ceil(np.sqrt(n_stations)))
+    ny = int(np.ceil(n_stations / nx))
+    return nx, ny
+
+def write_stations(file_path, nx, ny, spacing=450.3, origin=3000.0, depth=20.0):
+    """
+    Write a STATIONS file for an nx-by-ny grid (y index varies fastest).
+    """
+    with open(file_path, 'w') as f:
+        for x in range(nx):
+            for y in range(ny):
+                f.write(f'{y} {x} {origin + y * spacing:.1f} {origin + x * spacing:.1f} 0.0 {depth}\n')
+
+def make_example_dir(example_dir, nx, ny, nt, dt=0.004, t0=-1.2, binary=False, seed=0):
+    """
+    Minimal example directory for create_driving_source_mpi.py: step-1
+    seismograms, STATIONS_NOISE, a random NOISE_DISTRIBUTION.bin and DATA/SOURCES.
+    """
+    data_dir = os.path.join(example_dir, 'DATA')
+    os.makedirs(os.path.join(data_dir, 'SOURCES'), exist_ok=True)
+    make_step1_tree(os.path.join(example_dir, 'OUTPUT_FILES_step1'), nx, ny, nt, dt, t0, binary, seed)
+    write_stations(os.path.join(data_dir, 'STATIONS_NOISE'), nx, ny)
+    mask = np.random.default_rng(seed).uniform(size=(nx, ny))
+    write_mask(os.path.join(data_dir, MASK_FILE), mask, 3000.0, 3000.0, 450.3, 450.3)
+    return example_dir
+
+def make_step2_tree(example_dir, nx, ny, nt, dt=0.004, components='XYZ', data_type='v', pressure=False,
+                    binary=False, seed=0):
+    """
+    Create OUTPUT_FILES_step2/{x}.{y}.CX{comp}.sem{type} and DATA/STATIONS_OBN
+    for an nx-by-ny receiver grid (plus *.CXP.semp if pressure is set).
+    """
+    seismogram_dir = os.path.join(example_dir, 'OUTPUT_FILES_step2')
+    os.makedirs(seismogram_dir, exist_ok=True)
+    os.makedirs(os.path.join(example_dir, 'DATA'), exist_ok=True)
+    write_stations(os.path.join(example_dir, 'DATA', 'STATIONS_OBN'), nx, ny)
+
+    rng = np.random.default_rng(seed)
+    time_axis = -(nt - 1) * dt / 2 + dt * np.arange(nt)
+    writer = write_binary_seismogram if binary else write_ascii_seismogram
+    channels = [(c, data_type) for c in components] + ([('P', 'p')] if pressure else [])
+    for x in range(nx):
+        for y in range(ny):
+            for comp, comp_type in channels:
+                name = f'{x}.{y}.CX{comp}.sem{comp_type}'
+                writer(os.path.join(seismogram_dir, name), time_axis, synthetic_trace(nt, dt, rng))
+    return example_dir
@@ -0,0 +1,385 @@
+#!/usr/bin/env python
+"""
+Multi-virtual-source campaign: mesh and databases are built once, then the
+two-step noise simulation runs for every virtual source, pipelined.
+
+Stages per virtual source k (run directory CAMPAIGN/src_<k>):
+
+    step1     solver lane   FORCE at the virtual source, pressure at the noise stations
+    driving   aux lane      create_driving_source_mpi.py on OUTPUT_FILES_step1
+    step2     solver lane   noise sources (CMTSOLUTION + DATA/SOURCES) recorded at the OBNs
+    assemble  aux lane      m8r_CC_mpi.py into src_<k>/RSF (or HDF5)
+
+The solver lane has a single slot (the SPECFEM allocation). Among the ready
+solver runs the oldest source goes first, so step 1 of source k+1 runs while
+the aux lane builds the driving sources of k, and the cube of k is assembled
+while step 2 of k+1 is solved. At most `max_in_flight` sources are between
+step 1 and assembly at a time, which bounds disk use.
+
+Every run directory gets its own DATA/Par_file, STATIONS, FORCESOLUTION and
+OUTPUT_FILES; the other DATA entries are symlinks to the example, and
+LOCAL_PATH points every run at the shared CAMPAIGN/DATABASES_MPI.
+
+The campaign is described by a YAML file (default DATA/campaign.yaml):
+
+    sources: [[25500, 16500, 850], [40500, 16500, 850]]   # sx, sy, sz in m
+    nstep: 19000            # step-1 NSTEP / DT (optional, else the Par_file values)
+    dt: 0.004
+    aux_slots: 1            # aux commands allowed to run at once
+    max_in_flight: 2
+    commands:               # shell templates: {python} {utils_dir} {example_dir} {run_dir} {name}
+      mesher: srun bin/xmeshfem3D
+      ...
+
+On SLURM, size the allocation for the solver plus the aux commands and give
+each srun an explicit --nodes/--ntasks so the lanes do not wait on each other.
+
+Usage: python campaign.py EXAMPLE_DIR [CAMPAIGN_YAML] [--out DIR] [--poll SECONDS]
+"""
+
+import os
+import re
+import sys
+import glob
+import json
+import time
+import shlex
+import shutil
+import argparse
+import subprocess
+import yaml
+from fortran_io import record_length
+
+SOLVER, AUX = 'solver', 'aux'
+STAGES = ('mesher', 'databases', 'step1', 'driving', 'step2', 'assemble')
+STAGE_LANES = {'mesher': SOLVER, 'databases': SOLVER, 'step1': SOLVER, 'step2': SOLVER,
+               'driving': AUX, 'assemble': AUX}
+# DATA entries written per run instead of linked to the example
+RUN_FILES = ('Par_file', 'STATIONS', 'FORCESOLUTION', 'CMTSOLUTION', 'SOURCES', 'SOURCES_INDEX.npy')
+MESHER_FILES = ('surface*', 'value*')   # mesher output the solver expects in OUTPUT_FILES
+
+DEFAULT_COMMANDS = {
+    'mesher': 'srun bin/xmeshfem3D',
+    'databases': 'srun bin/xgenerate_databases',
+    'solver': 'srun bin/xspecfem3D',
+    'driving': 'srun --nodes=1 --ntasks=36 {python} {utils_dir}/create_driving_source_mpi.py {run_dir} velocity 2 --batch-size 64',
+    'assemble': 'srun --ntasks=75 {python} {utils_dir}/m8r_CC_mpi.py {run_dir} v Z all Saltmodel_{name}',
+}
+
+# --------------------- PARAMETER FILES --------------------- #
+def update_par(file_path, key, value):
+    """
+    Python version of common_functions.sh update_par: 'KEY = value'.
+    """
+    _update(file_path, rf'^\s*{re.escape(key)}\s*=.*$', f'{key} = {value}')
+
+def update_solution(file_path, key, value):
+    """
+    Python version of common_functions.sh update_SOLUTIONfile: 'key: value'.
+    """
+    _update(file_path, rf'^\s*{re.escape(key)}\s*:.*$', f'{key}: {value}')
+
+def _update(file_path, pattern, line):
+    with open(file_path, 'r') as f:
+        text = f.read()
+    text = re.sub(pattern, lambda _: line, text, flags=re.MULTILINE)
+    with open(file_path, 'w') as f:
+        f.write(text)
+
+def load_campaign(file_path):
+    """
+    Campaign settings with defaults filled in; sources as a list of (sx, sy, sz).
+    """
+    with open(file_path, 'r') as f:
+        par = yaml.safe_load(f) or {}
+    sources = [tuple(float(v) for v in source) for source in par.get('sources', [])]
+    if not sources or any(len(source) != 3 for source in sources):
+        raise ValueError(f"{file_path}: 'sources' must list [sx, sy, sz] positions in m.")
+    commands = dict(DEFAULT_COMMANDS, **(par.get('commands') or {}))
+    return {'sources': sources, 'nstep': par.get('nstep'), 'dt': par.get('dt'),
+            'aux_slots': int(par.get('aux_slots', 1)), 'max_in_flight': int(par.get('max_in_flight', 2)),
+            'commands': commands}
+
+# --------------------- RUN DIRECTORIES --------------------- #
+def link_data(example_dir, run_dir, skip=RUN_FILES):
+    """
+    run_dir/DATA with symlinks to the example's DATA entries, except the per-run files.
+    """
+    data_dir = os.path.join(run_dir, 'DATA')
+    os.makedirs(data_dir, exist_ok=True)
+    source_data = os.path.abspath(os.path.join(example_dir, 'DATA'))
+    for name in os.listdir(source_data):
+        target = os.path.join(data_dir, name)
+        if name in skip or name.endswith('.png') or os.path.lexists(target):
+            continue
+        os.symlink(os.path.join(source_data, name), target)
+    shutil.copy(os.path.join(source_data, 'Par_file'), os.path.join(data_dir, 'Par_file'))
+    bin_dir = os.path.join(run_dir, 'bin')
+    if not os.path.lexists(bin_dir):
+        os.symlink(os.path.abspath(os.path.join(example_dir, 'bin')), bin_dir)
+    return data_dir
+
+def collect_output(run_dir, out_name):
+    """
+    Same as transfer_files_to_other + safe_mv: tidy OUTPUT_FILES and rename it.
+    """
+    output_dir = os.path.join(run_dir, 'OUTPUT_FILES')
+    other_dir = os.path.join(output_dir, 'OTHER_FILES')
+    os.makedirs(other_dir, exist_ok=True)
+    for pattern in ('timestamp*', 'movie*', 'start*', 'output*', 'mesh*', 'plot*', 'sr*') + MESHER_FILES:
+        for path in glob.glob(os.path.join(output_dir, pattern)):
+            shutil.move(path, other_dir)
+    final_dir = os.path.join(run_dir, out_name)
+    if os.path.exists(final_dir):
+        shutil.rmtree(final_dir)
+    os.rename(output_dir, final_dir)
+
+class Campaign:
+    """
+    Directory layout and the per-stage preparation/cleanup of one campaign.
+    """
+
+    def __init__(self, example_dir, out_dir, par):
+        self.example_dir = os.path.abspath(example_dir)
+        self.out_dir = os.path.abspath(out_dir)
+        self.par = par
+        self.databases = os.path.join(self.out_dir, 'DATABASES_MPI')
+        self.mesher_files = os.path.join(self.out_dir, 'MESHER_FILES')
+        self.mesh_dir = os.path.join(self.out_dir, 'mesh')
+
+    def run_dir(self, k):
+        return os.path.join(self.out_dir, f'src_{k:03d}')
+
+    def command(self, stage, run_dir, name):
+        template = self.par['commands']['solver' if stage in ('step1', 'step2') else stage]
+        # Quoted, since example paths may contain spaces
+        fields = {'python': sys.executable, 'utils_dir': os.path.dirname(os.path.abspath(__file__)),
+                  'example_dir': self.example_dir, 'run_dir': run_dir, 'name': name}
+        return template.format(**{key: shlex.quote(value) for key, value in fields.items()})
+
+    def _fresh_output(self, run_dir):
+        output_dir = os.path.join(run_dir, 'OUTPUT_FILES')
+        if os.path.exists(output_dir):
+            shutil.rmtree(output_dir)
+        os.makedirs(output_dir)
+        for path in glob.glob(os.path.join(self.mesher_files, '*')):
+            shutil.copy(path, output_dir)
+
+    # Mesh and databases: once, in CAMPAIGN/mesh, into the shared DATABASES_MPI
+    def prepare_mesh(self):
+        data_dir = link_data(self.example_dir, self.mesh_dir)
+        update_par(os.path.join(data_dir, 'Par_file'), 'LOCAL_PATH', self.databases)
+        self._step1_par(data_dir)
+        os.makedirs(self.databases, exist_ok=True)
+        os.makedirs(os.path.join(self.mesh_dir, 'OUTPUT_FILES'), exist_ok=True)
+
+    def finish_databases(self):
+        os.makedirs(self.mesher_files, exist_ok=True)
+        for pattern in MESHER_FILES:
+            for path in glob.glob(os.path.join(self.mesh_dir, 'OUTPUT_FILES', pattern)):
+                shutil.copy(path, self.mesher_files)
+
+    def _step1_par(self, data_dir):
+        par_file = os.path.join(data_dir, 'Par_file')
+        if self.par['nstep'] is not None:
+            update_par(par_file, 'NSTEP', self.par['nstep'])
+        if self.par['dt'] is not None:
+            update_par(par_file, 'DT', self.par['dt'])
+        for key, value in (('SAVE_SEISMOGRAMS_PRESSURE', '.true.'), ('SAVE_SEISMOGRAMS_DISPLACEMENT', '.false.'),
+                           ('SAVE_SEISMOGRAMS_VELOCITY', '.false.'), ('USE_FORCE_POINT_SOURCE', '.true.'),
+                           ('USE_RICKER_TIME_FUNCTION', '.true.'), ('USE_EXTERNAL_SOURCE_FILE', '.false.')):
+            update_par(par_file, key, value)
+
+    # Step 1: FORCE at the virtual source, recorded at the noise stations
+    def prepare_step1(self, k):
+        run_dir = self.run_dir(k)
+        data_dir = link_data(self.example_dir, run_dir)
+        update_par(os.path.join(data_dir, 'Par_file'), 'LOCAL_PATH', self.databases)
+        self._step1_par(data_dir)
+        sx, sy, sz = self.par['sources'][k]
+        force = os.path.join(data_dir, 'FORCESOLUTION')
+        shutil.copy(os.path.join(self.example_dir, 'DATA', 'FORCESOLUTION'), force)
+        update_solution(force, 'latorUTM', sy)
+        update_solution(force, 'longorUTM', sx)
+        update_solution(force, 'depth', sz / 1000)
+        shutil.copy(os.path.join(data_dir, 'STATIONS_NOISE'), os.path.join(data_dir, 'STATIONS'))
+        for name in ('CMTSOLUTION', 'SOURCES', 'SOURCES_INDEX.npy'):
+            path = os.path.join(data_dir, name)
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            elif os.path.exists(path):
+                os.remove(path)
+        os.makedirs(os.path.join(data_dir, 'SOURCES'))
+        self._fresh_output(run_dir)
+
+    def finish_step1(self, k):
+        collect_output(self.run_dir(k), 'OUTPUT_FILES_step1')
+
+    # Step 2: the driving sources, recorded at the OBNs
+    def prepare_step2(self, k):
+        run_dir = self.run_dir(k)
+        data_dir = os.path.join(run_dir, 'DATA')
+        sources = glob.glob(os.path.join(data_dir, 'SOURCES', '*.bin'))
+        if not sources:
+            raise RuntimeError(f"No driving sources in {data_dir}/SOURCES.")
+        par_file = os.path.join(data_dir, 'Par_file')
+        update_par(par_file, 'NSTEP', record_length(sources[0]))
+        for key, value in (('SAVE_MESH_FILES', '.false.'), ('USE_FORCE_POINT_SOURCE', '.false.'),
+                           ('USE_EXTERNAL_SOURCE_FILE', '.true.'), ('SAVE_SEISMOGRAMS_VELOCITY', '.true.'),
+                           ('SAVE_SEISMOGRAMS_DISPLACEMENT', '.false.'), ('SAVE_SEISMOGRAMS_PRESSURE', '.false.')):
+            update_par(par_file, key, value)
+        shutil.copy(os.path.join(data_dir, 'STATIONS_OBN'), os.path.join(data_dir, 'STATIONS'))
+        self._fresh_output(run_dir)
+
+    def finish_step2(self, k):
+        collect_output(self.run_dir(k), 'OUTPUT_FILES_step2')
+
+# --------------------- PIPELINE --------------------- #
+class Task:
+    """
+    One command on a lane, with the tasks it waits for and Python hooks around it.
+    """
+
+    def __init__(self, name, lane, source, stage, command, cwd, deps=(), before=None, after=None):
+        self.name = name
+        self.lane = lane
+        self.source = source
+        self.stage = stage
+        self.command = command
+        self.cwd = cwd
+        self.deps = tuple(deps)
+        self.before = before
+        self.after = after
+
+    def priority(self):
+        # Oldest source first; within a source, the earlier stage
+        return (self.source, STAGES.index(self.stage))
+
+def campaign_tasks(campaign):
+    """
+    Tasks of a whole campaign: mesh and databases once, then four stages per source.
+    """
+    mesh = campaign.mesh_dir
+    tasks = [Task('mesher', SOLVER, -1, 'mesher', campaign.command('mesher', mesh, 'mesh'), mesh,
+                  before=campaign.prepare_mesh),
+             Task('databases', SOLVER, -1, 'databases', campaign.command('databases', mesh, 'mesh'), mesh,
+                  deps=['mesher'], after=campaign.finish_databases)]
+    for k in range(len(campaign.par['sources'])):
+        run_dir, name = campaign.run_dir(k), f'src_{k:03d}'
+        hooks = {'step1': (lambda k=k: campaign.prepare_step1(k), lambda k=k: campaign.finish_step1(k)),
+                 'step2': (lambda k=k: campaign.prepare_step2(k), lambda k=k: campaign.finish_step2(k))}
+        deps = {'step1': ['databases'], 'driving': [f'{name}/step1'],
+                'step2': [f'{name}/driving'], 'assemble': [f'{name}/step2']}
+        for stage in ('step1', 'driving', 'step2', 'assemble'):
+            before, after = hooks.get(stage, (None, None))
+            tasks.append(Task(f'{name}/{stage}', STAGE_LANES[stage], k, stage,
+                              campaign.command(stage, run_dir, name), run_dir, deps[stage], before, after))
+    return tasks
+
+def run_pipeline(tasks, slots, max_in_flight=2, log_dir='.', poll=0.5):
+    """
+    Run tasks as their dependencies complete, at most slots[lane] at a time per lane.
+
+    A source enters the pipeline (its step 1 starts) only while fewer than
+    max_in_flight sources are unfinished. Returns the timeline as a list of
+    {task, lane, start, end} dicts (seconds from the start); a failed command
+    stops the campaign after the running ones are terminated.
+    """
+    os.makedirs(log_dir, exist_ok=True)
+    pending = sorted(tasks, key=Task.priority)
+    running, done, timeline = {}, set(), []
+    started_sources, finished_sources = set(), set()
+    last_stage = {}
+    for task in tasks:
+        last_stage[task.source] = task.name
+    t0 = time.perf_counter()
+
+    def admitted(task):
+        if task.source < 0 or task.source in started_sources:
+            return True
+        return len(started_sources - finished_sources) < max_in_flight
+
+    try:
+        while pending or running:
+            # Reap finished commands
+            for task, (proc, log, start) in list(running.items()):
+                if proc.poll() is None:
+                    continue
+                log.close()
+                del running[task]
+                if proc.returncode != 0:
+                    raise RuntimeError(f"{task.name} failed (exit {proc.returncode}); see {log.name}")
+                if task.after:
+                    task.after()
+                done.add(task.name)
+                if last_stage[task.source] == task.name:
+                    finished_sources.add(task.source)
+                timeline.append({'task': task.name, 'lane': task.lane,
+                                 'start': round(start - t0, 3), 'end': round(time.perf_counter() - t0, 3)})
+                print(f"  -[{time.perf_counter() - t0:8.1f} s] done  {task.name}")
+
+            # Start ready tasks, oldest source first, while their lane has free slots
+            for task in list(pending):
+                busy = sum(1 for other in running if other.lane == task.lane)
+                if busy >= slots[task.lane] or not all(dep in done for dep in task.deps) or not admitted(task):
+                    continue
+                if task.before:
+                    task.before()
+                log = open(os.path.join(log_dir, task.name.replace('/', '_') + '.log'), 'w')
+                proc = subprocess.Popen(task.command, shell=True, cwd=task.cwd, stdout=log, stderr=subprocess.STDOUT)
+                running[task] = (proc, log, time.perf_counter())
+                pending.remove(task)
+                started_sources.add(task.source)
+                print(f"  -[{time.perf_counter() - t0:8.1f} s] start {task.name} ({task.lane})")
+
+            if pending and not running:
+                raise RuntimeError(f"No task can start: {[task.name for task in pending]}")
+            if running:
+                time.sleep(poll)
+    finally:
+        for proc, log, _ in running.values():
+            proc.terminate()
+            proc.wait()
+            log.close()
+    return timeline
+
+def summarize(timeline):
+    """
+    Wall time, solver-lane busy time and the time aux commands ran alongside the solver.
+    """
+    def intervals(lane):
+        return [(t['start'], t['end']) for t in timeline if t['lane'] == lane]
+
+    wall = max((t['end'] for t in timeline), default=0.0)
+    solver = intervals(SOLVER)
+    solver_busy = sum(end - start for start, end in solver)
+    overlap = sum(max(0.0, min(e1, e2) - max(s1, s2)) for s1, e1 in intervals(AUX) for s2, e2 in solver)
+    aux_busy = sum(end - start for start, end in intervals(AUX))
+    return {'wall': wall, 'solver_busy': solver_busy, 'aux_busy': aux_busy, 'overlap': overlap}
+
+def run_campaign(example_dir, config, out_dir=None, poll=0.5):
+    par = load_campaign(config)
+    campaign = Campaign(example_dir, out_dir or os.path.join(example_dir, 'CAMPAIGN'), par)
+    os.makedirs(campaign.out_dir, exist_ok=True)
+    print(f"  -Campaign of {len(par['sources'])} virtual sources in {campaign.out_dir}")
+    timeline = run_pipeline(campaign_tasks(campaign), {SOLVER: 1, AUX: par['aux_slots']},
+                            par['max_in_flight'], os.path.join(campaign.out_dir, 'logs'), poll)
+    stats = summarize(timeline)
+    with open(os.path.join(campaign.out_dir, 'timeline.json'), 'w') as f:
+        json.dump({'timeline': timeline, 'summary': stats}, f, indent=2)
+    print(f"  -Campaign done in {stats['wall']:.1f} s: solver busy {stats['solver_busy']:.1f} s, "
+          f"aux busy {stats['aux_busy']:.1f} s, {stats['overlap']:.1f} s of aux work hidden behind the solver")
+    return stats
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Run the two-step noise simulation for many virtual sources.")
+    parser.add_argument('example_dir')
+    parser.add_argument('config', nargs='?', default=None, help="campaign YAML (default: DATA/campaign.yaml)")
+    parser.add_argument('--out', default=None, help="campaign directory (default: EXAMPLE_DIR/CAMPAIGN)")
+    parser.add_argument('--poll', type=float, default=0.5, help="seconds between checks of the running commands")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args(sys.argv[1:])
+    config = args.config or os.path.join(args.example_dir, 'DATA', 'campaign.yaml')
+    run_campaign(args.example_dir, config, args.out, args.poll)
@@ -0,0 +1,264 @@
+#!/usr/bin/env python
+"""
+Output backends for the virtual shot gather cubes built by m8r_CC_mpi.py.
+
+Every backend stores a (t, y, x) float32 cube per component and takes the y
+rows each MPI rank assembled, in any order:
+
+    rsf   Madagascar header + native float32 binary (collective MPI-IO)
+    hdf5  chunked HDF5 dataset with optional gzip/lzf compression and lossy
+          scale-offset packing; written in parallel with the mpio driver when
+          h5py is built against MPI, otherwise rank by rank
+
+`open_cube` and `read_subset` give lazy access to either format, so QC tools
+can read a few time slices or traces without loading the whole cube.
+
+Usage: python cc_backends.py info CUBE     (shape, axes and storage layout)
+"""
+
+import os
+import sys
+import numpy as np
+from rsf_io import rsf_axis, rsf_data_path, read_rsf, write_rows, write_rsf_header
+
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
+# Default HDF5 chunk: 256 time samples by 16 x 16 receivers (256 KiB of float32).
+# A time slice then touches (ny/16)*(nx/16) chunks and a trace nt/256 chunks.
+DEFAULT_CHUNKS = (256, 16, 16)
+HDF5_WRITE_BLOCK_BYTES = 64 * 2**20
+HDF5_DATASET = 'data'
+
+# --------------------- AXES --------------------- #
+def axes_to_keys(axes):
+    """
+    Flatten axes (fastest first) into RSF-style n1/d1/o1/label1/unit1 keys.
+    """
+    keys = {}
+    for k, axis in enumerate(axes, start=1):
+        for field in ('n', 'd', 'o', 'label', 'unit'):
+            keys[f'{field}{k}'] = axis[field]
+    return keys
+
+def axes_from_keys(keys):
+    """
+    Axes (fastest first) from RSF-style keys in a header or attribute mapping.
+    """
+    axes = []
+    k = 1
+    while f'n{k}' in keys:
+        axes.append(rsf_axis(int(keys[f'n{k}']), float(keys.get(f'd{k}', 1.0)), float(keys.get(f'o{k}', 0.0)),
+                             str(keys.get(f'label{k}', '')), str(keys.get(f'unit{k}', ''))))
+        k += 1
+    return axes
+
+def axis_values(axis):
+    """
+    Coordinates along one axis.
+    """
+    return axis['o'] + axis['d'] * np.arange(axis['n'])
+
+# --------------------- RSF --------------------- #
+class RSFBackend:
+    """
+    Madagascar RSF cubes, one header/binary pair per component.
+    """
+    name = 'rsf'
+    directory = 'RSF'
+    suffix = '.rsf'
+
+    def __init__(self, comm, out_dir):
+        self.comm = comm
+        self.out_dir = out_dir
+        self.row_block = 1
+
+    def write(self, name, rows, data, ny, axes):
+        """
+        Collectively write this rank's rows; returns the header path.
+        """
+        header_path = os.path.join(self.out_dir, name + self.suffix)
+        data_path = rsf_data_path(header_path)
+        write_rows(self.comm, data_path, rows, data, ny)
+        if self.comm.Get_rank() == 0:
+            write_rsf_header(header_path, axes, data_path)
+        return header_path
+
+# --------------------- HDF5 --------------------- #
+def _contiguous_runs(rows):
+    """
+    Split sorted row indices into (first, stop, positions) runs of consecutive rows.
+    """
+    runs = []
+    start = 0
+    for k in range(1, len(rows) + 1):
+        if k == len(rows) or rows[k] != rows[k - 1] + 1:
+            runs.append((rows[start], rows[k - 1] + 1, range(start, k)))
+            start = k
+    return runs
+
+class HDF5Backend:
+    """
+    Chunked, optionally compressed HDF5 cubes: dataset 'data' of shape (nt, ny, nx)
+    with the axes stored as n1/d1/o1/label1/unit1 attributes (1 = x, fastest).
+
+    compression: None, 'gzip' (level in compression_opts, 1-9) or 'lzf'.
+    scaleoffset: decimal digits kept by the lossy scale-offset filter, or None.
+    """
+    name = 'hdf5'
+    directory = 'HDF5'
+    suffix = '.h5'
+
+    def __init__(self, comm, out_dir, chunks=None, compression=None, compression_opts=None,
+                 scaleoffset=None, shuffle=None):
+        if h5py is None:
+            raise ImportError("The hdf5 backend needs h5py (pip install h5py).")
+        if compression not in (None, 'gzip', 'lzf'):
+            raise ValueError("Invalid compression. Use 'gzip', 'lzf' or None.")
+        self.comm = comm
+        self.out_dir = out_dir
+        self.chunks = tuple(chunks or DEFAULT_CHUNKS)
+        self.compression = compression
+        self.compression_opts = compression_opts if compression == 'gzip' else None
+        self.scaleoffset = scaleoffset
+        self.shuffle = bool(compression) if shuffle is None else shuffle
+        self.filtered = bool(compression or scaleoffset is not None or self.shuffle)
+        # Parallel HDF5 cannot write filtered chunks independently; those go rank by rank
+        self.parallel = h5py.get_config().mpi and comm.Get_size() > 1 and not self.filtered
+        # Rows claimed in chunk-sized blocks leave each chunk to a single rank
+        self.row_block = self.chunks[1]
+
+    def _chunk_shape(self, shape):
+        return tuple(max(1, min(c, n)) for c, n in zip(self.chunks, shape))
+
+    def _create(self, path, shape, axes):
+        """
+        Create the file and dataset (all ranks with mpio, else rank 0 alone).
+        """
+        if self.parallel:
+            f = h5py.File(path, 'w', driver='mpio', comm=self.comm)
+        else:
+            f = h5py.File(path, 'w')
+        dset = f.create_dataset(HDF5_DATASET, shape=shape, dtype=np.float32,
+                                chunks=self._chunk_shape(shape), compression=self.compression,
+                                compression_opts=self.compression_opts, scaleoffset=self.scaleoffset,
+                                shuffle=self.shuffle)
+        for key, value in axes_to_keys(axes).items():
+            dset.attrs[key] = value
+        return f
+
+    def _write_rows(self, dset, rows, data):
+        """
+        Write sorted rows in blocks of whole time chunks, one contiguous y run at a time.
+        """
+        nt, _, nx = dset.shape
+        chunk_nt = dset.chunks[0]
+        for first, stop, positions in _contiguous_runs(rows):
+            block_nt = HDF5_WRITE_BLOCK_BYTES // ((stop - first) * nx * 4 * chunk_nt) * chunk_nt
+            block_nt = max(chunk_nt, block_nt)
+            block = np.empty((min(block_nt, nt), stop - first, nx), dtype=np.float32)
+            for t0 in range(0, nt, block_nt):
+                t1 = min(t0 + block_nt, nt)
+                for r, k in enumerate(positions):
+                    block[:t1 - t0, r, :] = data[k][:, t0:t1].T
+                dset[t0:t1, first:stop, :] = block[:t1 - t0]
+
+    def write(self, name, rows, data, ny, axes):
+        """
+        Write this rank's rows of one component (collective); returns the file path.
+        """
+        path = os.path.join(self.out_dir, name + self.suffix)
+        rank = self.comm.Get_rank()
+        shape = (axes[2]['n'], ny, axes[0]['n'])
+        order = np.argsort(rows)
+        rows = [int(rows[k]) for k in order]
+        data = [data[k] for k in order]
+
+        if self.parallel:
+            with self._create(path, shape, axes) as f:
+                self._write_rows(f[HDF5_DATASET], rows, data)
+            return path
+
+        # Serialized: rank 0 creates the file, then each rank appends its rows in turn
+        if rank == 0:
+            with self._create(path, shape, axes) as f:
+                self._write_rows(f[HDF5_DATASET], rows, data)
+        else:
+            self.comm.recv(source=rank - 1, tag=11)
+            with h5py.File(path, 'a') as f:
+                self._write_rows(f[HDF5_DATASET], rows, data)
+        if rank + 1 < self.comm.Get_size():
+            self.comm.send(None, dest=rank + 1, tag=11)
+        self.comm.Barrier()
+        return path
+
+BACKENDS = {RSFBackend.name: RSFBackend, HDF5Backend.name: HDF5Backend}
+
+def make_backend(kind, comm, example_dir, **options):
+    """
+    Backend writing into example_dir/RSF or example_dir/HDF5 (created if needed).
+    """
+    if kind not in BACKENDS:
+        raise ValueError(f"Invalid output format. Use one of {sorted(BACKENDS)}.")
+    backend = BACKENDS[kind]
+    out_dir = os.path.join(example_dir, backend.directory)
+    os.makedirs(out_dir, exist_ok=True)
+    return backend(comm, out_dir, **options)
+
+# --------------------- READERS --------------------- #
+def open_cube(path):
+    """
+    Lazily open a cube; returns (array-like of shape (nt, ny, nx), axes fastest first).
+
+    RSF cubes are memory-mapped, HDF5 cubes are returned as an h5py dataset
+    (the file stays open while the dataset is referenced). Slicing either one
+    reads only the selected samples.
+    """
+    if path.endswith(HDF5Backend.suffix):
+        if h5py is None:
+            raise ImportError("Reading HDF5 cubes needs h5py (pip install h5py).")
+        dset = h5py.File(path, 'r')[HDF5_DATASET]
+        return dset, axes_from_keys(dset.attrs)
+    data, header = read_rsf(path)
+    return data, axes_from_keys(header)
+
+def time_window(axes, tmin=None, tmax=None):
+    """
+    Index slice of the time axis covering [tmin, tmax] seconds.
+    """
+    t = axis_values(axes[2])
+    first = 0 if tmin is None else int(np.searchsorted(t, tmin - 1e-9 * abs(axes[2]['d'])))
+    stop = t.size if tmax is None else int(np.searchsorted(t, tmax + 1e-9 * abs(axes[2]['d']), side='right'))
+    return slice(first, stop)
+
+def read_subset(path, t=slice(None), y=slice(None), x=slice(None)):
+    """
+    Read a (t, y, x) selection of a cube into memory; returns (array, axes).
+
+    Each index may be an int, a slice or (for one axis at a time with HDF5)
+    an increasing list of indices.
+    """
+    data, axes = open_cube(path)
+    return np.asarray(data[t, y, x], dtype=np.float32), axes
+
+def describe(path):
+    """
+    One-line summary per axis plus the on-disk layout.
+    """
+    data, axes = open_cube(path)
+    lines = [f"{path}: {' x '.join(str(n) for n in data.shape)} float32 (t, y, x)"]
+    for k, axis in enumerate(axes, start=1):
+        lines.append(f"  axis {k}: n={axis['n']} d={axis['d']} o={axis['o']} {axis['label']} [{axis['unit']}]")
+    if path.endswith(HDF5Backend.suffix):
+        lines.append(f"  chunks={data.chunks} compression={data.compression} "
+                     f"scaleoffset={data.scaleoffset} shuffle={data.shuffle}")
+        data.file.close()
+    return "\n".join(lines)
+
+# --------------------- ENTRY POINT --------------------- #
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] != 'info':
+        raise ValueError("Usage: python cc_backends.py info CUBE")
+    print(describe(sys.argv[2]))
@@ -2,141 +2,449 @@
 
 import os
 import sys
-import array
+import time
+import argparse
 import numpy as np
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
 from mpi4py import MPI
-from scipy.signal import butter, filtfilt
+from scipy.signal import butter, sosfiltfilt
+from trace_io import read_seismogram, read_seismograms
+from fortran_io import read_record, write_record, write_records
+from scheduler import ChunkScheduler
+from noise_mask import shared_mask
+from station_geometry import load_stations
+from source_index import check_source_files, source_table, write_cmtsolutions, write_index
+from profiling import profiler
+from manifest import Journal, discard_manifest, fingerprint, load_manifest, save_manifest
+from prefetch import DEFAULT_DEPTH, AsyncWriter, Prefetcher
 
 # --------------------- MPI SETUP --------------------- #
 comm = MPI.COMM_WORLD
 rank = comm.Get_rank()
 size = comm.Get_size()
 
-# --------------------- ARGUMENT PARSING --------------------- #
-if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        raise ValueError("Usage: python create_driving_source_mpi.py example_dir [freq_lp]")
+DEFAULT_CHUNK_SIZE = 8
 
-    example_dir = str(sys.argv[1])
-    cc_type= str(sys.argv[2])
-    if sys.argv[3] != 'None':
-        freq_lp = float(sys.argv[3])
-    else:
-        freq_lp = 'None'
+# --------------------- HELPER FUNCTIONS --------------------- #
+def design_lowpass(dt, freq_lp, order=4):
+    """
+    Low-pass Butterworth filter as second-order sections.
+    """
+    fs = 1.0 / dt
+    nyquist = 0.5 * fs
+    normal_cutoff = freq_lp / nyquist
+    return butter(order, normal_cutoff, btype='low', output='sos')
 
-# --------------------- PATH DEFINITIONS --------------------- #
-seismogram_dir = os.path.join(example_dir, 'OUTPUT_FILES_step1')
-data_dir = os.path.join(example_dir, 'DATA')
-sources_dir = os.path.join(data_dir, 'SOURCES')
-station_file = os.path.join(data_dir, 'STATIONS_NOISE')
+def lowpass_filter(data, dt, freq_lp, order=4, axis=-1):
+    """
+    Apply zero-phase low-pass Butterworth filter.
+    """
+    return sosfiltfilt(design_lowpass(dt, freq_lp, order), data, axis=axis)
 
-# --------------------- HELPER FUNCTIONS --------------------- #
-def write_binary_file(filename, data):
+def cosine_taper(n):
     """
-    Write 1D numpy array to a Fortran-style binary file.
+    Cosine taper over 5% of the samples at both ends.
     """
-    custom_type = 'f'  # 'f' for float32
-    num_points = data.size
-    binlength = array.array('i', [num_points * 4])
-    binvalues = array.array(custom_type, np.reshape(data, (num_points), order='F').tolist())
+    taper = np.ones(n)
+    n_taper = int(0.05 * n)
+    cosine_window = 0.5 * (1 - np.cos(np.linspace(0, np.pi, n_taper)))
+    taper[:n_taper] = cosine_window
+    taper[-n_taper:] = cosine_window
+    return taper
 
-    with open(filename, mode='wb') as f:
-        binlength.tofile(f)
-        binvalues.tofile(f)
-        binlength.tofile(f)
+def causal_pad_length(nt, t0, dt):
+    """
+    Zeros appended to the reversed trace to make it 2*N-1 steps long (N = causal time steps).
+    """
+    w_ot_shift = -1 * t0 # Wavelet origin time shift
+    return nt - 2 * int(w_ot_shift // dt) - 1
 
-def lowpass_filter(data, dt, freq_lp, order=4):
+def station_indices(file):
     """
-    Apply low-pass Butterworth filter.
+    (x, y) grid indices from a '{x}.{y}.P.semp' file name.
     """
-    fs = 1.0 / dt
-    nyquist = 0.5 * fs
-    normal_cutoff = freq_lp / nyquist
-    b, a = butter(order, normal_cutoff, btype='low')
-    return filtfilt(b, a, data)
+    x, y = map(int, file.split('.')[:2])
+    return x, y
 
-def process_trace(file, noise_mask):
+def check_cc_type(cc_type):
+    if cc_type not in ['pressure', 'velocity']:
+        raise ValueError("Invalid cc_type. Use 'velocity' or 'pressure.")
+
+def read_trace(file_path):
+    with profiler.phase('read'):
+        trace = read_seismogram(file_path, dtype=np.float64)
+    profiler.file_read(file_path)
+    return trace
+
+def read_batch(file_paths):
+    with profiler.phase('read'):
+        batch = read_seismograms(file_paths, dtype=np.float64)
+    for path in file_paths:
+        profiler.file_read(path)
+    return batch
+
+def write_sources(output_paths, data, workers=1):
+    with profiler.phase('write'):
+        write_records(output_paths, data, workers=workers)
+    for path in output_paths:
+        profiler.file_written(path)
+
+def process_trace(file, noise_mask, seismogram_dir, sources_dir, cc_type, freq_lp, trace=None, writer=None):
     """
     Process a single seismogram file: reverse, taper, mask, and write.
+
+    trace is the (amplitude, t0, dt) already read by a Prefetcher and writer
+    an AsyncWriter; without them the file is read and written in line.
     """
     file_path = os.path.join(seismogram_dir, file)
-    x, y = map(int, file.split('.')[:2])
+    x, y = station_indices(file)
 
-    trace = np.loadtxt(file_path, dtype=float, comments='#')
-    dt = trace[1, 0] - trace[0, 0] # Time step
-    w_ot_shift = -1 * trace[0, 0] # Wavelet origin time shift
+    amplitude, t0, dt = trace or read_trace(file_path) # dt: Time step
 
-    #Time reversal
-    reversed_trace = np.flip(trace[:, 1])
-    # Padding to make length equal to 2*N-1 steps. N=causal time steps
-    pad_len = len(reversed_trace) - 2 * int(w_ot_shift // dt) - 1  
-    padded_trace = np.pad(reversed_trace, (0, pad_len), mode='constant') * noise_mask[x, y]
+    with profiler.phase('process'):
+        #Time reversal
+        reversed_trace = np.flip(amplitude)
+        # Padding to make length equal to 2*N-1 steps. N=causal time steps
+        pad_len = causal_pad_length(len(reversed_trace), t0, dt)
+        padded_trace = np.pad(reversed_trace, (0, pad_len), mode='constant') * noise_mask[x, y]
 
-    #Postprocess the trace
+        #Postprocess the trace
 
-    # Apply cosine taper at both ends
-    taper = np.ones(len(padded_trace))
-    n_taper = int(0.05 * len(padded_trace))
-    cosine_window = 0.5 * (1 - np.cos(np.linspace(0, np.pi, n_taper)))
-    taper[:n_taper] = cosine_window
-    taper[-n_taper:] = cosine_window
-    padded_trace *= taper
+        # Apply cosine taper at both ends
+        padded_trace *= cosine_taper(len(padded_trace))
 
-    # Apply low-pass filter if specified
-    if freq_lp!= 'None':
-        padded_trace = lowpass_filter(padded_trace, dt, freq_lp)
-    
-    if cc_type in ['pressure', 'velocity']:
+        # Apply low-pass filter if specified
+        if freq_lp!= 'None':
+            padded_trace = lowpass_filter(padded_trace, dt, freq_lp)
+
+        check_cc_type(cc_type)
         if cc_type == 'velocity':
-            padded_trace = -1 * padded_trace 
-    else:
-        raise ValueError("Invalid cc_type. Use 'velocity' or 'pressure.")
+            padded_trace = -1 * padded_trace
 
     # Write the processed trace to a binary file
     output_path = os.path.join(sources_dir, f'{x}.{y}.P.bin')
-    write_binary_file(output_path, padded_trace)
+    if writer is None:
+        write_sources([output_path], [padded_trace])
+    else:
+        writer.submit(write_sources, [output_path], [padded_trace])
+
+def process_batch(files, noise_mask, seismogram_dir, sources_dir, cc_type, freq_lp, write_workers=1,
+                  traces=None, writer=None):
+    """
+    Process equal-length seismograms as one (ntraces, nsamples) array.
+
+    Same steps as process_trace, applied along the time axis of the stack;
+    taper and filter coefficients are computed once per batch. traces and
+    writer are as in process_trace, for the whole batch.
+    """
+    check_cc_type(cc_type)
+    paths = [os.path.join(seismogram_dir, file) for file in files]
+    traces, t0, dt = traces or read_batch(paths)
+    nt = traces.shape[1]
+    xy = np.array([station_indices(file) for file in files])
+
+    with profiler.phase('process'):
+        # Time reversal, padding to 2*N-1 steps and noise-mask scaling
+        padded = np.zeros((len(files), nt + causal_pad_length(nt, t0, dt)))
+        padded[:, :nt] = traces[:, ::-1]
+        padded *= noise_mask[xy[:, 0], xy[:, 1]][:, np.newaxis]
+
+        padded *= cosine_taper(padded.shape[1])
 
-def create_cmtsolutions(data_dir, station_file):
+        if freq_lp != 'None':
+            padded = sosfiltfilt(design_lowpass(dt, freq_lp), padded, axis=1)
+
+        if cc_type == 'velocity':
+            padded = -1 * padded
+
+    # One float32 cast for the whole batch, then each row is written in place
+    output_paths = [os.path.join(sources_dir, f'{x}.{y}.P.bin') for x, y in xy]
+    if writer is None:
+        write_sources(output_paths, padded.astype(np.float32), write_workers)
+    else:
+        writer.submit(write_sources, output_paths, padded.astype(np.float32), write_workers)
+
+def prune_sources(files, noise_mask, min_weight):
+    """
+    Split files into those whose |mask weight| exceeds min_weight and the pruned rest.
+    """
+    if not files:
+        return [], []
+    xy = np.array([station_indices(file) for file in files])
+    keep = np.abs(noise_mask[xy[:, 0], xy[:, 1]]) > min_weight
+    return ([file for file, k in zip(files, keep) if k],
+            [file for file, k in zip(files, keep) if not k])
+
+def plan_sources(files, seismogram_dir, sources_dir, noise_mask, entries):
+    """
+    Split files into (to process, {file: rescale factor}, number skipped) using the manifest entries.
+
+    A source is skipped when its step-1 trace, mask weight and output file are
+    unchanged. When only the weight changed, and the old one was non-zero, it
+    is rescaled: every processing step is linear in the weight. Anything else
+    is processed again.
+    """
+    outputs = {}
+    if os.path.isdir(sources_dir):
+        outputs = {entry.name: entry.stat().st_size for entry in os.scandir(sources_dir) if entry.name.endswith('.bin')}
+    todo, factors, skipped = [], {}, 0
+    for file in files:
+        x, y = station_indices(file)
+        entry = entries.get(file)
+        weight = float(noise_mask[x, y])
+        if (entry is None or outputs.get(f'{x}.{y}.P.bin') != entry['out_size']
+                or fingerprint(os.path.join(seismogram_dir, file)) != (entry['size'], entry['mtime_ns'])):
+            todo.append(file)
+        elif weight == entry['weight']:
+            skipped += 1
+        elif entry['weight'] != 0:
+            factors[file] = weight / entry['weight']
+        else:
+            todo.append(file)
+    return todo, factors, skipped
+
+def rescale_source(file, factor, sources_dir):
+    """
+    Scale an existing source to a new mask weight instead of reprocessing its trace.
+    """
+    x, y = station_indices(file)
+    path = os.path.join(sources_dir, f'{x}.{y}.P.bin')
+    write_record(path, read_record(path) * factor)
+
+def record_source(journal, file, noise_mask, seismogram_dir, sources_dir):
+    x, y = station_indices(file)
+    size, mtime_ns = fingerprint(os.path.join(seismogram_dir, file))
+    journal.record(file, size=size, mtime_ns=mtime_ns, weight=float(noise_mask[x, y]),
+                   out_size=os.stat(os.path.join(sources_dir, f'{x}.{y}.P.bin')).st_size)
+
+def claimed_batches(scheduler, work, factors, batch_size):
+    """
+    Claim chunks of work and yield (first, chunk, batch) for each batch of traces to read.
+
+    A chunk holding only sources to rescale yields one empty batch, so that
+    the consumer still sees every chunk.
+    """
+    for first, last in scheduler.chunks():
+        chunk = work[first:last]
+        process = [file for file in chunk if file not in factors]
+        for i in range(0, max(len(process), 1), batch_size):
+            yield first, chunk, process[i:i + batch_size]
+
+def read_item(seismogram_dir, batched, item):
     """
-    Create CMTSOLUTION file for P-type sources.
+    Prefetcher load: the traces of one claimed batch, or None for an empty one.
     """
-    with open(station_file, 'r') as f:
-        station_info = [line.strip().split() for line in f]
+    _, _, batch = item
+    if not batch:
+        return None
+    if batched:
+        return read_batch([os.path.join(seismogram_dir, file) for file in batch])
+    return read_trace(os.path.join(seismogram_dir, batch[0]))
 
-    with open(os.path.join(data_dir, 'CMTSOLUTION'), 'w') as f:
-        for idx, station in enumerate(station_info):
-            lat, lon = float(station[2]), float(station[3])
-            depth = float(station[5]) / 1000
+def start_chunk(chunk, factors, sources_dir, journal):
+    if journal is not None:
+        journal.invalidate(chunk)
+        journal.flush()
+    with profiler.phase('rescale'):
+        for file in chunk:
+            if file in factors:
+                rescale_source(file, factors[file], sources_dir)
 
-            f.write(f'PDE 1999 01 01 00 00 00.00  {lat} {lon} {depth} 1 1 test{idx+1:03d}\n')
-            f.write(f'event name:      {idx + 1:03d}\n')
-            f.write('time shift:       0.0000\n')
-            f.write('half duration:    0.0\n')
-            f.write(f'latorUTM:       {lat}\n')
-            f.write(f'longorUTM:      {lon}\n')
-            f.write(f'depth:          {depth}\n')
-            f.write('Mrr:        1\n')
-            f.write('Mtt:        1\n')
-            f.write('Mpp:        1\n')
-            f.write('Mrt:        0\n')
-            f.write('Mrp:        0\n')
-            f.write('Mtp:        0\n')
-            f.write(f'DATA/SOURCES/{station[1]}.{station[0]}.P.bin\n')
+def finish_chunk(chunk, writer, journal, noise_mask, seismogram_dir, sources_dir):
+    """
+    Journal a chunk once its sources are on disk (incremental mode only).
+    """
+    if journal is None:
+        return
+    with profiler.phase('write_wait'):
+        writer.wait()
+    for file in chunk:
+        record_source(journal, file, noise_mask, seismogram_dir, sources_dir)
+    journal.flush()
+
+def report_pruning(seismogram_dir, sources_dir, files, pruned, min_weight):
+    """
+    Print how many sources the weight threshold removed and what that saves (rank 0 only).
+
+    Read savings are the pruned step-1 files; write savings use the size of
+    one written source. Step-2 solver work per source is roughly constant, so
+    the fraction of pruned sources estimates the injection savings.
+    """
+    n_total = len(files) + len(pruned)
+    read_bytes = sum(os.stat(os.path.join(seismogram_dir, file)).st_size for file in pruned)
+    bin_bytes = 0
+    if files:
+        x, y = station_indices(files[0])
+        bin_bytes = os.stat(os.path.join(sources_dir, f'{x}.{y}.P.bin')).st_size
+    fraction = len(pruned) / n_total if n_total else 0.0
+    print(f"  -Sparse mode (|weight| <= {min_weight:g} pruned): {len(pruned)} of {n_total} sources skipped "
+          f"({100 * fraction:.1f}%)")
+    print(f"   saved {read_bytes / 2**20:.1f} MiB of reads, {len(pruned) * bin_bytes / 2**20:.1f} MiB of source files "
+          f"and ~{100 * fraction:.1f}% of the step-2 source injections")
+
+def start_cmtsolutions(pool, data_dir, station_file, noise_mask, min_weight=0.0):
+    """
+    Build the source index from the mask and write CMTSOLUTION in the background.
+
+    Only the stations and the mask are needed, so rank 0 does this while its
+    traces are being processed. Returns (index, future of the write, number of stations).
+    """
+    stations = load_stations(station_file)
+    index = source_table(stations, noise_mask, min_weight)
+    return index, pool.submit(write_cmtsolutions, data_dir, index), len(stations)
 
-# --------------------- FILE COLLECTION & DISTRIBUTION --------------------- #
+def finish_cmtsolutions(example_dir, data_dir, index, pending, n_stations):
+    """
+    Wait for CMTSOLUTION, check it against the written .bin files and save the index.
+    """
+    pending.result()
+    missing, mismatched = check_source_files(example_dir, index)
+    if missing or mismatched:
+        raise RuntimeError(f"{len(missing)} CMTSOLUTION sources have no .bin file and {len(mismatched)} "
+                           f"have an unexpected size (e.g. {(missing + mismatched)[0]}).")
+    write_index(data_dir, index)
+    print(f"  -CMTSOLUTION: {len(index)} of {n_stations} stations as sources "
+          f"({n_stations - len(index)} stations below the weight threshold skipped)")
+
+def report_throughput(n_traces, elapsed, mode):
+    """
+    Print the aggregate trace throughput of all ranks (rank 0 only).
+    """
+    total = comm.reduce(n_traces, op=MPI.SUM, root=0)
+    slowest = comm.reduce(elapsed, op=MPI.MAX, root=0)
+    if rank == 0:
+        rate = total / slowest if slowest > 0 else float('inf')
+        print(f"  -{mode} processing: {total} traces in {slowest:.2f} s ({rate:.1f} traces/s on {size} ranks)")
 
-files = [f.name for f in os.scandir(seismogram_dir) if f.name.endswith('P.semp')]
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        description="Create the step-2 driving sources from step-1 noise recordings.")
+    parser.add_argument('example_dir')
+    parser.add_argument('cc_type', choices=['velocity', 'pressure'])
+    parser.add_argument('freq_lp', help="low-pass corner in Hz, or 'None'")
+    parser.add_argument('--batch-size', type=int, default=1,
+                        help="traces processed together per rank; 1 = per-trace mode (default)")
+    parser.add_argument('--schedule', choices=['dynamic', 'static'], default='dynamic',
+                        help="dynamic: ranks claim chunks from a shared counter; static: fixed split")
+    parser.add_argument('--chunk-size', type=int, default=None,
+                        help=f"traces claimed per scheduling step (default: batch size, at least {DEFAULT_CHUNK_SIZE})")
+    parser.add_argument('--write-workers', type=int, default=1,
+                        help="source files written concurrently per rank in batched mode")
+    parser.add_argument('--prefetch', type=int, default=DEFAULT_DEPTH,
+                        help="step-1 reads (traces or batches) kept in flight per rank; 0 reads in line")
+    parser.add_argument('--write-depth', type=int, default=DEFAULT_DEPTH,
+                        help="source writes left pending per rank; 0 writes in line")
+    parser.add_argument('--min-weight', type=float, default=None,
+                        help="sparse mode: skip reading, filtering and writing traces whose |mask weight| "
+                             "is at most this value (0 prunes exact zeros); default processes every trace")
+    parser.add_argument('--incremental', action='store_true',
+                        help="skip sources already written from the same step-1 trace and weight, rescale those "
+                             "whose mask weight alone changed, and record completions in DATA/SOURCES/MANIFEST.json")
+    parser.add_argument('--profile', default=None, metavar='REPORT.json',
+                        help="time each phase on every rank and write a JSON report here")
+    args = parser.parse_args(argv)
+    if args.freq_lp != 'None':
+        args.freq_lp = float(args.freq_lp)
+    return args
 
-batch = np.array_split(files, size)
-noise_mask = np.loadtxt(os.path.join(data_dir, 'NOISE_DISTRIBUTION'), dtype=float)
+# --------------------- MAIN --------------------- #
+def main(argv=None):
+    args = parse_args(argv)
+    if args.profile:
+        profiler.enable()
 
-# --------------------- PROCESSING --------------------- #
-for file in batch[rank]:
-    process_trace(file, noise_mask)
+    # --------------------- PATH DEFINITIONS --------------------- #
+    seismogram_dir = os.path.join(args.example_dir, 'OUTPUT_FILES_step1')
+    data_dir = os.path.join(args.example_dir, 'DATA')
+    sources_dir = os.path.join(data_dir, 'SOURCES')
+    station_file = os.path.join(data_dir, 'STATIONS_NOISE')
 
-comm.Barrier()  # Synchronize all MPI processes
+    # One copy of the mask per node, read by the node's first rank (binary, else the text export)
+    with profiler.phase('mask'):
+        noise_mask, mask_win = shared_mask(comm, data_dir)
+    sparse = args.min_weight is not None
+    min_weight = args.min_weight if sparse else 0.0
 
-# ---------------------Generating CMTSOLUTIONS file in DATA/ for Step-2 run (ONLY RANK 0) ------------- #
-if rank == 0:
-    create_cmtsolutions(data_dir, station_file)
+    # --------------------- FILE COLLECTION & DISTRIBUTION --------------------- #
+    # One directory scan on rank 0; every rank must index the same sorted list.
+    # Sparse mode drops traces below the weight threshold before scheduling,
+    # incremental mode the sources the manifest shows are already done.
+    files, pruned, work, factors = None, [], None, {}
+    params = {'cc_type': args.cc_type, 'freq_lp': args.freq_lp}
+    with profiler.phase('scan'):
+        if rank == 0:
+            files = sorted(f.name for f in os.scandir(seismogram_dir) if f.name.endswith('P.semp'))
+            if sparse:
+                files, pruned = prune_sources(files, noise_mask, min_weight)
+            work = files
+            if args.incremental:
+                # Merge what an interrupted run journaled before planning this one
+                entries = load_manifest(sources_dir, params)
+                save_manifest(sources_dir, params, entries)
+                todo, factors, n_skipped = plan_sources(files, seismogram_dir, sources_dir, noise_mask, entries)
+                work = sorted(todo + list(factors))
+                print(f"  -Incremental: {len(todo)} sources to process, {len(factors)} to rescale, "
+                      f"{n_skipped} unchanged")
+            else:
+                discard_manifest(sources_dir)  # every source is rewritten without records
+        work, factors = comm.bcast((work, factors), root=0)
+    journal = Journal(sources_dir, rank) if args.incremental else None
 
+    # CMTSOLUTION depends only on stations and mask: rank 0 writes it while processing traces
+    pool = ThreadPoolExecutor(max_workers=1) if rank == 0 else None
+    if rank == 0:
+        with profiler.phase('cmtsolution'):
+            index, pending, n_stations = start_cmtsolutions(pool, data_dir, station_file, noise_mask, min_weight)
+    chunk_size = args.chunk_size or max(args.batch_size, DEFAULT_CHUNK_SIZE)
+    scheduler = ChunkScheduler(comm, len(work), chunk_size, args.schedule)
+
+    # --------------------- PROCESSING --------------------- #
+    # Step-1 traces are read ahead on threads and sources written behind, so each
+    # rank filters one trace while the next ones are read and the last ones written
+    start = time.perf_counter()
+    batched = args.batch_size > 1
+    writer = AsyncWriter(args.write_depth)
+    items = claimed_batches(scheduler, work, factors, args.batch_size)
+    current, chunk = None, []
+    for (first, claimed, batch), traces in Prefetcher(partial(read_item, seismogram_dir, batched), items,
+                                                      depth=args.prefetch):
+        if first != current:
+            finish_chunk(chunk, writer, journal, noise_mask, seismogram_dir, sources_dir)
+            current, chunk = first, claimed
+            start_chunk(chunk, factors, sources_dir, journal)
+        if not batch:
+            continue
+        if batched:
+            process_batch(batch, noise_mask, seismogram_dir, sources_dir, args.cc_type, args.freq_lp,
+                          args.write_workers, traces=traces, writer=writer)
+        else:
+            process_trace(batch[0], noise_mask, seismogram_dir, sources_dir, args.cc_type, args.freq_lp,
+                          trace=traces, writer=writer)
+    finish_chunk(chunk, writer, journal, noise_mask, seismogram_dir, sources_dir)
+    with profiler.phase('write_wait'):
+        writer.close()
+    mode = 'Batched' if args.batch_size > 1 else 'Per-trace'
+    report_throughput(scheduler.n_done, time.perf_counter() - start, mode)
+    scheduler.report('Driving sources')
+    profiler.add_time('claim', scheduler.wait, scheduler.n_chunks)
+    scheduler.free()
+    mask_win.Free()
+
+    with profiler.phase('barrier'):
+        comm.Barrier()  # Synchronize all MPI processes
+
+    # ---------------------Checking CMTSOLUTIONS file in DATA/ for Step-2 run (ONLY RANK 0) ------------- #
+    if rank == 0:
+        if sparse:
+            report_pruning(seismogram_dir, sources_dir, files, pruned, min_weight)
+        with profiler.phase('cmtsolution'):
+            finish_cmtsolutions(args.example_dir, data_dir, index, pending, n_stations)
+        pool.shutdown()
+        if args.incremental:
+            save_manifest(sources_dir, params, load_manifest(sources_dir, params))
+    if args.profile:
+        profiler.report(args.profile, comm, 'driving sources', batch_size=args.batch_size, schedule=args.schedule)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
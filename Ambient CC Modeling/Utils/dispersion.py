@@ -0,0 +1,297 @@
+#!/usr/bin/env python
+"""
+Dispersion panels of a virtual shot gather cube (RSF or HDF5).
+
+Receivers are binned by their offset from the virtual source. The cube is
+streamed in blocks of receivers sized to a memory budget. Each block is
+transformed with batched real FFTs on a thread pool while the next block is
+read, and its spectra are stacked into the offset bins. Only the band
+[fmin, fmax] of the binned spectra is kept, so the full cube never has to
+be in memory. One of two panels is then built from the binned gather:
+
+    phase-shift  |sum_r U(f, r)/|U(f, r)| exp(i 2 pi f r / c)| over trial
+                 velocities c (Park et al., 1998), normalised to [0, 1]
+    fk           |U(f, k)| from an FFT of the binned gather along offset
+
+The correlation branch can be the causal part (t >= 0), the acausal part
+time-reversed, or their average (symmetric, default).
+
+Usage: python dispersion.py CUBE [--source SX SY] [--method phase-shift|fk] [--memory-mb MB] [--out FILE]
+"""
+
+import os
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import scipy.fft
+import scipy.sparse
+from cc_backends import axis_values, open_cube
+from rsf_io import rsf_axis, write_rsf_header
+from station_geometry import virtual_source
+
+METHODS = ('phase-shift', 'fk')
+BRANCHES = ('symmetric', 'causal', 'acausal')
+DEFAULT_MEMORY_MB = 1024
+
+# --------------------- GEOMETRY --------------------- #
+def receiver_offsets(axes, sx, sy):
+    """
+    (ny, nx) offsets in km of the cube receivers from a source at (sx, sy) m.
+    """
+    x, y = axis_values(axes[0]), axis_values(axes[1])
+    return np.hypot(x[None, :] - sx / 1000, y[:, None] - sy / 1000)
+
+def offset_bins(offsets, dr, rmax=None):
+    """
+    Bin index of every receiver (-1 beyond rmax) and the number of bins of width dr.
+    """
+    rmax = offsets.max() if rmax is None else rmax
+    nbins = int(np.floor(rmax / dr)) + 1
+    bins = np.floor(offsets / dr).astype(np.int64)
+    bins[(offsets > rmax) | (bins >= nbins)] = -1
+    return bins, nbins
+
+def source_from_cube(cube_path):
+    """
+    Virtual source (sx, sy) in m from the FORCESOLUTION of the example holding the cube.
+    """
+    data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(cube_path))), 'DATA')
+    if not os.path.exists(os.path.join(data_dir, 'FORCESOLUTION')):
+        raise FileNotFoundError(f"No FORCESOLUTION in {data_dir}; pass --source SX SY.")
+    return virtual_source(data_dir)[:2]
+
+# --------------------- BLOCKS --------------------- #
+def time_branch(axes):
+    """
+    (i0, ntc): index of t = 0 and the number of samples on both sides of it.
+    """
+    t_axis = axes[2]
+    i0 = int(np.clip(round(-t_axis['o'] / t_axis['d']), 0, t_axis['n'] - 1))
+    return i0, min(t_axis['n'] - i0, i0 + 1)
+
+def receiver_bytes(nt, ntc, nfft, nsel):
+    """
+    Working bytes per receiver while streaming: the block being read and the
+    one being transformed, the branch, its spectrum and the band kept.
+    """
+    return 2 * nt * 4 + 2 * ntc * 4 + (nfft // 2 + 1) * 8 + 2 * nsel * 8
+
+def receiver_blocks(ny, nx, per_block):
+    """
+    (y slice, x slice) tiles of at most per_block receivers: whole y rows when
+    a row fits, otherwise pieces of one row.
+    """
+    if per_block >= nx:
+        rows = per_block // nx
+        return [(slice(y0, min(y0 + rows, ny)), slice(0, nx)) for y0 in range(0, ny, rows)]
+    return [(slice(y, y + 1), slice(x0, min(x0 + per_block, nx)))
+            for y in range(ny) for x0 in range(0, nx, per_block)]
+
+def read_block(data, ys, xs):
+    return np.ascontiguousarray(data[:, ys, xs], dtype=np.float32)
+
+def branch_traces(block, i0, ntc, branch):
+    """
+    (ntc, n_receivers) traces of one correlation branch, starting at t = 0.
+    """
+    block = block.reshape(block.shape[0], -1)
+    if branch == 'causal':
+        return block[i0:i0 + ntc]
+    acausal = block[i0::-1][:ntc] if i0 > 0 else block[:1]
+    if branch == 'acausal':
+        return acausal
+    return 0.5 * (block[i0:i0 + ntc] + acausal)
+
+# --------------------- STREAMING --------------------- #
+def binned_spectra(cube_path, sx, sy, dr=None, rmax=None, fmin=0.0, fmax=None, branch='symmetric',
+                   normalize=True, memory_mb=DEFAULT_MEMORY_MB, threads=None):
+    """
+    Stream the cube and stack receiver spectra into offset bins.
+
+    Returns a dict with the band frequencies (Hz), the (nbins, nf) mean
+    spectra, the mean offset (km) and receiver count of every bin. With
+    normalize, each trace spectrum is divided by its amplitude first.
+    """
+    if branch not in BRANCHES:
+        raise ValueError(f"Invalid branch. Use one of {BRANCHES}.")
+    threads = threads or os.cpu_count()
+    data, axes = open_cube(cube_path)
+    nt, ny, nx = data.shape
+    dt = axes[2]['d']
+    i0, ntc = time_branch(axes)
+    nfft = scipy.fft.next_fast_len(ntc, real=True)
+    freqs = np.fft.rfftfreq(nfft, dt)
+    band = np.flatnonzero((freqs >= fmin) & (freqs <= (freqs[-1] if fmax is None else fmax)))
+    if band.size == 0:
+        raise ValueError(f"No frequencies in [{fmin}, {fmax}] Hz (df={freqs[1]:.4g}, fN={freqs[-1]:.4g}).")
+    band = slice(band[0], band[-1] + 1)
+    nsel = band.stop - band.start
+
+    offsets = receiver_offsets(axes, sx, sy)
+    dr = dr or min(abs(axes[0]['d']), abs(axes[1]['d']))
+    bins, nbins = offset_bins(offsets, dr, rmax)
+
+    # Stacked spectra plus one block's binned result are held throughout
+    fixed = nbins * nsel * (16 + 8) + offsets.nbytes + bins.nbytes
+    budget = memory_mb * 2**20 - fixed
+    per_receiver = receiver_bytes(nt, ntc, nfft, nsel)
+    if budget < per_receiver:
+        raise ValueError(f"--memory-mb {memory_mb} is too small: the binned spectra need "
+                         f"{fixed / 2**20:.1f} MiB plus {per_receiver / 2**20:.2f} MiB per receiver. "
+                         "Raise it, narrow the band or use wider offset bins.")
+    tiles = receiver_blocks(ny, nx, int(budget // per_receiver))
+
+    stack = np.zeros((nbins, nsel), dtype=np.complex128)
+    offset_sum = np.bincount(bins[bins >= 0], weights=offsets[bins >= 0], minlength=nbins)
+    count = np.bincount(bins[bins >= 0], minlength=nbins)
+    with ThreadPoolExecutor(max_workers=1) as reader:
+        pending = reader.submit(read_block, data, *tiles[0])
+        for k, (ys, xs) in enumerate(tiles):
+            block = pending.result()
+            if k + 1 < len(tiles):
+                pending = reader.submit(read_block, data, *tiles[k + 1])
+            traces = branch_traces(block, i0, ntc, branch)
+            del block
+            spectra = scipy.fft.rfft(traces, n=nfft, axis=0, workers=threads)[band]
+            del traces
+            if normalize:
+                amplitude = np.abs(spectra)
+                spectra /= np.where(amplitude > 0, amplitude, 1)
+                del amplitude
+            tile_bins = bins[ys, xs].ravel()
+            keep = np.flatnonzero(tile_bins >= 0)
+            onehot = scipy.sparse.csr_matrix((np.ones(keep.size, dtype=np.float32), (tile_bins[keep], keep)),
+                                             shape=(nbins, tile_bins.size))
+            stack += onehot @ spectra.T
+            del spectra
+    if hasattr(data, 'file'):
+        data.file.close()
+
+    filled = count > 0
+    stack[filled] /= count[filled, None]
+    offset = np.where(filled, offset_sum / np.maximum(count, 1), (np.arange(nbins) + 0.5) * dr)
+    return {'frequency': freqs[band], 'spectra': stack, 'offset': offset, 'count': count,
+            'dr': dr, 'tiles': len(tiles)}
+
+# --------------------- PANELS --------------------- #
+def phase_shift(binned, velocities, memory_mb=DEFAULT_MEMORY_MB, threads=None):
+    """
+    (nf, nc) phase-shift panel over trial velocities (km/s), computed in
+    frequency blocks on a thread pool.
+    """
+    threads = threads or os.cpu_count()
+    filled = binned['count'] > 0
+    spectra, offset = binned['spectra'][filled].T, binned['offset'][filled]
+    freqs, nbins = binned['frequency'], int(filled.sum())
+    slowness = 1.0 / np.asarray(velocities, dtype=np.float64)
+
+    # phase, its exponent and the product take about 48 bytes per (f, c, r) element
+    per_frequency = 48 * slowness.size * nbins
+    rows = max(1, int(memory_mb * 2**20 // (threads * per_frequency)))
+
+    def panel_rows(first):
+        f = freqs[first:first + rows]
+        phase = np.exp(2j * np.pi * f[:, None, None] * slowness[None, :, None] * offset[None, None, :])
+        return np.abs(phase @ spectra[first:first + rows, :, None])[..., 0] / nbins
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        return np.concatenate(list(pool.map(panel_rows, range(0, freqs.size, rows))))
+
+def fk_panel(binned, nk=None):
+    """
+    (nf, nk // 2 + 1) f-k amplitude for wavenumbers k >= 0 (cycles/km) of
+    waves travelling away from the source.
+    """
+    nbins = binned['spectra'].shape[0]
+    nk = nk or scipy.fft.next_fast_len(2 * nbins)
+    # exp(+i 2 pi k r) maps an outgoing exp(-i 2 pi f r / c) to k = f / c
+    panel = np.abs(scipy.fft.ifft(binned['spectra'], n=nk, axis=0, norm='forward'))[:nk // 2 + 1].T
+    return panel, np.arange(nk // 2 + 1) / (nk * binned['dr'])
+
+# --------------------- OUTPUT --------------------- #
+def save_panel(out_path, result):
+    """
+    Save the panel and its axes to an .npz file, or to an RSF header/binary
+    pair when out_path ends with .rsf (axis 1 velocity or wavenumber, axis 2 frequency).
+    """
+    if not out_path.endswith('.rsf'):
+        np.savez(out_path, **result)
+        return out_path
+    second = 'velocity' if 'velocity' in result else 'wavenumber'
+    f, s = result['frequency'], result[second]
+    axes = [rsf_axis(s.size, float(s[1] - s[0]) if s.size > 1 else 1.0, float(s[0]),
+                     'Velocity' if second == 'velocity' else 'Wavenumber', 'km/s' if second == 'velocity' else '1/km'),
+            rsf_axis(f.size, float(f[1] - f[0]) if f.size > 1 else 1.0, float(f[0]), 'Frequency', 'Hz')]
+    data_path = write_rsf_header(out_path, axes)
+    result['panel'].astype(np.float32).tofile(data_path)
+    return out_path
+
+def plot_panel(png_path, result):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    second = 'velocity' if 'velocity' in result else 'wavenumber'
+    panel = result['panel'] / np.maximum(result['panel'].max(axis=1, keepdims=True), 1e-30)
+    f, s = result['frequency'], result[second]
+    plt.figure(figsize=(8, 6))
+    plt.imshow(panel.T, origin='lower', aspect='auto', cmap='jet', extent=[f[0], f[-1], s[0], s[-1]])
+    plt.xlabel('Frequency (Hz)')
+    plt.ylabel('Phase velocity (km/s)' if second == 'velocity' else 'Wavenumber (1/km)')
+    plt.colorbar(label='Normalised amplitude')
+    plt.savefig(png_path, dpi=150, bbox_inches='tight')
+    plt.close()
+
+def dispersion(cube_path, source=None, method='phase-shift', velocities=None, nk=None, **options):
+    """
+    Panel of a cube as a dict of arrays (panel, frequency, velocity or
+    wavenumber, offset, count); options go to binned_spectra.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Invalid method. Use one of {METHODS}.")
+    sx, sy = source if source is not None else source_from_cube(cube_path)
+    normalize = options.pop('normalize', method == 'phase-shift')
+    binned = binned_spectra(cube_path, sx, sy, normalize=normalize, **options)
+    result = {'frequency': binned['frequency'], 'offset': binned['offset'], 'count': binned['count']}
+    if method == 'phase-shift':
+        velocities = np.arange(0.1, 4.0 + 1e-9, 0.01) if velocities is None else np.asarray(velocities)
+        memory_mb, threads = options.get('memory_mb', DEFAULT_MEMORY_MB), options.get('threads')
+        result.update(panel=phase_shift(binned, velocities, memory_mb, threads), velocity=velocities)
+    else:
+        panel, k = fk_panel(binned, nk)
+        result.update(panel=panel, wavenumber=k)
+    return result
+
+# --------------------- ENTRY POINT --------------------- #
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('cube', help='virtual shot gather cube (.rsf or .h5)')
+    parser.add_argument('--source', nargs=2, type=float, metavar=('SX', 'SY'),
+                        help='virtual source position in m (default: DATA/FORCESOLUTION of the example)')
+    parser.add_argument('--method', choices=METHODS, default='phase-shift')
+    parser.add_argument('--branch', choices=BRANCHES, default='symmetric')
+    parser.add_argument('--fmin', type=float, default=0.05, help='Hz')
+    parser.add_argument('--fmax', type=float, default=2.0, help='Hz')
+    parser.add_argument('--velocity', nargs=3, type=float, default=[0.1, 4.0, 0.01], metavar=('CMIN', 'CMAX', 'DC'),
+                        help='trial phase velocities in km/s (phase-shift)')
+    parser.add_argument('--nk', type=int, default=None, help='wavenumber FFT length (fk)')
+    parser.add_argument('--dr', type=float, default=None, help='offset bin width in km (default: receiver spacing)')
+    parser.add_argument('--rmax', type=float, default=None, help='largest offset used, km')
+    parser.add_argument('--memory-mb', type=float, default=DEFAULT_MEMORY_MB, help='working memory budget')
+    parser.add_argument('--threads', type=int, default=None, help='FFT threads (default: all cores)')
+    parser.add_argument('--out', default=None, help='.npz or .rsf output (default: next to the cube)')
+    parser.add_argument('--plot', default=None, help='also save the normalised panel as this PNG')
+    args = parser.parse_args()
+
+    cmin, cmax, dc = args.velocity
+    result = dispersion(args.cube, args.source, args.method, velocities=np.arange(cmin, cmax + dc / 2, dc),
+                        nk=args.nk, dr=args.dr, rmax=args.rmax, fmin=args.fmin, fmax=args.fmax,
+                        branch=args.branch, memory_mb=args.memory_mb, threads=args.threads)
+    out = args.out or f"{os.path.splitext(args.cube)[0]}_{args.method}.npz"
+    save_panel(out, result)
+    print(f"{args.method} panel {result['panel'].shape[0]} x {result['panel'].shape[1]} "
+          f"from {int(result['count'].sum())} receivers in {int((result['count'] > 0).sum())} offset bins -> {out}")
+    if args.plot:
+        plot_panel(args.plot, result)
+
+if __name__ == "__main__":
+    main()
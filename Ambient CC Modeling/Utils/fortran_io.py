@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+"""
+Fortran unformatted sequential records of float32 samples.
+
+This is the layout SPECFEM reads for external source time functions
+(DATA/SOURCES/*.P.bin): a 4-byte record length, the samples, and the
+record length again.
+
+Usage: python fortran_io.py nstep FILE      (number of samples in the record)
+       python fortran_io.py verify DIR      (check every *.bin record in DIR)
+"""
+
+import os
+import sys
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+RECORD_DTYPE = np.dtype('=f4')  # native float32, as written by array.array('f')
+MARKER_DTYPE = np.dtype('=i4')  # native int32 record-length marker
+MARKER_SIZE = MARKER_DTYPE.itemsize
+
+# --------------------- WRITERS --------------------- #
+def _as_record(data):
+    """
+    Contiguous float32 view of the samples; copies only if data is not float32 already.
+    """
+    values = np.ascontiguousarray(data, dtype=RECORD_DTYPE).reshape(-1)
+    marker = np.array([values.nbytes], dtype=MARKER_DTYPE)
+    return marker, values
+
+def _write_buffers(fd, buffers):
+    """
+    Write all buffers with vectored I/O, resuming after short writes.
+    """
+    views = [memoryview(b).cast('B') for b in buffers]
+    if not hasattr(os, 'writev'):
+        for view in views:
+            while view:
+                view = view[os.write(fd, view):]
+        return
+    while views:
+        written = os.writev(fd, views)
+        while views and written >= len(views[0]):
+            written -= len(views[0])
+            views.pop(0)
+        if views:
+            views[0] = views[0][written:]
+
+def write_record(filename, data):
+    """
+    Write samples as one Fortran record straight from the NumPy buffer.
+    """
+    marker, values = _as_record(data)
+    fd = os.open(filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        _write_buffers(fd, (marker, values, marker))
+    finally:
+        os.close(fd)
+
+def write_records(filenames, data, workers=1):
+    """
+    Write one record per row of a 2D array (or per array of a sequence).
+
+    Rows of a float32 array are written without copies; `workers` > 1 keeps
+    several files in flight to hide per-file latency on parallel filesystems.
+    """
+    if isinstance(data, np.ndarray) and data.ndim == 2:
+        data = np.ascontiguousarray(data, dtype=RECORD_DTYPE)
+    if len(filenames) != len(data):
+        raise ValueError(f"{len(filenames)} file names for {len(data)} records.")
+
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(write_record, filenames, data))
+    else:
+        for filename, values in zip(filenames, data):
+            write_record(filename, values)
+
+# --------------------- READERS --------------------- #
+def record_length(filename):
+    """
+    Number of float32 samples in the record, from the leading marker only.
+    """
+    with open(filename, 'rb') as f:
+        marker = np.frombuffer(f.read(MARKER_SIZE), dtype=MARKER_DTYPE)
+    if marker.size != 1:
+        raise ValueError(f"{filename} is too short for a Fortran record.")
+    return int(marker[0]) // RECORD_DTYPE.itemsize
+
+def read_record(filename):
+    """
+    Read a single-record file and return its float32 samples.
+    """
+    raw = np.fromfile(filename, dtype=np.uint8)
+    if raw.size < 2 * MARKER_SIZE:
+        raise ValueError(f"{filename} is too short for a Fortran record.")
+    head = raw[:MARKER_SIZE].view(MARKER_DTYPE)[0]
+    tail = raw[-MARKER_SIZE:].view(MARKER_DTYPE)[0]
+    if head != tail or head != raw.size - 2 * MARKER_SIZE:
+        raise ValueError(f"{filename}: record markers ({head}, {tail}) do not match the file size {raw.size}.")
+    return raw[MARKER_SIZE:-MARKER_SIZE].view(RECORD_DTYPE)
+
+def verify_records(directory, suffix='.bin'):
+    """
+    Check every record in a directory; return (number of files, samples per record).
+    """
+    lengths = set()
+    names = [f.name for f in os.scandir(directory) if f.name.endswith(suffix)]
+    for name in names:
+        lengths.add(read_record(os.path.join(directory, name)).size)
+    if len(lengths) > 1:
+        raise ValueError(f"Records in {directory} have different lengths: {sorted(lengths)}")
+    return len(names), lengths.pop() if lengths else 0
+
+# --------------------- ENTRY POINT --------------------- #
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] not in ('nstep', 'verify'):
+        raise ValueError("Usage: python fortran_io.py nstep FILE | verify DIR")
+
+    if sys.argv[1] == 'nstep':
+        print(record_length(sys.argv[2]))
+    else:
+        n_files, nstep = verify_records(sys.argv[2])
+        print(f"  -{n_files} records of {nstep} samples in {sys.argv[2]}")
@@ -1,9 +1,17 @@
 import os
 import sys
-import shutil
+import time
+import argparse
 import numpy as np
 from mpi4py import MPI
-import m8r
+from scheduler import ChunkScheduler
+from trace_io import read_seismogram, read_time_axis
+from rsf_io import rsf_axis
+from cc_backends import BACKENDS, make_backend
+from station_geometry import load_stations
+from profiling import profiler
+from manifest import RowCheckpoint
+from prefetch import DEFAULT_DEPTH, AsyncWriter, Prefetcher
 
 # Initialize MPI
 comm = MPI.COMM_WORLD
@@ -18,72 +26,103 @@ def custom_sort(file_name):
         print(f"Warning: Unexpected filename format: {file_name}")
         return (float('inf'), float('inf'))
 
-def read_data_column(file_path):
-    with open(file_path, 'r') as file:
-        content = file.readlines()
-    data = [float(line.split()[1]) for line in content]
-    return np.array(data)
-
-def np_to_rsf(nt, nx, ny, dt, dx, dy, ot, ox, oy, file_name):
-    file_name = f"{file_name}.rsf"
-    Fo = m8r.Output(file_name)
-    Fo.put('n1', nx )
-    Fo.put('n2', ny )
-    Fo.put('n3', nt)
-    Fo.put('d1', dx / 1000)
-    Fo.put('d2', dy / 1000)
-    Fo.put('d3', dt)
-    Fo.put('o1', ox / 1000)
-    Fo.put('o2', oy / 1000)
-    Fo.put('o3', ot)
-    Fo.put('label1', 'X')
-    Fo.put('label2', 'Y')
-    Fo.put('label3', 't')
-    Fo.put('unit1', 'km')
-    Fo.put('unit2', 'km')
-    Fo.put('unit3', 's')
-    return Fo
-
-def make_data_volume(example_dir='', data_type='v', icomp='Z', jcomp='X', fname='data_volume'):
+def rsf_axes(nt, nx, ny, dt, dx, dy, ot, ox, oy):
+    """
+    RSF axes of the virtual shot gather cube, fastest first (x, y, t).
+    """
+    return [rsf_axis(nx, dx / 1000, ox / 1000, 'X', 'km'),
+            rsf_axis(ny, dy / 1000, oy / 1000, 'Y', 'km'),
+            rsf_axis(nt, dt, ot, 't', 's')]
+
+def requested_components(jcomp, data_type):
+    """
+    (component, data_type) pairs for a jcomp argument such as 'X', 'XYZ' or 'all'.
+
+    Pressure ('P') is always read from *.semp files; 'all' means X, Y, Z and P.
+    """
+    letters = 'XYZP' if jcomp == 'all' else jcomp
+    return [(c, 'p' if c == 'P' else data_type) for c in letters]
+
+def scan_seismograms(seismogram_dir, components, stats=False):
+    """
+    One pass over the step-2 directory: grid size and which components exist.
+
+    With stats the matching files are also stat'ed and the last item gives
+    their count, total size and newest mtime (ns), else None; a row
+    checkpoint uses it to tell when step 2 was rerun.
+    """
+    suffixes = {f'{c}.sem{t}': (c, t) for c, t in components}
+    found = {}
+    nx = ny = 0
+    inputs = {'files': 0, 'bytes': 0, 'mtime_ns': 0} if stats else None
+    for file in os.scandir(seismogram_dir):
+        key = suffixes.get(file.name[-6:])
+        if key is None or not file.is_file():
+            continue
+        i, j = custom_sort(file.name)
+        if i == float('inf'):
+            continue
+        found.setdefault(key, file.name)
+        nx, ny = max(nx, i + 1), max(ny, j + 1)
+        if stats:
+            st = file.stat()
+            inputs['files'] += 1
+            inputs['bytes'] += st.st_size
+            inputs['mtime_ns'] = max(inputs['mtime_ns'], st.st_mtime_ns)
+    return [c for c in components if c in found], nx, ny, found, inputs
+
+def row_files(scheduler, todo, components, nx, nt, seismogram_dir, Code):
+    """
+    Claim rows and yield (j, rows, out, path, last) for every seismogram of each.
+
+    rows holds one fresh (nx, nt) buffer per component and out is the buffer
+    row the file is parsed into; last marks the final file of row j.
+    """
+    for k in scheduler:
+        j = todo[k]
+        rows = [np.empty((nx, nt), dtype=np.float32) for _ in components]
+        files = [(row[i], f"{i}.{j}.{Code}X{comp}.sem{comp_type}")
+                 for row, (comp, comp_type) in zip(rows, components) for i in range(nx)]
+        for n, (out, file_name) in enumerate(files):
+            yield j, rows, out, os.path.join(seismogram_dir, file_name), n == len(files) - 1
+
+def read_into(item):
+    _, _, out, file_path, _ = item
+    with profiler.phase('read'):
+        read_seismogram(file_path, out=out)  # parsed straight into the row buffer
+    profiler.file_read(file_path)
+
+def make_data_volume(example_dir='', data_type='v', icomp='Z', jcomp='X', fname='data_volume',
+                     chunk_size=None, schedule='dynamic', backend=None, incremental=False,
+                     prefetch=DEFAULT_DEPTH):
     seismogram_dir = os.path.join(example_dir, 'OUTPUT_FILES_step2')
     station_file = os.path.join(example_dir, 'DATA/STATIONS_OBN')
-    rsf_dir = os.path.join(example_dir, 'RSF')
-    os.makedirs(rsf_dir, exist_ok=True)
+    backend = backend or make_backend('rsf', comm, example_dir)
 
     if not os.path.exists(seismogram_dir):
         raise ValueError(f"Directory {seismogram_dir} does not exist.")
-
-    file_list = [file.name for file in os.scandir(seismogram_dir)
-                 if file.is_file() and file.name.endswith(f'{jcomp}.sem{data_type}')]
-    sorted_files = sorted(file_list, key=custom_sort)
-    last_file = sorted_files[-1]
-    parts = last_file.split('.')
-    ny = int(parts[1]) + 1
-    nx = int(parts[0]) + 1
-    #print(f"nx={nx}, ny={ny}")
-
-    with open(f"{seismogram_dir}/{last_file}", 'r') as file:
-        content = file.readlines()
-    time_axis = np.array([float(line.split()[0]) for line in content])
-    dt = time_axis[1] - time_axis[0]
-    tf = time_axis[-1]
-    nt = len(time_axis)
-    ot = -(nt - 1) * dt / 2
-
     if not os.path.exists(station_file):
         raise ValueError(f"File {station_file} does not exist.")
 
-    with open(station_file, 'r') as file:
-        lines = [file.readline() for _ in range(ny + 1)]
-
-    col_3 = [float(line.split()[3]) for line in lines]
-    col_2 = [float(line.split()[2]) for line in lines]
-    dx = col_3[ny] - col_3[0]
-    dy = col_2[1] - col_2[0]
-    ox = col_3[0]
-    oy = col_2[0]
-
-    data = np.empty((nx, ny // size, nt), dtype=np.float32)
+    # Directory scan, time axis and station geometry are read once on rank 0 and shared
+    meta = None
+    scan_start = time.perf_counter()
+    if rank == 0:
+        components, nx, ny, found, inputs = scan_seismograms(seismogram_dir, requested_components(jcomp, data_type),
+                                                             stats=incremental)
+        if not components:
+            raise ValueError(f"No C{icomp}{jcomp} seismograms (sem{data_type}) in {seismogram_dir}.")
+        #print(f"nx={nx}, ny={ny}")
+
+        time_axis = read_time_axis(os.path.join(seismogram_dir, found[components[0]]))
+
+        stations = load_stations(station_file)
+        col_3, col_2 = stations[:ny + 1, 3], stations[:ny + 1, 2]
+        meta = (components, nx, ny, time_axis[1] - time_axis[0], len(time_axis),
+                float(col_3[ny] - col_3[0]), float(col_2[1] - col_2[0]), float(col_3[0]), float(col_2[0]), inputs)
+    components, nx, ny, dt, nt, dx, dy, ox, oy, inputs = comm.bcast(meta, root=0)
+    profiler.add_time('scan', time.perf_counter() - scan_start)
+    ot = -(nt - 1) * dt / 2
 
     if np.round(dt, 3) <= .001:
         Code = 'F'
@@ -94,40 +133,108 @@ def make_data_volume(example_dir='', data_type='v', icomp='Z', jcomp='X', fname=
     else:
         raise ValueError("Invalid station code.")
 
-    for j_local, j in enumerate(range(rank, ny, size)):
-        for i in range(nx):
-            #print(f"Rank {rank} reading {i}.{j}.{Code}X{jcomp}.sem{data_type}")
-            file_name = f"{i}.{j}.{Code}X{jcomp}.sem{data_type}"
-            file_path = os.path.join(seismogram_dir, file_name)
-            data[i, j_local, :] = read_data_column(file_path)
-
-    if rank == 0:
-        received_data = np.empty((size, nx, ny // size, nt), dtype=np.float32)
-    else:
-        received_data = None
-
-    comm.Gather(data, received_data, root=0)
-
-    if rank == 0:
-        final_data = np.empty((nx, ny, nt), dtype=np.float32)
-        for i in range(size):
-            final_data[:, i::size, :] = received_data[i]
-        Fo = np_to_rsf(nt, nx, ny, dt, dx, dy, ot, ox, oy, f"C{icomp}{jcomp}_{fname}")
-        Fo.write(np.transpose(final_data, (2, 1, 0)))
-        Fo.close()
-        shutil.move(f"C{icomp}{jcomp}_{fname}.rsf", os.path.join(rsf_dir, f"C{icomp}{jcomp}_{fname}.rsf"))
-
-if __name__ == "__main__":    
-    if len(sys.argv) < 5:
-        raise ValueError("Usage: python m8r_CC_mpi.py <example_dir> <data_type> <icomp> <jcomp> <fname>")
-
-    example_dir = str(sys.argv[1])
-    data_type = str(sys.argv[2])
-    icomp = str(sys.argv[3]) #
-    jcomp = str(sys.argv[4])
-    if len(sys.argv) == 6:
-        fname = str(sys.argv[5])
-    else:
-        fname = ''
-
-    make_data_volume(example_dir, data_type, icomp, jcomp, fname)
\ No newline at end of file
+    # Incremental mode: rows finished by an interrupted run are loaded, not read again.
+    # The step-2 file count, size and newest mtime are part of the checkpoint meta,
+    # so rows saved before step 2 was rerun are discarded.
+    label = f"C{icomp}{''.join(c for c, _ in components)}"
+    checkpoint, done = None, []
+    if incremental:
+        checkpoint = RowCheckpoint(os.path.join(backend.out_dir, f'.checkpoint_{label}_{fname}'),
+                                   {'components': [c + t for c, t in components], 'nx': nx, 'ny': ny, 'nt': nt, 'dt': dt,
+                                    'inputs': inputs})
+        if rank == 0:
+            done = checkpoint.open()
+            print(f"  -Incremental: {len(done)} of {ny} rows restored from {checkpoint.directory}")
+        done = comm.bcast(done, root=0)
+    todo = sorted(set(range(ny)) - set(done))
+
+    # Rows (y indices) are claimed dynamically, so ranks may end up with different counts
+    scheduler = ChunkScheduler(comm, len(todo), chunk_size or backend.row_block, schedule)
+    # Up to `prefetch` seismograms are read ahead on threads; the next row is claimed
+    # only when the read-ahead reaches it, and checkpoints are saved in the background
+    my_rows, my_data = [], {component: [] for component in components}
+    writer = AsyncWriter(1 if checkpoint is not None and prefetch else 0)
+    items = row_files(scheduler, todo, components, nx, nt, seismogram_dir, Code)
+    for (j, rows, _, _, last), _ in Prefetcher(read_into, items, depth=prefetch):
+        if not last:
+            continue
+        for data, row in zip(my_data.values(), rows):
+            data.append(row)
+        my_rows.append(j)
+        if checkpoint is not None:
+            writer.submit(save_row, checkpoint, j, rows)
+    with profiler.phase('write_wait'):
+        writer.close()
+    scheduler.report(f"{label} rows")
+    with profiler.phase('checkpoint'):
+        for j in done[rank::size]:
+            for rows, row in zip(my_data.values(), checkpoint.load(j)):
+                rows.append(row)
+            my_rows.append(j)
+    profiler.add_time('claim', scheduler.wait, scheduler.n_chunks)
+    scheduler.free()
+
+    # Every rank writes its own rows into the output cubes; rank 0 never holds a full cube
+    axes = rsf_axes(nt, nx, ny, dt, dx, dy, ot, ox, oy)
+    for (comp, comp_type), rows in my_data.items():
+        with profiler.phase('write'):
+            path = backend.write(f"C{icomp}{comp}_{fname}", my_rows, rows, ny, axes)
+        profiler.count('bytes_written', len(my_rows) * nx * nt * 4)
+        if rank == 0:
+            profiler.count('files_written')
+            print(f"  -Wrote {path} ({nx} x {ny} x {nt}, sem{comp_type})")
+    if checkpoint is not None:
+        comm.Barrier()
+        if rank == 0:
+            checkpoint.remove()
+
+def save_row(checkpoint, j, rows):
+    with profiler.phase('checkpoint'):
+        checkpoint.save(j, rows)
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        description="Assemble step-2 OBN seismograms into C{icomp}{jcomp} RSF or HDF5 cubes.")
+    parser.add_argument('example_dir')
+    parser.add_argument('data_type', help="v, p or d")
+    parser.add_argument('icomp', help="virtual source component: Z/Y/X/P")
+    parser.add_argument('jcomp', help="receiver component(s): Z/Y/X/P, several letters (e.g. XYZ) "
+                                      "for one pass over all of them, or 'all' for XYZ plus P if present")
+    parser.add_argument('fname', nargs='?', default='')
+    parser.add_argument('--schedule', choices=['dynamic', 'static'], default='dynamic',
+                        help="dynamic: ranks claim rows from a shared counter; static: fixed split")
+    parser.add_argument('--chunk-size', type=int, default=None,
+                        help="y rows claimed per scheduling step (default: 1, or the HDF5 chunk height)")
+    parser.add_argument('--format', choices=sorted(BACKENDS), default='rsf', help="output backend")
+    parser.add_argument('--chunks', default=None,
+                        help="HDF5 chunk shape nt,ny,nx (default: 256,16,16)")
+    parser.add_argument('--compression', choices=['gzip', 'lzf'], default=None, help="HDF5 lossless compression")
+    parser.add_argument('--compression-level', type=int, default=4, help="gzip level 1-9")
+    parser.add_argument('--scaleoffset', type=int, default=None,
+                        help="HDF5 lossy scale-offset filter: decimal digits kept")
+    parser.add_argument('--prefetch', type=int, default=DEFAULT_DEPTH,
+                        help="seismograms read ahead per rank on background threads; 0 reads in line")
+    parser.add_argument('--incremental', action='store_true',
+                        help="checkpoint every finished row so a resubmitted job only reads the missing ones")
+    parser.add_argument('--profile', default=None, metavar='REPORT.json',
+                        help="time each phase on every rank and write a JSON report here")
+    args = parser.parse_args(argv)
+    if args.chunks:
+        args.chunks = tuple(int(n) for n in args.chunks.split(','))
+    return args
+
+def backend_options(args):
+    if args.format != 'hdf5':
+        return {}
+    return {'chunks': args.chunks, 'compression': args.compression,
+            'compression_opts': args.compression_level, 'scaleoffset': args.scaleoffset}
+
+if __name__ == "__main__":
+    args = parse_args(sys.argv[1:])
+    if args.profile:
+        profiler.enable()
+    backend = make_backend(args.format, comm, args.example_dir, **backend_options(args))
+    make_data_volume(args.example_dir, args.data_type, args.icomp, args.jcomp, args.fname,
+                     args.chunk_size, args.schedule, backend, args.incremental, args.prefetch)
+    if args.profile:
+        profiler.report(args.profile, comm, f"C{args.icomp}{args.jcomp} cubes", format=args.format)
@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+"""
+Completion records for restartable runs of the MPI scripts.
+
+Driving sources (create_driving_source_mpi.py --incremental) are tracked in
+DATA/SOURCES/MANIFEST.json: the processing parameters plus one entry per
+written source, with the step-1 input size and mtime, the mask weight used
+and the output size. While a run is in progress every rank appends its
+finished sources to its own journal (.journal.<rank>.jsonl) after each
+chunk. A run killed by the time limit therefore keeps everything it wrote,
+and the next run merges the journals back into the manifest. Sources are
+marked invalid in the journal before they are rewritten. A kill during a
+rescale then forces a full reprocess instead of a second rescale.
+
+Cube assembly (m8r_CC_mpi.py --incremental) saves each finished y row, all
+components together, as one .npy file in a checkpoint directory next to the
+cubes. A restart reads those rows back instead of the seismograms, unless
+the step-2 files changed in count, size or newest mtime since. The
+directory is removed once the cubes are written.
+
+Usage: python manifest.py info DIR     (DIR holding a MANIFEST.json)
+"""
+
+import os
+import sys
+import json
+import shutil
+import numpy as np
+
+MANIFEST_FILE = 'MANIFEST.json'
+JOURNAL_PREFIX = '.journal.'
+CHECKPOINT_META = 'meta.json'
+
+def fingerprint(path):
+    """
+    (size, mtime in ns) of a file.
+    """
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+def _write_json(path, value):
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(value, f)
+    os.replace(tmp, path)
+
+# --------------------- SOURCE MANIFEST --------------------- #
+def _journals(directory):
+    if not os.path.isdir(directory):
+        return []
+    return [entry.path for entry in os.scandir(directory)
+            if entry.name.startswith(JOURNAL_PREFIX) and entry.name.endswith('.jsonl')]
+
+def load_manifest(directory, params):
+    """
+    Entries recorded for these params, journals of an interrupted run included.
+
+    Returns {} when there is no manifest or it was written with other params.
+    A journal line cut short by the kill is ignored; an 'invalid' line drops
+    the entry, since its output may have been half rewritten.
+    """
+    path = os.path.join(directory, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        manifest = json.load(f)
+    if manifest.get('params') != params:
+        return {}
+    entries = manifest.get('entries', {})
+    for journal in _journals(directory):
+        with open(journal, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                key = record.pop('key')
+                if record.get('invalid'):
+                    entries.pop(key, None)
+                else:
+                    entries[key] = record
+    return entries
+
+def save_manifest(directory, params, entries):
+    """
+    Write the manifest atomically and drop the journals it now includes.
+    """
+    os.makedirs(directory, exist_ok=True)
+    _write_json(os.path.join(directory, MANIFEST_FILE), {'params': params, 'entries': entries})
+    for journal in _journals(directory):
+        os.remove(journal)
+
+def discard_manifest(directory):
+    """
+    Remove the manifest and journals, e.g. before outputs are rewritten without records.
+    """
+    path = os.path.join(directory, MANIFEST_FILE)
+    for stale in _journals(directory) + ([path] if os.path.exists(path) else []):
+        os.remove(stale)
+
+class Journal:
+    """
+    Append-only record of the outputs one rank finished, flushed chunk by chunk.
+    """
+
+    def __init__(self, directory, rank):
+        self.path = os.path.join(directory, f'{JOURNAL_PREFIX}{rank}.jsonl')
+        self.pending = []
+
+    def record(self, key, **fields):
+        self.pending.append(json.dumps(dict(fields, key=key)))
+
+    def invalidate(self, keys):
+        """
+        Mark outputs as being rewritten; call flush() before touching them.
+        """
+        self.pending.extend(json.dumps({'key': key, 'invalid': True}) for key in keys)
+
+    def flush(self):
+        if not self.pending:
+            return
+        with open(self.path, 'a') as f:
+            f.write('\n'.join(self.pending) + '\n')
+        self.pending = []
+
+# --------------------- ROW CHECKPOINTS --------------------- #
+class RowCheckpoint:
+    """
+    Finished rows of a cube, one (ncomp, nx, nt) float32 .npy file per y row.
+
+    meta describes the cube (components, shape, time step) and its inputs;
+    rows saved for a different cube or older inputs are discarded when the
+    checkpoint is opened.
+    """
+
+    def __init__(self, directory, meta):
+        self.directory = directory
+        self.meta = meta
+
+    def row_path(self, j):
+        return os.path.join(self.directory, f'row_{j:05d}.npy')
+
+    def open(self):
+        """
+        Create or validate the checkpoint (one rank only); returns the finished rows.
+        """
+        meta_path = os.path.join(self.directory, CHECKPOINT_META)
+        if os.path.exists(meta_path):
+            with open(meta_path, 'r') as f:
+                if json.load(f) != self.meta:
+                    shutil.rmtree(self.directory)
+        os.makedirs(self.directory, exist_ok=True)
+        _write_json(meta_path, self.meta)
+        return sorted(int(entry.name[4:-4]) for entry in os.scandir(self.directory)
+                      if entry.name.startswith('row_') and entry.name.endswith('.npy'))
+
+    def save(self, j, rows):
+        tmp = self.row_path(j) + '.tmp'
+        with open(tmp, 'wb') as f:
+            np.save(f, np.stack(rows))
+        os.replace(tmp, self.row_path(j))
+
+    def load(self, j):
+        return np.load(self.row_path(j))
+
+    def remove(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+def describe(directory):
+    path = os.path.join(directory, MANIFEST_FILE)
+    with open(path, 'r') as f:
+        manifest = json.load(f)
+    entries = manifest['entries']
+    journaled = sum(1 for journal in _journals(directory) for _ in open(journal, 'r'))
+    lines = [f"{path}: {len(entries)} entries, {journaled} journal lines not merged yet",
+             f"  params: {manifest['params']}"]
+    if entries:
+        weights = np.array([e['weight'] for e in entries.values()])
+        lines.append(f"  weight [{weights.min():.6g}, {weights.max():.6g}], {int((weights == 0).sum())} zero")
+    return "\n".join(lines)
+
+# --------------------- ENTRY POINT --------------------- #
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] != 'info':
+        raise ValueError("Usage: python manifest.py info DIR")
+    print(describe(sys.argv[2]))
@@ -1,30 +1,93 @@
+import io
 import os
 import sys
+import time
 import yaml
+import argparse
+import contextlib
+import multiprocessing
 import numpy as np
-import matplotlib.pyplot as plt
+from functools import lru_cache
+from scipy import sparse
+from station_geometry import load_grid
+from noise_mask import MASK_FILE, TEXT_FILE, export_text, grid_origin_spacing, write_mask
+from profiling import profiler
 
 # ---------------------- Noise Distribution Functions ----------------------
 
+GAUSSIAN_BATCH_BYTES = 4 * 2**20   # grid-sized blob evaluations held at once
+
 def uniform_distribution(d, mask_noise):
     print('  - Making a Uniform distribution')
     mask_noise[:] += d['weight']
     return mask_noise
 
-def gaussian_distribution(d, n, mask_noise, xcoor, ycoor):
-    print(f'  - Making Gaussian blob #{n}')
-    x0 = d['center_x'][n]
-    y0 = d['center_y'][n]
-    theta = np.deg2rad(d.get('azimuth', [0]*len(d['center_x']))[n])
+def rotated_gaussian(xcoor, ycoor, x0, y0, sigma_x, sigma_y, theta):
+    """
+    Gaussian blob rotated by azimuth theta; blob parameters broadcast against the coordinates.
+    """
     cos_theta, sin_theta = np.cos(theta), np.sin(theta)
 
     # Apply azimuthal rotation
     x_rot = (xcoor - x0) * cos_theta + (ycoor - y0) * sin_theta
     y_rot = -(xcoor - x0) * sin_theta + (ycoor - y0) * cos_theta
 
-    gaussian = np.exp(-((x_rot**2 / (2 * d['sigma_x'][n]**2)) +
-                        (y_rot**2 / (2 * d['sigma_y'][n]**2))))
-    mask_noise += gaussian * d['weight'][n]
+    return np.exp(-((x_rot**2 / (2 * sigma_x**2)) +
+                    (y_rot**2 / (2 * sigma_y**2))))
+
+def _support_slices(x_axis, y_axis, x0, y0, sigma_x, sigma_y, theta, truncate):
+    """
+    Index slices of the grid within `truncate` sigmas of a rotated blob (its bounding box).
+    """
+    cos_theta, sin_theta = abs(np.cos(theta)), abs(np.sin(theta))
+    half_x = truncate * np.hypot(sigma_x * cos_theta, sigma_y * sin_theta)
+    half_y = truncate * np.hypot(sigma_x * sin_theta, sigma_y * cos_theta)
+    return (slice(np.searchsorted(x_axis, x0 - half_x), np.searchsorted(x_axis, x0 + half_x, side='right')),
+            slice(np.searchsorted(y_axis, y0 - half_y), np.searchsorted(y_axis, y0 + half_y, side='right')))
+
+def gaussian_distribution(d, mask_noise, xcoor, ycoor):
+    """
+    Add all Gaussian blobs at once.
+
+    Without `truncate` every blob covers the whole grid, evaluated for a batch
+    of blobs per broadcast. With `truncate: k` each blob is evaluated only in
+    the bounding box of its k-sigma ellipse whenever those boxes cover less
+    than half of n_blobs full grids (many blobs, or a fine grid).
+    """
+    n_blobs = d['n_blobs']
+    print(f'  - Making {n_blobs} Gaussian blob(s)')
+    x0 = np.asarray(d['center_x'][:n_blobs], dtype=float)
+    y0 = np.asarray(d['center_y'][:n_blobs], dtype=float)
+    sigma_x = np.asarray(d['sigma_x'][:n_blobs], dtype=float)
+    sigma_y = np.asarray(d['sigma_y'][:n_blobs], dtype=float)
+    theta = np.deg2rad(np.asarray(d.get('azimuth', [0] * len(d['center_x']))[:n_blobs], dtype=float))
+    weight = np.asarray(d['weight'][:n_blobs], dtype=float)
+
+    truncate = d.get('truncate')
+    if truncate:
+        x_axis, y_axis = xcoor[:, 0], ycoor[0, :]
+        boxes = [_support_slices(x_axis, y_axis, *blob, truncate) for blob in zip(x0, y0, sigma_x, sigma_y, theta)]
+        touched = sum((sx.stop - sx.start) * (sy.stop - sy.start) for sx, sy in boxes)
+        if touched < 0.5 * n_blobs * mask_noise.size:
+            for n, box in enumerate(boxes):
+                mask_noise[box] += rotated_gaussian(xcoor[box], ycoor[box], x0[n], y0[n],
+                                                    sigma_x[n], sigma_y[n], theta[n]) * weight[n]
+            return mask_noise
+
+    # Broadcast path: (blobs, nx, ny) batches within GAUSSIAN_BATCH_BYTES. On a
+    # tensor grid the coordinates broadcast from one row/column, with the same
+    # arithmetic per cell as the full 2D arrays.
+    x_grid, y_grid = xcoor[:, :1], ycoor[:1, :]
+    if not (np.array_equal(np.broadcast_to(x_grid, xcoor.shape), xcoor) and
+            np.array_equal(np.broadcast_to(y_grid, ycoor.shape), ycoor)):
+        x_grid, y_grid = xcoor, ycoor
+    batch = max(1, GAUSSIAN_BATCH_BYTES // max(1, mask_noise.nbytes))
+    for first in range(0, n_blobs, batch):
+        blob = slice(first, first + batch)
+        params = [p[blob, np.newaxis, np.newaxis] for p in (x0, y0, sigma_x, sigma_y, theta)]
+        gaussians = rotated_gaussian(x_grid, y_grid, *params)
+        for gaussian, w in zip(gaussians, weight[blob]):
+            mask_noise += gaussian * w
     return mask_noise
 
 def disk(d, mask_noise, xcoor, ycoor):
@@ -35,48 +98,149 @@ def disk(d, mask_noise, xcoor, ycoor):
     mask_noise *= np.where(mask, d['weight'], 0)
     return mask_noise
 
-def blocks(d, n, mask_noise, xcoor, ycoor):
-    print(f'  - Making Block #{n}')
-    x0, y0 = d['center_x'][n], d['center_y'][n]
-    wx, wy = d['width_x'][n] / 2, d['width_y'][n] / 2
-
+@lru_cache(maxsize=16)
+def boxcar_operator(n, width=6, passes=10):
+    """
+    Sparse n x n matrix equal to `passes` rounds of np.convolve(x, ones(width)/width, 'same').
+
+    Each 'same' pass drops what is smeared past the ends, so the repeated
+    filter is not a plain convolution near the edges; the matrix power keeps
+    that behaviour exactly and stays banded (passes*(width-1)+1 diagonals).
+    """
+    start = (width - 1) // 2   # first full-convolution sample kept by mode='same'
+    one_pass = sparse.diags([np.full(n, 1.0 / width)] * width,
+                            list(range(start - width + 1, start + 1)), shape=(n, n), format='csr')
+    operator = one_pass
+    for _ in range(passes - 1):
+        operator = operator @ one_pass
+    return operator
+
+def smooth_boxcar(mask, width=6, passes=10):
+    """
+    Repeated boxcar smoothing along y (axis 1) then x (axis 0), in one product per axis.
+    """
+    nx, ny = mask.shape
+    smoothed = (boxcar_operator(ny, width, passes) @ mask.T).T
+    return boxcar_operator(nx, width, passes) @ smoothed
+
+def blocks(d, mask_noise, xcoor, ycoor):
     dx, dy = np.diff(np.unique(xcoor))[0], np.diff(np.unique(ycoor))[0]
-    x1, x2 = int((x0 - wx) // dx), int((x0 + wx) // dx)
-    y1, y2 = int((y0 - wy) // dy), int((y0 + wy) // dy)
 
+    # Smoothing is linear, so all blocks are painted first and smoothed together
     mask = np.zeros_like(mask_noise)
-    mask[x1:x2, y1:y2] = d['weight'][n]
-
-    # Smooth the block with 1D convolutions
-    for _ in range(10):
-        mask = np.apply_along_axis(
-            lambda row: np.convolve(row, np.ones(6) / 6, mode='same'), axis=1, arr=mask
-        )
-    for _ in range(10):
-        mask = np.apply_along_axis(
-            lambda col: np.convolve(col, np.ones(6) / 6, mode='same'), axis=0, arr=mask
-        )
-
-    mask_noise += mask
+    for n in range(d['n_blocks']):
+        print(f'  - Making Block #{n}')
+        x0, y0 = d['center_x'][n], d['center_y'][n]
+        wx, wy = d['width_x'][n] / 2, d['width_y'][n] / 2
+        x1, x2 = int((x0 - wx) // dx), int((x0 + wx) // dx)
+        y1, y2 = int((y0 - wy) // dy), int((y0 + wy) // dy)
+        mask[x1:x2, y1:y2] += d['weight'][n]
+
+    mask_noise += smooth_boxcar(mask)
     return mask_noise
 
-def random(d, mask_noise):
-    print('  - Making a Random distribution')
-    nx, ny = mask_noise.shape
+def _axis_index(values, axis):
+    if axis.size == 1:
+        return np.zeros(values.shape, dtype=int)  # single row or column: every point falls in it
+    return np.rint((values - axis[0]) / (axis[1] - axis[0])).astype(int)
+
+def _grid_index(x, y, xcoor, ycoor):
+    """
+    Nearest noise-grid cell of points given in metres; points off the grid are dropped.
+    """
+    x_axis, y_axis = xcoor[:, 0], ycoor[0, :]
+    ix, iy = _axis_index(x, x_axis), _axis_index(y, y_axis)
+    keep = (ix >= 0) & (ix < x_axis.size) & (iy >= 0) & (iy < y_axis.size)
+    return ix[keep], iy[keep]
+
+def _extent(xcoor, ycoor):
+    return xcoor.min(), xcoor.max(), ycoor.min(), ycoor.max()
+
+def uniform_points(d, rng, xcoor, ycoor):
+    """
+    Independent uniformly drawn grid cells (size // 10 by default, repeats collapse).
+    """
+    nx, ny = xcoor.shape
+    n = d.get('n_sources', xcoor.size // 10)
+    return rng.integers(0, nx, n), rng.integers(0, ny, n)
+
+def poisson_disk_points(d, rng, xcoor, ycoor):
+    """
+    Poisson-disk sources at least `min_distance` metres apart (before snapping to the grid).
+
+    Background cells of size r/sqrt(2) hold at most one point. Every round
+    proposes one random point in each empty cell, and a proposal is kept if
+    it is at least r from all kept points and from every competing proposal
+    of higher random priority, all as whole-grid array operations over the
+    5 x 5 cell neighbourhood. `rounds` plays the role of Bridson's k.
+    """
+    r = float(d['min_distance'])
+    xmin, xmax, ymin, ymax = _extent(xcoor, ycoor)
+    cell = r / np.sqrt(2)
+    gx, gy = int(np.ceil((xmax - xmin) / cell)) + 1, int(np.ceil((ymax - ymin) / cell)) + 1
+    px, py = np.full((gx, gy), np.nan), np.full((gx, gy), np.nan)
+    corner_x = xmin + cell * np.arange(gx)[:, np.newaxis]
+    corner_y = ymin + cell * np.arange(gy)[np.newaxis, :]
+    pad = 2
+    # On a single row or column the proposals stay on its line
+    spread_x, spread_y = (cell if xmax > xmin else 0.0), (cell if ymax > ymin else 0.0)
+
+    for _ in range(d.get('rounds', 30)):
+        empty = np.isnan(px)
+        if not empty.any():
+            break
+        cx = np.where(empty, corner_x + spread_x * rng.random((gx, gy)), np.nan)
+        cy = np.where(empty, corner_y + spread_y * rng.random((gx, gy)), np.nan)
+        priority = np.where(empty, rng.random((gx, gy)), -1.0)
+        keep = empty & (cx <= xmax) & (cy <= ymax)
+
+        padded = [np.pad(a, pad, constant_values=fill)
+                  for a, fill in ((px, np.nan), (py, np.nan), (cx, np.nan), (cy, np.nan), (priority, -1.0))]
+        for di in range(-pad, pad + 1):
+            for dj in range(-pad, pad + 1):
+                window = (slice(pad + di, pad + di + gx), slice(pad + dj, pad + dj + gy))
+                sx, sy, qx, qy, qp = (a[window] for a in padded)
+                with np.errstate(invalid='ignore'):
+                    keep &= ~((cx - sx)**2 + (cy - sy)**2 < r * r)
+                    if di or dj:
+                        keep &= ~(((cx - qx)**2 + (cy - qy)**2 < r * r) & (qp > priority))
+        if not keep.any():
+            break
+        px[keep], py[keep] = cx[keep], cy[keep]
+
+    placed = ~np.isnan(px)
+    return _grid_index(px[placed], py[placed], xcoor, ycoor)
+
+def clustered_points(d, rng, xcoor, ycoor):
+    """
+    Thomas cluster process: Poisson(n_clusters) parents uniform over the grid,
+    Poisson(mean_children) sources per parent with Gaussian offsets of
+    `cluster_sigma` metres.
+    """
+    xmin, xmax, ymin, ymax = _extent(xcoor, ycoor)
+    n_parents = rng.poisson(d['n_clusters'])
+    parents = rng.uniform((xmin, ymin), (xmax, ymax), size=(n_parents, 2))
+    counts = rng.poisson(d['mean_children'], n_parents)
+    children = np.repeat(parents, counts, axis=0) + rng.normal(0.0, d['cluster_sigma'], (counts.sum(), 2))
+    return _grid_index(children[:, 0], children[:, 1], xcoor, ycoor)
+
+RANDOM_PATTERNS = {'uniform': uniform_points, 'poisson_disk': poisson_disk_points, 'clustered': clustered_points}
+
+def random(d, mask_noise, xcoor, ycoor):
+    pattern = d.get('pattern', 'uniform')
+    print(f'  - Making a Random distribution ({pattern}, seed {d.get("seed")})')
+    if pattern not in RANDOM_PATTERNS:
+        raise ValueError(f"Invalid random pattern. Use one of {sorted(RANDOM_PATTERNS)}.")
+    # seed: null draws fresh entropy; an integer makes the ensemble reproducible
+    rng = np.random.default_rng(d.get('seed'))
+    idx, idy = RANDOM_PATTERNS[pattern](d, rng, xcoor, ycoor)
     mask = np.zeros_like(mask_noise)
-    for _ in range(mask_noise.size // 10):
-        idx = np.random.randint(0, nx)
-        idy = np.random.randint(0, ny)
-        mask[idx, idy] = d['weight']
+    mask[idx, idy] = d['weight']
     mask_noise += mask
     return mask_noise
 
 # ---------------------- Utilities ----------------------
 
-def load_station_info(filepath):
-    with open(filepath, 'r') as f:
-        return np.array([line.strip().split() for line in f], dtype=float)
-
 def parse_mesh_params(filepath):
     xmax = ymax = None
     with open(filepath, 'r') as f:
@@ -88,30 +252,30 @@ def parse_mesh_params(filepath):
                 break
     return xmax, ymax
 
-# ---------------------- Main ----------------------
-
-def main(example_dir):
-    station_file = os.path.join(example_dir, 'DATA/STATIONS_NOISE')
-    data_dir = os.path.join(example_dir, 'DATA')
-    noise_par = os.path.join(data_dir, 'parfile_noise.yaml')
-    obn_stations_file = os.path.join(data_dir, 'STATIONS_OBN')
-
-    # Load station grid information
-    station_info = load_station_info(station_file)
-    y_index, x_index = station_info[:, 0].astype(int), station_info[:, 1].astype(int)
-    ny, nx = y_index.max() + 1, x_index.max() + 1
-    ycoor = station_info[:, 2].reshape(nx, ny)
-    xcoor = station_info[:, 3].reshape(nx, ny)
-    mask_noise = np.zeros((nx, ny))
-
-    # Load noise distribution parameters
+def load_par(filepath, base=None):
+    """
+    Read a noise parameter file; sections missing from it are taken from `base`.
+    """
     try:
-        with open(noise_par, 'r') as f:
-            par = yaml.safe_load(f)
+        with open(filepath, 'r') as f:
+            par = yaml.safe_load(f) or {}
     except FileNotFoundError:
-        raise FileNotFoundError('parfile_noise.yaml not found in DATA directory.')
-
-    # Generate noise
+        raise FileNotFoundError(f'{os.path.basename(filepath)} not found.')
+    if base is None:
+        return par
+    merged = {key: dict(value) if isinstance(value, dict) else value for key, value in base.items()}
+    for key, value in par.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key].update(value)
+        else:
+            merged[key] = value
+    return merged
+
+def build_mask(par, xcoor, ycoor):
+    """
+    Normalized noise mask on the (nx, ny) station grid for one parameter set.
+    """
+    mask_noise = np.zeros(xcoor.shape)
     print('  - Noise types to distribute:', par['make_noise'])
     for noise_type in par['make_noise']:
         if noise_type == 'uniform':
@@ -119,28 +283,30 @@ def main(example_dir):
         elif noise_type == 'disk':
             mask_noise = disk(par['disk'], mask_noise, xcoor, ycoor)
         elif noise_type == 'gaussian':
-            for n in range(par['gaussian']['n_blobs']):
-                mask_noise = gaussian_distribution(par['gaussian'], n, mask_noise, xcoor, ycoor)
+            mask_noise = gaussian_distribution(par['gaussian'], mask_noise, xcoor, ycoor)
         elif noise_type == 'blocks':
-            for n in range(par['blocks']['n_blocks']):
-                mask_noise = blocks(par['blocks'], n, mask_noise, xcoor, ycoor)
+            mask_noise = blocks(par['blocks'], mask_noise, xcoor, ycoor)
         elif noise_type == 'random':
-            mask_noise = random(par['random'], mask_noise)
+            mask_noise = random(par['random'], mask_noise, xcoor, ycoor)
         else:
             print(f'  - Warning: Undefined noise distribution "{noise_type}"')
 
     # Normalize
     mask_noise /= mask_noise.max()
+    return mask_noise
 
-    # Load OBN station coordinates # subsampled by 5
-    obn_info = load_station_info(obn_stations_file)
-    obn_x, obn_y = obn_info[:, 3], obn_info[:, 2]
-    obny_index, obnx_index = obn_info[:, 0].astype(int), obn_info[:, 1].astype(int)
-    onbny, obnnx = obny_index.max() + 1, obnx_index.max() + 1
-    obn_y = obn_y.reshape(obnnx, onbny)[::5, ::5]
-    obn_x = obn_x.reshape(obnnx, onbny)[::5, ::5]
+# ---------------------- Plotting ----------------------
 
+def plot_mask(mask_noise, xcoor, ycoor, data_dir, out_png, title='OBNs and Noise Distribution (subsampled by 5)'):
+    # Imported here so runs without plots never load matplotlib
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
 
+    # Load OBN station coordinates # subsampled by 5
+    obn_grid = load_grid(os.path.join(data_dir, 'STATIONS_OBN'))
+    obn_y = obn_grid['ycoor'][::5, ::5]
+    obn_x = obn_grid['xcoor'][::5, ::5]
 
     # Get plotting extent from mesh
     xmax, ymax = parse_mesh_params(os.path.join(data_dir, 'meshfem3D_files/Mesh_Par_file'))
@@ -161,20 +327,137 @@ def main(example_dir):
     cbar = plt.colorbar(im, orientation='horizontal', pad=0.1, aspect=50)
     cbar.set_label('Noise Relative Strength')
 
-    plt.title('OBNs and Noise Distribution (subsampled by 5)')
+    plt.title(title)
 
     ax.legend(loc='upper left', bbox_to_anchor=(1.05, 1), fontsize=8, borderaxespad=0.)
     plt.tight_layout()
-    plt.savefig(f"{data_dir}/noise_distribution_mask+OBNs.png", dpi=300)
+    plt.savefig(out_png, dpi=300)
 
     plt.close()
 
-    # Save output
-    np.savetxt(f'{data_dir}/NOISE_DISTRIBUTION', mask_noise, fmt='%.3f')
+# ---------------------- Scenario Sweep ----------------------
+
+_sweep = {}
+
+def _init_sweep(xcoor, ycoor, base, out_dir):
+    _sweep.update(xcoor=xcoor, ycoor=ycoor, base=base, out_dir=out_dir)
+
+def _run_scenario(scenario):
+    """
+    Build and save one scenario mask in a worker; returns (name, seconds).
+    """
+    start = time.perf_counter()
+    name = os.path.splitext(os.path.basename(scenario))[0]
+    par = load_par(scenario, _sweep['base'])
+    with contextlib.redirect_stdout(io.StringIO()):
+        mask_noise = build_mask(par, _sweep['xcoor'], _sweep['ycoor'])
+    np.save(os.path.join(_sweep['out_dir'], f'{name}.npy'), mask_noise)
+    return name, time.perf_counter() - start
+
+def scenario_files(paths):
+    """
+    Scenario YAML files from a mix of files and directories (*.yaml, *.yml).
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += sorted(os.path.join(path, f) for f in os.listdir(path) if f.endswith(('.yaml', '.yml')))
+        else:
+            files.append(path)
+    return files
+
+def sweep(example_dir, scenarios, out_dir=None, workers=None, plot=False):
+    """
+    Evaluate many noise scenarios on one cached station grid, in parallel processes.
+
+    Each scenario YAML overrides sections of DATA/parfile_noise.yaml and its
+    mask is saved as <out_dir>/<scenario>.npy; plots, if requested, are drawn
+    after all masks are done.
+    """
+    data_dir = os.path.join(example_dir, 'DATA')
+    out_dir = out_dir or os.path.join(data_dir, 'noise_sweep')
+    os.makedirs(out_dir, exist_ok=True)
+    grid = load_grid(os.path.join(data_dir, 'STATIONS_NOISE'))
+    base = load_par(os.path.join(data_dir, 'parfile_noise.yaml'))
+    files = scenario_files(scenarios)
+
+    start = time.perf_counter()
+    print(f'  - Sweeping {len(files)} noise scenarios on a {grid["nx"]} x {grid["ny"]} grid')
+    initargs = (grid['xcoor'], grid['ycoor'], base, out_dir)
+    if workers == 1:
+        _init_sweep(*initargs)
+        results = [_run_scenario(f) for f in files]
+    else:
+        with multiprocessing.Pool(workers, initializer=_init_sweep, initargs=initargs) as pool:
+            results = list(pool.imap_unordered(_run_scenario, files))
+    for name, seconds in sorted(results):
+        print(f'     {name}: {seconds * 1e3:8.1f} ms')
+    print(f'  - Wrote {len(results)} masks to {out_dir} in {time.perf_counter() - start:.2f} s')
+
+    if plot:
+        for name, _ in sorted(results):
+            mask_noise = np.load(os.path.join(out_dir, f'{name}.npy'))
+            plot_mask(mask_noise, grid['xcoor'], grid['ycoor'], data_dir,
+                      os.path.join(out_dir, f'{name}.png'), title=f'Noise scenario {name}')
+
+# ---------------------- Main ----------------------
+
+def main(example_dir, text=False, plot=True):
+    station_file = os.path.join(example_dir, 'DATA/STATIONS_NOISE')
+    data_dir = os.path.join(example_dir, 'DATA')
+    noise_par = os.path.join(data_dir, 'parfile_noise.yaml')
+
+    # Load station grid information
+    with profiler.phase('grid'):
+        grid = load_grid(station_file)
+    xcoor, ycoor = grid['xcoor'], grid['ycoor']
+
+    # Load noise distribution parameters and generate noise
+    par = load_par(noise_par)
+    with profiler.phase('mask'):
+        mask_noise = build_mask(par, xcoor, ycoor)
+
+    if plot:
+        with profiler.phase('plot'):
+            plot_mask(mask_noise, xcoor, ycoor, data_dir, f"{data_dir}/noise_distribution_mask+OBNs.png")
+
+    # Save output: full-precision binary mask, text copy on request
+    with profiler.phase('write'):
+        write_mask(os.path.join(data_dir, MASK_FILE), mask_noise, *grid_origin_spacing(xcoor, ycoor))
+    profiler.file_written(os.path.join(data_dir, MASK_FILE))
+    print(f'  - Wrote {MASK_FILE}')
+    if text:
+        with profiler.phase('write'):
+            export_text(os.path.join(data_dir, TEXT_FILE), mask_noise)
+        profiler.file_written(os.path.join(data_dir, TEXT_FILE))
+        print(f'  - Wrote {TEXT_FILE} (text, %.3f)')
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Build the noise-source mask DATA/NOISE_DISTRIBUTION.bin.")
+    parser.add_argument('example_dir')
+    parser.add_argument('--text', action='store_true', help="also export the mask as text (DATA/NOISE_DISTRIBUTION)")
+    parser.add_argument('--no-plot', dest='no_plot', action='store_true',
+                        help="skip the mask figure and never import matplotlib (draw it later with qc_plots.py)")
+    parser.add_argument('--sweep', nargs='+', metavar='SCENARIO',
+                        help="scenario YAML files or directories; each overrides parfile_noise.yaml "
+                             "and is saved as a .npy mask instead of NOISE_DISTRIBUTION.bin")
+    parser.add_argument('--out', default=None, help="sweep output directory (default: DATA/noise_sweep)")
+    parser.add_argument('--workers', type=int, default=None, help="sweep processes (default: all cores)")
+    parser.add_argument('--plot', action='store_true', help="sweep: also draw a figure per scenario")
+    parser.add_argument('--profile', default=None, metavar='REPORT.json',
+                        help="time the grid, mask, plot and write phases and write a JSON report here")
+    return parser.parse_args(argv)
 
 # ---------------------- Entry Point ----------------------
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        raise ValueError("Usage: python script.py <example_dir>")
-    main(sys.argv[1])
+    args = parse_args(sys.argv[1:])
+    if args.profile:
+        profiler.enable()
+    if args.sweep:
+        with profiler.phase('sweep'):
+            sweep(args.example_dir, args.sweep, args.out, args.workers, args.plot)
+    else:
+        main(args.example_dir, args.text, not args.no_plot)
+    if args.profile:
+        profiler.report(args.profile, label='noise distribution')
@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+"""
+Binary noise-source mask (DATA/NOISE_DISTRIBUTION.bin).
+
+Layout: a 64-byte header followed by the (nx, ny) mask as native float64,
+C order (y fastest, like the STATIONS files):
+
+    magic 'NOISEMSK' | version int32 | pad | nx, ny int64 | x0, y0, dx, dy float64
+
+The header records the grid origin and spacing, so the mask is checked
+against STATIONS_NOISE when it is loaded. Full precision is kept (the text export rounds to
+%.3f), and the data can be memory-mapped or placed in one MPI shared-memory
+window per node.
+
+Usage: python noise_mask.py info FILE
+       python noise_mask.py export FILE [TEXT_FILE]   (text export, %.3f)
+"""
+
+import os
+import sys
+import numpy as np
+from station_geometry import load_grid
+
+MASK_FILE = 'NOISE_DISTRIBUTION.bin'
+TEXT_FILE = 'NOISE_DISTRIBUTION'
+STATIONS_FILE = 'STATIONS_NOISE'
+MAGIC = b'NOISEMSK'
+VERSION = 1
+HEADER_DTYPE = np.dtype([('magic', 'S8'), ('version', '=i4'), ('pad', '=i4'),
+                         ('nx', '=i8'), ('ny', '=i8'),
+                         ('x0', '=f8'), ('y0', '=f8'), ('dx', '=f8'), ('dy', '=f8')])
+HEADER_SIZE = 64
+DATA_DTYPE = np.dtype('=f8')
+
+# --------------------- WRITING --------------------- #
+def grid_origin_spacing(xcoor, ycoor):
+    """
+    (x0, y0, dx, dy) of an (nx, ny) station grid.
+    """
+    dx = xcoor[1, 0] - xcoor[0, 0] if xcoor.shape[0] > 1 else 0.0
+    dy = ycoor[0, 1] - ycoor[0, 0] if ycoor.shape[1] > 1 else 0.0
+    return float(xcoor[0, 0]), float(ycoor[0, 0]), float(dx), float(dy)
+
+def write_mask(file_path, mask, x0=0.0, y0=0.0, dx=0.0, dy=0.0):
+    """
+    Write an (nx, ny) mask with its grid origin and spacing.
+    """
+    mask = np.ascontiguousarray(mask, dtype=DATA_DTYPE)
+    header = np.zeros(1, dtype=HEADER_DTYPE)
+    header[0] = (MAGIC, VERSION, 0, mask.shape[0], mask.shape[1], x0, y0, dx, dy)
+    with open(file_path, 'wb') as f:
+        f.write(header.tobytes().ljust(HEADER_SIZE, b'\0'))
+        f.write(mask.tobytes())
+
+def export_text(file_path, mask, fmt='%.3f'):
+    """
+    Text copy of the mask in the original NOISE_DISTRIBUTION format.
+    """
+    np.savetxt(file_path, mask, fmt=fmt)
+
+# --------------------- READING --------------------- #
+def read_header(file_path):
+    """
+    Header fields as a dict (nx, ny, x0, y0, dx, dy).
+    """
+    with open(file_path, 'rb') as f:
+        raw = f.read(HEADER_SIZE)
+    if len(raw) < HEADER_DTYPE.itemsize:
+        raise ValueError(f"{file_path} is too short for a noise mask.")
+    header = np.frombuffer(raw[:HEADER_DTYPE.itemsize], dtype=HEADER_DTYPE)[0]
+    if header['magic'] != MAGIC:
+        raise ValueError(f"{file_path} is not a binary noise mask.")
+    if header['version'] != VERSION:
+        raise ValueError(f"{file_path}: unsupported noise mask version {header['version']}.")
+    return {key: header[key].item() for key in ('nx', 'ny', 'x0', 'y0', 'dx', 'dy')}
+
+def read_mask(file_path, mmap_mode='r'):
+    """
+    Memory-mapped (nx, ny) mask and its header; mmap_mode=None reads it into memory.
+    """
+    header = read_header(file_path)
+    shape = (header['nx'], header['ny'])
+    if mmap_mode is None:
+        with open(file_path, 'rb') as f:
+            f.seek(HEADER_SIZE)
+            return np.fromfile(f, dtype=DATA_DTYPE, count=shape[0] * shape[1]).reshape(shape), header
+    return np.memmap(file_path, dtype=DATA_DTYPE, mode=mmap_mode, offset=HEADER_SIZE, shape=shape), header
+
+def check_grid(data_dir, shape, header=None):
+    """
+    Raise ValueError if a mask does not fit the STATIONS_NOISE grid (skipped without one).
+
+    shape is checked against the grid size, the binary header (if given)
+    also against the grid origin and spacing.
+    """
+    station_file = os.path.join(data_dir, STATIONS_FILE)
+    if not os.path.exists(station_file):
+        return
+    grid = load_grid(station_file)
+    if tuple(shape) != (grid['nx'], grid['ny']):
+        raise ValueError(f"Noise mask in {data_dir} is {shape[0]} x {shape[1]}, "
+                         f"{STATIONS_FILE} is a {grid['nx']} x {grid['ny']} grid.")
+    if header is not None:
+        expected = grid_origin_spacing(grid['xcoor'], grid['ycoor'])
+        found = tuple(header[key] for key in ('x0', 'y0', 'dx', 'dy'))
+        if not np.allclose(found, expected, rtol=0, atol=1e-3):
+            raise ValueError(f"{MASK_FILE} in {data_dir} has origin/spacing ({', '.join(f'{v:g}' for v in found)}) m, "
+                             f"{STATIONS_FILE} ({', '.join(f'{v:g}' for v in expected)}) m; "
+                             f"rebuild the mask with noise_distribution.py.")
+
+def load_mask(data_dir, mmap_mode='r'):
+    """
+    Mask of an example's DATA directory: the binary file, else the text export.
+
+    A text mask newer than the binary one that is not just its %.3f export
+    was edited or regenerated by hand; it is then used instead, with a
+    warning. The mask is checked against STATIONS_NOISE (check_grid).
+    """
+    binary = os.path.join(data_dir, MASK_FILE)
+    text = os.path.join(data_dir, TEXT_FILE)
+    if not os.path.exists(binary):
+        mask = np.loadtxt(text, dtype=float, ndmin=2)
+        check_grid(data_dir, mask.shape)
+        return mask
+
+    mask, header = read_mask(binary, mmap_mode)
+    if os.path.exists(text) and os.stat(text).st_mtime_ns > os.stat(binary).st_mtime_ns:
+        edited = np.loadtxt(text, dtype=float, ndmin=2)
+        if edited.shape != mask.shape or not np.allclose(edited, mask, rtol=0, atol=5e-4 + 1e-9):
+            print(f"  -Warning: {text} is newer than {binary} and differs from it; using the text mask")
+            check_grid(data_dir, edited.shape)
+            return edited
+    check_grid(data_dir, mask.shape, header)
+    return mask
+
+def shared_mask(comm, data_dir):
+    """
+    One copy of the mask per node in an MPI shared-memory window.
+
+    The first rank on each node reads the file (binary, else text) into the
+    window; the other ranks map the same memory. Returns (mask, window);
+    free the window once the mask is no longer needed.
+    """
+    from mpi4py import MPI
+
+    node = comm.Split_type(MPI.COMM_TYPE_SHARED)
+    shape = None
+    if node.Get_rank() == 0:
+        mask = load_mask(data_dir)
+        shape = mask.shape
+    shape = node.bcast(shape, root=0)
+
+    nbytes = int(np.prod(shape)) * DATA_DTYPE.itemsize if node.Get_rank() == 0 else 0
+    win = MPI.Win.Allocate_shared(nbytes, DATA_DTYPE.itemsize, comm=node)
+    buf, _ = win.Shared_query(0)
+    shared = np.ndarray(buffer=buf, dtype=DATA_DTYPE, shape=shape)
+    if node.Get_rank() == 0:
+        shared[...] = mask
+    win.Fence()
+    node.Barrier()
+    node.Free()
+    return shared, win
+
+# --------------------- ENTRY POINT --------------------- #
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] not in ('info', 'export'):
+        raise ValueError("Usage: python noise_mask.py info FILE | export FILE [TEXT_FILE]")
+
+    if sys.argv[1] == 'info':
+        header = read_header(sys.argv[2])
+        mask, _ = read_mask(sys.argv[2])
+        print(f"  -{sys.argv[2]}: {header['nx']} x {header['ny']} grid, origin ({header['x0']}, {header['y0']}) m, "
+              f"spacing ({header['dx']}, {header['dy']}) m, values [{mask.min():.6g}, {mask.max():.6g}]")
+    else:
+        out = sys.argv[3] if len(sys.argv) > 3 else os.path.join(os.path.dirname(sys.argv[2]), TEXT_FILE)
+        export_text(out, read_mask(sys.argv[2])[0])
+        print(f"  -Wrote {out}")
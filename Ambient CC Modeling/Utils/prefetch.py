@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+"""
+Overlapped file I/O for the per-rank loops of the MPI scripts.
+
+Prefetcher runs a load function on a background thread pool, keeping up to
+`depth` items in flight beyond the one being processed, and hands the
+results back in order. Items are
+pulled from the source iterator only when there is room, so a generator
+that claims work from a ChunkScheduler claims the next chunk only when the
+read-ahead reaches it. MPI calls therefore stay on the main thread.
+
+AsyncWriter runs write calls in the background with at most `depth`
+pending, so the next trace is read and filtered while the last one is
+written. A write error is raised in the main thread on a later submit(),
+wait() or close().
+
+Both fall back to plain in-line calls with depth 0.
+"""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_DEPTH = 4
+
+class Prefetcher:
+    """
+    Iterate over (item, load(item)) pairs in item order, loading ahead on threads.
+
+        for file, (amplitude, t0, dt) in Prefetcher(read_trace, files, depth=8):
+            process(amplitude)
+    """
+
+    def __init__(self, load, items, depth=DEFAULT_DEPTH, workers=None):
+        self.load = load
+        self.items = iter(items)
+        self.depth = max(0, int(depth))
+        self.workers = workers or self.depth
+
+    def __iter__(self):
+        if self.depth == 0:
+            for item in self.items:
+                yield item, self.load(item)
+            return
+
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            try:
+                for item in self.items:
+                    pending.append((item, pool.submit(self.load, item)))
+                    # Keep `depth` loads in flight while the consumer works on this one
+                    if len(pending) > self.depth:
+                        item, future = pending.popleft()
+                        yield item, future.result()
+                while pending:
+                    item, future = pending.popleft()
+                    yield item, future.result()
+            finally:
+                # Consumer stopped early or a load failed: do not start queued loads
+                for _, future in pending:
+                    future.cancel()
+
+class AsyncWriter:
+    """
+    Background writes with at most `depth` pending; wait() before relying on the files.
+    """
+
+    def __init__(self, depth=DEFAULT_DEPTH):
+        self.depth = max(0, int(depth))
+        self.pool = ThreadPoolExecutor(max_workers=self.depth) if self.depth else None
+        self.pending = deque()
+
+    def submit(self, write, *args):
+        if self.pool is None:
+            write(*args)
+            return
+        while len(self.pending) >= self.depth:
+            self.pending.popleft().result()
+        self.pending.append(self.pool.submit(write, *args))
+
+    def wait(self):
+        while self.pending:
+            self.pending.popleft().result()
+
+    def close(self):
+        try:
+            self.wait()
+        finally:
+            if self.pool is not None:
+                self.pool.shutdown()
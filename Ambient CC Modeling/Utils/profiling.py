@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+"""
+Opt-in per-phase timing and I/O counters for the Utils scripts.
+
+Scripts time their phases through the module-level `profiler`, which does
+nothing until `profiler.enable()` is called (the --profile FILE option):
+
+    with profiler.phase('read'):
+        amplitude, t0, dt = read_seismogram(path)
+    profiler.file_read(path)
+
+At the end every rank's phases (calls, seconds), counters (files and bytes
+read/written) and peak RSS are gathered on rank 0 and written as one JSON
+report. For each phase the report gives the min/mean/max over ranks and
+the load imbalance (max/mean). It also gives aggregate files/s and MiB/s.
+
+Usage: python profiling.py show REPORT.json
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import resource
+import threading
+from contextlib import contextmanager
+
+COUNTERS = ('files_read', 'bytes_read', 'files_written', 'bytes_written')
+
+def peak_rss_mib():
+    """
+    Peak resident set size of this process in MiB (ru_maxrss is KiB on Linux, bytes on macOS).
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10
+
+def _spread(values):
+    mean = sum(values) / len(values)
+    return {'min': min(values), 'mean': mean, 'max': max(values), 'sum': sum(values),
+            'imbalance': max(values) / mean if mean > 0 else 1.0}
+
+class Profiler:
+    """
+    Per-rank phase timers and counters; every method is a no-op while disabled.
+
+    Phases and counters may be updated from I/O threads (prefetch.py); time
+    spent there is summed over threads.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.enabled = False
+        self.start = None
+        self.seconds = {}
+        self.calls = {}
+        self.counters = dict.fromkeys(COUNTERS, 0)
+
+    def enable(self):
+        self.enabled = True
+        self.start = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name):
+        if not self.enabled:
+            yield
+            return
+        tic = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - tic)
+
+    def add_time(self, name, seconds, calls=1):
+        """
+        Credit time measured elsewhere (e.g. ChunkScheduler.wait) to a phase.
+        """
+        if self.enabled:
+            with self.lock:
+                self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+                self.calls[name] = self.calls.get(name, 0) + calls
+
+    def count(self, name, n=1):
+        if self.enabled:
+            with self.lock:
+                self.counters[name] = self.counters.get(name, 0) + n
+
+    def file_read(self, path):
+        if self.enabled:
+            size = os.stat(path).st_size
+            self.count('files_read')
+            self.count('bytes_read', size)
+
+    def file_written(self, path):
+        if self.enabled:
+            size = os.stat(path).st_size
+            self.count('files_written')
+            self.count('bytes_written', size)
+
+    def local(self, rank=0):
+        return {'rank': rank, 'host': socket.gethostname(), 'wall': time.perf_counter() - self.start,
+                'phases': {name: {'calls': self.calls[name], 'seconds': self.seconds[name]} for name in self.seconds},
+                'counters': dict(self.counters), 'peak_rss_mib': peak_rss_mib()}
+
+    def report(self, path, comm=None, label='', **meta):
+        """
+        Gather every rank's numbers on rank 0 and write the JSON report there.
+
+        Collective over comm when one is given; returns the report on rank 0, else None.
+        """
+        if not self.enabled:
+            return None
+        rank = comm.Get_rank() if comm is not None else 0
+        per_rank = comm.gather(self.local(rank), root=0) if comm is not None else [self.local()]
+        if rank != 0:
+            return None
+
+        report = summarize(per_rank)
+        report.update(label=label, argv=sys.argv, **meta)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=1)
+        print(f"  -Profile ({label or 'run'}): {report['wall']:.2f} s on {report['ranks']} ranks, "
+              f"peak RSS {report['peak_rss_mib']['max']:.0f} MiB/rank -> {path}")
+        return report
+
+def summarize(per_rank):
+    """
+    Reduce a list of per-rank dicts (Profiler.local) into the report layout.
+    """
+    wall = max(r['wall'] for r in per_rank)
+    names = sorted({name for r in per_rank for name in r['phases']})
+    phases = {}
+    for name in names:
+        seconds = [r['phases'].get(name, {'seconds': 0.0})['seconds'] for r in per_rank]
+        phases[name] = {'calls': sum(r['phases'].get(name, {'calls': 0})['calls'] for r in per_rank),
+                        'seconds': _spread(seconds)}
+    counters = {}
+    for r in per_rank:
+        for name, value in r['counters'].items():
+            counters[name] = counters.get(name, 0) + value
+    rate = 1.0 / wall if wall > 0 else 0.0
+    throughput = {'files_read_per_s': counters.get('files_read', 0) * rate,
+                  'files_written_per_s': counters.get('files_written', 0) * rate,
+                  'MiB_read_per_s': counters.get('bytes_read', 0) / 2**20 * rate,
+                  'MiB_written_per_s': counters.get('bytes_written', 0) / 2**20 * rate}
+    return {'ranks': len(per_rank), 'wall': wall, 'phases': phases, 'counters': counters,
+            'throughput': throughput, 'peak_rss_mib': _spread([r['peak_rss_mib'] for r in per_rank]),
+            'per_rank': per_rank}
+
+def describe(report):
+    lines = [f"{report.get('label') or 'run'}: {report['wall']:.2f} s on {report['ranks']} ranks, "
+             f"peak RSS max {report['peak_rss_mib']['max']:.0f} MiB, sum {report['peak_rss_mib']['sum']:.0f} MiB"]
+    for name, phase in sorted(report['phases'].items(), key=lambda item: -item[1]['seconds']['max']):
+        s = phase['seconds']
+        lines.append(f"  {name:14s} {phase['calls']:9d} calls  min {s['min']:8.2f}  mean {s['mean']:8.2f}  "
+                     f"max {s['max']:8.2f} s  imbalance {s['imbalance']:.2f}")
+    c, t = report['counters'], report['throughput']
+    lines.append(f"  read  {c.get('files_read', 0)} files, {c.get('bytes_read', 0) / 2**20:.1f} MiB "
+                 f"({t['files_read_per_s']:.1f} files/s, {t['MiB_read_per_s']:.1f} MiB/s)")
+    lines.append(f"  wrote {c.get('files_written', 0)} files, {c.get('bytes_written', 0) / 2**20:.1f} MiB "
+                 f"({t['files_written_per_s']:.1f} files/s, {t['MiB_written_per_s']:.1f} MiB/s)")
+    return "\n".join(lines)
+
+profiler = Profiler()
+
+# --------------------- ENTRY POINT --------------------- #
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] != 'show':
+        raise ValueError("Usage: python profiling.py show REPORT.json")
+    with open(sys.argv[2], 'r') as f:
+        print(describe(json.load(f)))
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+"""
+QC figures for an example directory, drawn from the saved geometry.
+
+Setup runs with --no-plot skip matplotlib entirely; this command draws the
+same figures afterwards from DATA/STATIONS_* (binary sidecar when present)
+and DATA/NOISE_DISTRIBUTION.bin:
+
+    stations  DATA/STATIONS_<rtype>.png and STATIONS2D_<rtype>.png
+    noise     DATA/noise_distribution_mask+OBNs.png
+
+Usage: python qc_plots.py EXAMPLE_DIR [stations] [noise] [--source SX SY SZ]
+"""
+
+import os
+import argparse
+from station_geometry import load_grid, load_stations, virtual_source
+from noise_mask import load_mask
+from stations_setup import plot_stations
+from noise_distribution import plot_mask
+
+MESH_PAR_FILE = 'meshfem3D_files/Mesh_Par_file'
+STATION_TYPES = ('NOISE', 'OBN')
+
+# --------------------- INPUTS --------------------- #
+def mesh_limits(data_dir):
+    """
+    (xmin, xmax, ymin, ymax) of the mesh in m, or None without a Mesh_Par_file.
+    """
+    keys = {'LONGITUDE_MIN': None, 'LONGITUDE_MAX': None, 'LATITUDE_MIN': None, 'LATITUDE_MAX': None}
+    path = os.path.join(data_dir, MESH_PAR_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        for line in f:
+            key, _, value = line.partition('=')
+            if key.strip() in keys and value.strip():
+                keys[key.strip()] = float(value.split()[0].replace('d', 'e'))
+    if None in keys.values():
+        return None
+    return keys['LONGITUDE_MIN'], keys['LONGITUDE_MAX'], keys['LATITUDE_MIN'], keys['LATITUDE_MAX']
+
+# --------------------- FIGURES --------------------- #
+def station_figures(data_dir, source):
+    limits = mesh_limits(data_dir)
+    for rtype in STATION_TYPES:
+        station_file = os.path.join(data_dir, f'STATIONS_{rtype}')
+        if not os.path.exists(station_file):
+            continue
+        table = load_stations(station_file)
+        if limits is None:
+            xmin, xmax, ymin, ymax = table[:, 3].min(), table[:, 3].max(), table[:, 2].min(), table[:, 2].max()
+        else:
+            xmin, xmax, ymin, ymax = limits
+        plot_stations(table, xmin, xmax, ymin, ymax, rtype, data_dir, *source)
+        print(f"  -Wrote STATIONS_{rtype}.png and STATIONS2D_{rtype}.png")
+
+def noise_figure(data_dir):
+    grid = load_grid(os.path.join(data_dir, 'STATIONS_NOISE'))
+    out_png = os.path.join(data_dir, 'noise_distribution_mask+OBNs.png')
+    plot_mask(load_mask(data_dir), grid['xcoor'], grid['ycoor'], data_dir, out_png)
+    print(f"  -Wrote {os.path.basename(out_png)}")
+
+# --------------------- ENTRY POINT --------------------- #
+def parse_args():
+    parser = argparse.ArgumentParser(description="Draw the setup QC figures from saved geometry.")
+    parser.add_argument('example_dir')
+    parser.add_argument('figures', nargs='*', help="stations and/or noise (default: both)")
+    parser.add_argument('--source', nargs=3, type=float, metavar=('SX', 'SY', 'SZ'), default=None,
+                        help="virtual source in m (default: DATA/FORCESOLUTION)")
+    args = parser.parse_args()
+    args.figures = args.figures or ['stations', 'noise']
+    unknown = set(args.figures) - {'stations', 'noise'}
+    if unknown:
+        parser.error(f"unknown figure(s) {sorted(unknown)}; use 'stations' and/or 'noise'")
+    return args
+
+if __name__ == "__main__":
+    args = parse_args()
+    data_dir = os.path.join(args.example_dir, 'DATA')
+    if 'stations' in args.figures:
+        station_figures(data_dir, args.source or virtual_source(data_dir))
+    if 'noise' in args.figures:
+        noise_figure(data_dir)
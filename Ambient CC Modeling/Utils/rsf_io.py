@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+"""
+Madagascar RSF output for cubes assembled in parallel.
+
+An RSF dataset is a text header (key=value pairs, `in=` pointing at the
+binary) plus a headerless native float32 binary with axis 1 fastest. Ranks
+write their own y rows of a (t, y, x) cube straight into the binary with
+collective MPI-IO, so no rank ever holds the full cube and m8r is not needed.
+"""
+
+import os
+import sys
+import numpy as np
+from mpi4py import MPI
+
+# Bytes of the cube block each rank transposes and writes per collective call
+WRITE_BLOCK_BYTES = 64 * 2**20
+
+# --------------------- HEADER --------------------- #
+def rsf_axis(n, d, o, label, unit):
+    return {'n': n, 'd': d, 'o': o, 'label': label, 'unit': unit}
+
+def rsf_data_path(header_path):
+    """
+    Binary file for a header, placed in $DATAPATH like Madagascar does, else next to the header.
+    """
+    datapath = os.environ.get('DATAPATH', os.path.dirname(os.path.abspath(header_path)))
+    return os.path.join(datapath, os.path.basename(header_path) + '@')
+
+def read_rsf_header(header_path):
+    """
+    Parse an RSF header into a dict (later assignments win, quotes removed).
+    """
+    header = {}
+    with open(header_path, 'r') as f:
+        for line in f:
+            for token in line.split():
+                if '=' in token:
+                    key, value = token.split('=', 1)
+                    header[key] = value.strip('"')
+    return header
+
+def write_rsf_header(header_path, axes, data_path=None):
+    """
+    Write an RSF header for native float32 data; axes are listed fastest first.
+    """
+    data_path = data_path or rsf_data_path(header_path)
+    lines = [f"{os.path.basename(sys.argv[0])}: in {os.getcwd()}", ""]
+    for k, axis in enumerate(axes, start=1):
+        lines += [f"\tn{k}={axis['n']}", f"\td{k}={axis['d']}", f"\to{k}={axis['o']}",
+                  f"\tlabel{k}=\"{axis['label']}\"", f"\tunit{k}=\"{axis['unit']}\""]
+    lines += ["\tdata_format=\"native_float\"", "\tesize=4", f"\tin=\"{os.path.abspath(data_path)}\"", ""]
+    with open(header_path, 'w') as f:
+        f.write("\n".join(lines))
+    return data_path
+
+# --------------------- PARALLEL DATA WRITES --------------------- #
+def _row_filetype(rows, nx, ny):
+    """
+    File type selecting this rank's rows of one (y, x) time slice, tiled over time.
+    """
+    rows_type = MPI.FLOAT.Create_indexed_block(nx, [int(j) * nx for j in rows])
+    filetype = rows_type.Create_resized(0, ny * nx * MPI.FLOAT.Get_size())
+    filetype.Commit()
+    rows_type.Free()
+    return filetype
+
+def write_rows(comm, data_path, rows, data, ny):
+    """
+    Collectively write y rows of a (nt, ny, nx) float32 cube into its RSF binary.
+
+    `rows` are this rank's y indices (any subset, any order) and `data` holds
+    the matching (len(rows), nx, nt) traces, as a 3D array or a list of
+    (nx, nt) rows. Ranks without rows still take part in the collective calls.
+    """
+    order = np.argsort(rows)
+    rows = np.asarray(rows, dtype=np.int64)[order]
+    data = [data[r] for r in order]
+    nx, nt = (data[0].shape if data else (0, 0))
+    nt = comm.allreduce(nt, op=MPI.MAX)
+    nx = comm.allreduce(nx, op=MPI.MAX)
+
+    fh = MPI.File.Open(comm, data_path, MPI.MODE_WRONLY | MPI.MODE_CREATE)
+    fh.Set_size(nt * ny * nx * MPI.FLOAT.Get_size())
+    filetype = _row_filetype(rows, nx, ny) if len(rows) else MPI.FLOAT
+    fh.Set_view(0, MPI.FLOAT, filetype)
+
+    # Same number of time blocks on every rank, so the collective calls match
+    block_nt = WRITE_BLOCK_BYTES // max(1, len(rows) * nx * MPI.FLOAT.Get_size())
+    block_nt = max(1, comm.allreduce(min(block_nt, nt), op=MPI.MIN))
+    block = np.empty((block_nt, len(rows), nx), dtype=np.float32)
+    for t0 in range(0, nt, block_nt):
+        t1 = min(t0 + block_nt, nt)
+        for r, row in enumerate(data):
+            block[:t1 - t0, r, :] = row[:, t0:t1].T
+        # View offsets count only this rank's samples: len(rows)*nx per time slice
+        fh.Write_at_all(t0 * len(rows) * nx, block[:t1 - t0])
+
+    fh.Close()
+    if filetype is not MPI.FLOAT:
+        filetype.Free()
+
+def read_rsf(header_path, mmap_mode='r'):
+    """
+    Memory-map an RSF float32 dataset; returns (array with slowest axis first, header).
+    """
+    header = read_rsf_header(header_path)
+    shape = []
+    k = 1
+    while f'n{k}' in header:
+        shape.insert(0, int(header[f'n{k}']))
+        k += 1
+    return np.memmap(header['in'], dtype=np.float32, mode=mmap_mode, shape=tuple(shape)), header
@@ -9,6 +9,7 @@ if [[ "$#" -lt 9 ]]; then
     exit 1
 fi
 
+# Set PLOT_OPT=--no-plot in the environment to skip the station figures
 #------------------------- Input Parameters --------------------#
 example_dir="$1"
 z="$2"
@@ -78,4 +79,4 @@ python $utils_dir/stations_setup.py \
     $ymin $ymax $dy $ystart $yend \
     $xmin $xmax $dx $xstart $xend \
     $z $x_y_sampling $rtype $example_dir \
-    $sx $sy $sz
+    $sx $sy $sz $PLOT_OPT
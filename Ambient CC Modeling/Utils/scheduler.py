@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+"""
+Chunk scheduling of independent work items (files, gather rows) over MPI ranks.
+
+In 'dynamic' mode a single int64 counter lives in an RMA window on rank 0 and
+every rank, rank 0 included, claims the next chunk with an atomic
+MPI_Fetch_and_op. Ranks that hit slow files simply take fewer chunks, so no
+rank idles at the closing barrier waiting for a straggler. 'static' mode
+reproduces the contiguous np.array_split partition for comparison.
+"""
+
+import time
+import numpy as np
+from mpi4py import MPI
+
+class ChunkScheduler:
+    """
+    Iterate over the item indices assigned to this rank, chunk by chunk.
+
+        scheduler = ChunkScheduler(comm, len(files), chunk_size=8)
+        for start, stop in scheduler.chunks():
+            process(files[start:stop])
+        scheduler.report('Driving sources')
+        scheduler.free()
+    """
+
+    def __init__(self, comm, n_items, chunk_size=1, mode='dynamic'):
+        if mode not in ('dynamic', 'static'):
+            raise ValueError("Invalid schedule. Use 'dynamic' or 'static'.")
+        self.comm = comm
+        self.rank = comm.Get_rank()
+        self.size = comm.Get_size()
+        self.n_items = n_items
+        self.chunk_size = max(1, int(chunk_size))
+        self.mode = mode
+        self.win = None
+
+        # Per-rank statistics: items, chunks, seconds working, seconds claiming work
+        self.n_done = 0
+        self.n_chunks = 0
+        self.busy = 0.0
+        self.wait = 0.0
+
+        if mode == 'dynamic':
+            itemsize = MPI.INT64_T.Get_size()
+            self.win = MPI.Win.Allocate(itemsize if self.rank == 0 else 0, itemsize, comm=comm)
+            if self.rank == 0:
+                self.win.Lock(0)
+                self.win.Put(np.zeros(1, dtype=np.int64), 0)
+                self.win.Unlock(0)
+            comm.Barrier()
+
+    def _claim(self):
+        """
+        Atomically take the next chunk start from the shared counter.
+        """
+        increment = np.array([self.chunk_size], dtype=np.int64)
+        start = np.empty(1, dtype=np.int64)
+        self.win.Lock(0, MPI.LOCK_SHARED)
+        self.win.Fetch_and_op(increment, start, 0, 0, MPI.SUM)
+        self.win.Unlock(0)
+        return int(start[0])
+
+    def _static_chunks(self):
+        # Same split as np.array_split: the first (n_items % size) ranks get one extra item
+        base, extra = divmod(self.n_items, self.size)
+        first = self.rank * base + min(self.rank, extra)
+        last = first + base + (self.rank < extra)
+        for start in range(first, last, self.chunk_size):
+            yield start, min(start + self.chunk_size, last)
+
+    def chunks(self):
+        """
+        Yield (start, stop) index ranges for this rank until the work runs out.
+        """
+        source = self._static_chunks() if self.mode == 'static' else None
+        tic = time.perf_counter()
+
+        while True:
+            if source is not None:
+                chunk = next(source, None)
+            else:
+                start = self._claim()
+                chunk = (start, min(start + self.chunk_size, self.n_items)) if start < self.n_items else None
+            toc = time.perf_counter()
+            self.wait += toc - tic
+            if chunk is None:
+                return
+
+            yield chunk
+
+            tic = time.perf_counter()
+            self.busy += tic - toc
+            self.n_done += chunk[1] - chunk[0]
+            self.n_chunks += 1
+
+    def __iter__(self):
+        for start, stop in self.chunks():
+            yield from range(start, stop)
+
+    def stats(self):
+        """
+        Per-rank statistics gathered on rank 0 (None on other ranks).
+        """
+        local = (self.rank, self.n_done, self.n_chunks, self.busy, self.wait)
+        return self.comm.gather(local, root=0)
+
+    def report(self, label=''):
+        """
+        Print per-rank timing and the load imbalance (max/mean busy time) on rank 0.
+        """
+        stats = self.stats()
+        if self.rank != 0:
+            return
+        busy = np.array([s[3] for s in stats])
+        print(f"  -{label} schedule: {self.mode}, chunk size {self.chunk_size}, {self.n_items} items on {self.size} ranks")
+        for rank, n_done, n_chunks, rank_busy, rank_wait in stats:
+            print(f"     rank {rank:4d}: {n_done:7d} items {n_chunks:6d} chunks  busy {rank_busy:8.2f} s  claim {rank_wait:6.3f} s")
+        if busy.mean() > 0:
+            print(f"     imbalance (max/mean busy): {busy.max() / busy.mean():.2f}")
+
+    def free(self):
+        if self.win is not None:
+            self.win.Free()
+            self.win = None
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+"""
+Step-2 source list: the CMTSOLUTION file and a compact per-source index.
+
+Each noise station whose mask weight is non-zero becomes one P-type source
+driven by DATA/SOURCES/{x}.{y}.P.bin. Zero-weight stations get no entry:
+their driving source is all zeros, so injecting it only costs solver time.
+
+The index (DATA/SOURCES_INDEX.npy) is a structured array with one row per
+emitted source, in CMTSOLUTION order:
+
+    id  x_index  y_index  x  y  z  weight  path
+
+Usage: python source_index.py info [INDEX_FILE]
+"""
+
+import os
+import sys
+import numpy as np
+
+INDEX_FILE = 'SOURCES_INDEX.npy'
+CMT_FILE = 'CMTSOLUTION'
+SOURCES_DIR = 'DATA/SOURCES'   # relative to the example directory, as SPECFEM reads it
+INDEX_FIELDS = [('id', '<i4'), ('x_index', '<i4'), ('y_index', '<i4'),
+                ('x', '<f8'), ('y', '<f8'), ('z', '<f8'), ('weight', '<f8')]
+
+# One source block; floats use %r so they print exactly like the original f-strings
+CMT_TEMPLATE = ('PDE 1999 01 01 00 00 00.00  %r %r %r 1 1 test%03d\n'
+                'event name:      %03d\n'
+                'time shift:       0.0000\n'
+                'half duration:    0.0\n'
+                'latorUTM:       %r\n'
+                'longorUTM:      %r\n'
+                'depth:          %r\n'
+                'Mrr:        1\n'
+                'Mtt:        1\n'
+                'Mpp:        1\n'
+                'Mrt:        0\n'
+                'Mrp:        0\n'
+                'Mtp:        0\n'
+                '%s\n')
+
+# --------------------- INDEX --------------------- #
+def source_path(x_index, y_index):
+    return f'{SOURCES_DIR}/{x_index}.{y_index}.P.bin'
+
+def source_table(stations, noise_mask, min_weight=0.0):
+    """
+    Index of the stations whose |mask weight| exceeds min_weight.
+
+    stations is an (n, 6) STATIONS table (station_geometry.load_stations),
+    noise_mask the (nx, ny) mask indexed as [x_index, y_index].
+    """
+    y_index = stations[:, 0].astype(np.int64)
+    x_index = stations[:, 1].astype(np.int64)
+    weight = np.asarray(noise_mask[x_index, y_index], dtype=np.float64)
+    active = np.flatnonzero(np.abs(weight) > min_weight)
+
+    paths = [source_path(x, y) for x, y in zip(x_index[active].tolist(), y_index[active].tolist())]
+    width = max((len(path) for path in paths), default=1)
+    index = np.zeros(active.size, dtype=INDEX_FIELDS + [('path', f'S{width}')])
+    index['id'] = np.arange(1, active.size + 1)
+    index['x_index'] = x_index[active]
+    index['y_index'] = y_index[active]
+    index['x'] = stations[active, 3]
+    index['y'] = stations[active, 2]
+    index['z'] = stations[active, 5]
+    index['weight'] = weight[active]
+    index['path'] = paths
+    return index
+
+def write_index(data_dir, index):
+    path = os.path.join(data_dir, INDEX_FILE)
+    np.save(path, index)
+    return path
+
+def read_index(path):
+    return np.load(path)
+
+# --------------------- CMTSOLUTION --------------------- #
+def format_cmtsolutions(index):
+    """
+    CMTSOLUTION text for every source in the index, built in one pass.
+    """
+    lat, lon = index['y'].tolist(), index['x'].tolist()
+    depth = (index['z'] / 1000).tolist()
+    ids = index['id'].tolist()
+    paths = index['path'].astype(str).tolist()
+    return ''.join([CMT_TEMPLATE % (la, lo, d, i, i, la, lo, d, p)
+                    for la, lo, d, i, p in zip(lat, lon, depth, ids, paths)])
+
+def write_cmtsolutions(data_dir, index):
+    """
+    Write DATA/CMTSOLUTION with a single buffered write; returns its path.
+    """
+    path = os.path.join(data_dir, CMT_FILE)
+    with open(path, 'w') as f:
+        f.write(format_cmtsolutions(index))
+    return path
+
+# --------------------- CHECKS --------------------- #
+def check_source_files(example_dir, index):
+    """
+    Source files listed in the index that are missing, or whose size differs from the others.
+
+    Returns (missing, mismatched) lists of paths; one directory scan, no file reads.
+    """
+    sizes = {}
+    sources_dir = os.path.join(example_dir, SOURCES_DIR)
+    if os.path.isdir(sources_dir):
+        sizes = {f'{SOURCES_DIR}/{entry.name}': entry.stat().st_size
+                 for entry in os.scandir(sources_dir) if entry.name.endswith('.bin')}
+    paths = index['path'].astype(str).tolist()
+    missing = [path for path in paths if path not in sizes]
+    present = [sizes[path] for path in paths if path in sizes]
+    if not present:
+        return missing, []
+    values, counts = np.unique(present, return_counts=True)
+    expected = values[np.argmax(counts)]
+    mismatched = [path for path in paths if path in sizes and sizes[path] != expected]
+    return missing, mismatched
+
+def describe(index):
+    lines = [f"{len(index)} sources, weight [{index['weight'].min():.6g}, {index['weight'].max():.6g}]"
+             if len(index) else "0 sources"]
+    if len(index):
+        lines.append(f"  x [{index['x'].min()}, {index['x'].max()}] m, y [{index['y'].min()}, {index['y'].max()}] m, "
+                     f"z [{index['z'].min()}, {index['z'].max()}] m")
+    return "\n".join(lines)
+
+# --------------------- ENTRY POINT --------------------- #
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3) or sys.argv[1] != 'info':
+        raise ValueError("Usage: python source_index.py info [INDEX_FILE]")
+    path = sys.argv[2] if len(sys.argv) > 2 else os.path.join('DATA', INDEX_FILE)
+    print(f"{path}: {describe(read_index(path))}")
@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+"""
+Station files (DATA/STATIONS_NOISE, DATA/STATIONS_OBN) as NumPy grids.
+
+A STATIONS file has one line per receiver, y index varying fastest:
+
+    y_index  x_index  Y  X  0.0  Z
+
+The parsed table is cached next to the file as <file>.npz, keyed by the
+text file's size and modification time, so repeated runs skip the parse.
+Files written by write_stations get their sidecar straight away.
+"""
+
+import os
+import tempfile
+import numpy as np
+
+CACHE_SUFFIX = '.npz'
+COL_SPACE = 8         # column width of the original DataFrame.to_string layout
+FLOAT_DIGITS = 6      # pandas display precision
+
+# --------------------- PARSING --------------------- #
+def cache_path(file_path):
+    return file_path + CACHE_SUFFIX
+
+def _fingerprint(file_path):
+    stat = os.stat(file_path)
+    return np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+def parse_stations(file_path):
+    """
+    Parse a STATIONS text file into an (n, 6) float64 table.
+    """
+    return np.loadtxt(file_path, dtype=float, ndmin=2)
+
+def _save_cache(file_path, table):
+    sidecar = cache_path(file_path)
+    tmp = None
+    try:
+        # Write to a unique temporary file first so concurrent readers never see a
+        # partial file (ranks on different nodes may share the filesystem)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(sidecar)), suffix=CACHE_SUFFIX)
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, table=table, fingerprint=_fingerprint(file_path))
+        os.chmod(tmp, os.stat(file_path).st_mode & 0o666)  # mkstemp creates it 0600
+        os.replace(tmp, sidecar)
+    except OSError:
+        if tmp is not None and os.path.exists(tmp):
+            os.remove(tmp)
+
+def load_stations(file_path, use_cache=True):
+    """
+    (n, 6) station table, from the binary sidecar when it matches the text file.
+    """
+    fingerprint = _fingerprint(file_path)
+    sidecar = cache_path(file_path)
+    if use_cache and os.path.exists(sidecar):
+        try:
+            with np.load(sidecar) as cached:
+                if np.array_equal(cached['fingerprint'], fingerprint):
+                    return cached['table']
+        except (OSError, KeyError, ValueError):
+            pass
+
+    table = parse_stations(file_path)
+    if use_cache:
+        _save_cache(file_path, table)
+    return table
+
+# --------------------- GENERATION & WRITING --------------------- #
+def grid_table(ry, rx, z):
+    """
+    (n, 6) station table for a receiver grid, y varying fastest.
+    """
+    nrec_y, nrec_x = len(ry), len(rx)
+    table = np.empty((nrec_y * nrec_x, 6))
+    table[:, 0] = np.tile(np.arange(nrec_y), nrec_x)   # y index
+    table[:, 1] = np.repeat(np.arange(nrec_x), nrec_y) # x index
+    table[:, 2] = np.tile(ry, nrec_x)                  # Y
+    table[:, 3] = np.repeat(rx, nrec_y)                # X
+    table[:, 4] = 0.0                                  # Dummy Z
+    table[:, 5] = z                                    # Actual depth
+    return table
+
+def _float_decimals(values):
+    """
+    Decimals pandas shows for a float column: '%.6f' with the trailing zeros
+    common to every value trimmed, keeping at least one.
+    """
+    text = np.array(('%.6f\n' * values.size % tuple(values)).split('\n')[:-1])
+    zeros = np.char.str_len(text) - np.char.str_len(np.char.rstrip(text, '0'))
+    return max(1, FLOAT_DIGITS - int(zeros.min(initial=FLOAT_DIGITS)))
+
+def _needs_pandas(values):
+    # pandas switches to scientific notation for tiny or very large values
+    magnitude = np.abs(values)
+    return ((magnitude > 0) & (magnitude < 10.0**-FLOAT_DIGITS)).any() or (magnitude >= 1e6).any()
+
+def _format_with_pandas(table):
+    import pandas as pd
+
+    df = pd.DataFrame(table[:, 2:], columns=["Y", "X", "Z_dummy", "Z"])
+    df.insert(0, "sta_x_index", table[:, 1].astype(int).astype(str))
+    df.insert(0, "sta_y_index", table[:, 0].astype(int).astype(str))
+    output_str = df.to_string(header=False, col_space=COL_SPACE, index=False)
+    return "\n".join(line.lstrip() for line in output_str.split("\n"))
+
+def format_stations(table):
+    """
+    STATIONS text identical to DataFrame.to_string(header=False, col_space=8,
+    index=False) with each line left-stripped, as stations_setup wrote it.
+
+    Returns (text, table as parsed back from the text).
+    """
+    if len(table) == 0 or _needs_pandas(table[:, 2:]):
+        text = _format_with_pandas(table)
+        return text, np.loadtxt(text.splitlines(), dtype=float, ndmin=2)
+
+    indices = table[:, :2].astype(np.int64)
+    fields, parsed = [], table.copy()
+    for col in range(6):
+        values = table[:, col]
+        if col < 2:
+            width = max(COL_SPACE, len(str(indices[:, col].max())))
+            fields.append(f'%{width}d')
+            continue
+        decimals = _float_decimals(values)
+        width = max(COL_SPACE, max(len(f'{values.min():.{decimals}f}'), len(f'{values.max():.{decimals}f}')))
+        fields.append(f'%{width}.{decimals}f')
+        # The exact values a reader gets back from the rounded text
+        parsed[:, col] = np.array((f'%.{decimals}f\n' * values.size % tuple(values)).split('\n')[:-1], dtype=float)
+
+    # The first column is left-stripped in the original layout
+    fields[0] = '%d'
+    row = ' '.join(fields)
+    rows = np.empty(table.shape, dtype=object)
+    rows[:, :2] = indices
+    rows[:, 2:] = table[:, 2:]
+    text = ((row + '\n') * len(table) % tuple(rows.ravel()))[:-1]
+    return text, parsed
+
+def write_stations(file_path, table, use_cache=True):
+    """
+    Write a STATIONS file and its binary sidecar; returns the table as it will be read back.
+    """
+    text, parsed = format_stations(table)
+    with open(file_path, 'w') as f:
+        f.write(text)
+    if use_cache:
+        _save_cache(file_path, parsed)
+    return parsed
+
+# --------------------- VIRTUAL SOURCE --------------------- #
+def virtual_source(data_dir):
+    """
+    (sx, sy, sz) in m from DATA/FORCESOLUTION, or zeros without one.
+    """
+    path = os.path.join(data_dir, 'FORCESOLUTION')
+    if not os.path.exists(path):
+        return 0.0, 0.0, 0.0
+    values = {}
+    with open(path, 'r') as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            if key.strip() in ('latorUTM', 'longorUTM', 'depth') and value.strip():
+                values[key.strip()] = float(value.split()[0].replace('d', 'e'))
+    return values.get('longorUTM', 0.0), values.get('latorUTM', 0.0), values.get('depth', 0.0) * 1000
+
+# --------------------- GRIDS --------------------- #
+def load_grid(file_path, use_cache=True):
+    """
+    Station grid as a dict: nx, ny and (nx, ny) arrays xcoor, ycoor, depth.
+    """
+    table = load_stations(file_path, use_cache)
+    ny = int(table[:, 0].max()) + 1
+    nx = int(table[:, 1].max()) + 1
+    return {'nx': nx, 'ny': ny,
+            'xcoor': table[:, 3].reshape(nx, ny),
+            'ycoor': table[:, 2].reshape(nx, ny),
+            'depth': table[:, 5].reshape(nx, ny)}
@@ -3,11 +3,7 @@ from __future__ import print_function
 import os
 import sys
 import numpy as np
-import pandas as pd
-import matplotlib
-
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
+from station_geometry import grid_table, write_stations
 
 
 def stations(
@@ -20,9 +16,13 @@ def stations(
     rtype="OBN",
     example_dir=".",
     sx=0, sy=0, sz=0,
+    plot=True,
 ):
     """
     Generate 3D and 2D receiver station layout and save to DATA.
+
+    With plot=False matplotlib is never imported; the figures can be drawn
+    later from the saved geometry with qc_plots.py.
     """
     if yend // (dy * x_y_sampling) == 0: #include the last value if it is an integer multiple of dy
         yend = ystart + dy * x_y_sampling 
@@ -33,35 +33,35 @@ def stations(
     ry = np.arange(ystart, yend , dy * x_y_sampling)
     rx = np.arange(xstart, xend , dx * x_y_sampling)
 
-    nrec_y = len(ry)
-    nrec_x = len(rx)
-
-    rec = np.empty((nrec_y * nrec_x, 4))
-    rec[:, 0] = np.tile(ry, nrec_x)  # Y
-    rec[:, 1] = np.repeat(rx, nrec_y)  # X
-    rec[:, 2] = 0.0                   # Dummy Z
-    rec[:, 3] = z                     # Actual depth
-
     print(f"   Setting up {rtype} stations at depth {z} m from top surface")
 
-    # Create index labels for DataFrame
-    y_index = [str(j) for _ in rx for j in range(nrec_y)]
-    x_index = [str(i) for i in range(nrec_x) for _ in ry]
-
-    df = pd.DataFrame(rec, columns=["Y", "X", "Z_dummy", "Z"])
-    df.insert(0, "sta_x_index", x_index)
-    df.insert(0, "sta_y_index", y_index)
-
-    # Format and write to STATIONS file
-    output_str = df.to_string(header=False, col_space=8, index=False)
-    output_str = "\n".join(line.lstrip() for line in output_str.split("\n"))
+    # Columns: y index, x index, Y, X, dummy Z, depth (y varying fastest)
+    table = grid_table(ry, rx, z)
 
     data_dir = os.path.join(example_dir, "DATA")
     os.makedirs(data_dir, exist_ok=True)
 
+    # Same layout as DataFrame.to_string(col_space=8), plus a binary sidecar for the readers
     stations_file = os.path.join(data_dir, f"STATIONS_{rtype}")
-    with open(stations_file, "w") as f:
-        f.write(output_str)
+    write_stations(stations_file, table)
+
+    if rtype == "OBN":
+        print(f"   Virtual shot point at X={sx/1000:.3f} km, Y={sy/1000:.3f} km")
+
+    if plot:
+        plot_stations(table, xmin, xmax, ymin, ymax, rtype, data_dir, sx, sy, sz)
+
+
+def plot_stations(table, xmin, xmax, ymin, ymax, rtype, data_dir, sx=0, sy=0, sz=0):
+    """
+    3D and 2D views of a station table, saved as DATA/STATIONS[2D]_<rtype>.png.
+    """
+    # Imported here so runs without plots never load matplotlib
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    rec = table[:, 2:]
 
     # ----------- 3D Scatter Plot -----------
     fig = plt.figure()
@@ -95,7 +95,6 @@ def stations(
 
     if rtype == "OBN":
         ax.plot(sx / 1000, sy / 1000, "r^", markersize=5)
-        print(f"   Virtual shot point at X={sx/1000:.3f} km, Y={sy/1000:.3f} km")
 
     ax.set_xlim(xmin / 1000, xmax / 1000)
     ax.set_ylim(ymin / 1000, ymax / 1000)
@@ -112,10 +111,13 @@ def stations(
 
 
 def usage():
-    print("Usage: stations.py ymin ymax dy ystart yend xmin xmax dx xstart xend z x_y_sampling rtype example_dir [sx sy sz]")
+    print("Usage: stations.py ymin ymax dy ystart yend xmin xmax dx xstart xend z x_y_sampling rtype example_dir [sx sy sz] [--no-plot]")
 
 
 if __name__ == "__main__":
+    # --no-plot may appear anywhere; the remaining arguments are positional
+    plot = "--no-plot" not in sys.argv
+    sys.argv = [arg for arg in sys.argv if arg != "--no-plot"]
     if len(sys.argv) < 15:
         usage()
         sys.exit(1)
@@ -154,5 +156,6 @@ if __name__ == "__main__":
         x_y_sampling,
         rtype,
         example_dir,
-        sx, sy, sz
+        sx, sy, sz,
+        plot
     )
@@ -0,0 +1,228 @@
+#!/usr/bin/env python
+"""
+Fast readers for SPECFEM3D seismogram files (*.semp, *.semv, *.semd).
+
+SPECFEM writes one two-column file per receiver and component: time in the
+first column, amplitude in the second. Both the ASCII output and the binary
+output (USE_BINARY_FOR_SEISMOGRAMS = .true.) are supported; the format is
+detected from the first bytes of the file.
+"""
+
+import io
+import numpy as np
+
+# Printable bytes; binary seismograms contain others within the first few samples
+_ASCII_BYTES = frozenset(b'\t\r\n' + bytes(range(32, 127)))
+_SNIFF_BYTES = 64
+
+# Character codes used by the fixed-width parser
+_NEWLINE, _BLANK, _DOT, _MINUS, _PLUS, _ZERO = b'\n .-+0'
+_BLANKS = np.frombuffer(b' \t\r\n', dtype=np.uint8)
+_EXP_MARKERS = np.frombuffer(b'EeDd', dtype=np.uint8)
+_MAX_EXACT_DIGITS = 15   # integers below 2**53 are exact in float64
+_MAX_EXACT_POW10 = 22    # 10**22 is the largest exact power of ten in float64
+
+# --------------------- FORMAT DETECTION --------------------- #
+def _is_binary_buffer(buf):
+    return not set(buf[:_SNIFF_BYTES]) <= _ASCII_BYTES
+
+def is_binary_seismogram(file_path):
+    """
+    Return True if the seismogram file is SPECFEM binary output.
+    """
+    with open(file_path, 'rb') as f:
+        return _is_binary_buffer(f.read(_SNIFF_BYTES))
+
+# --------------------- ASCII PARSING --------------------- #
+def _fixed_width_rows(buf):
+    """
+    View a buffer of equal-length lines as a 2D uint8 array, or return None.
+    """
+    line_len = buf.find(b'\n') + 1
+    if line_len <= 1 or len(buf) % line_len:
+        return None
+    rows = np.frombuffer(buf, dtype=np.uint8).reshape(-1, line_len)
+    if not (rows[:, -1] == _NEWLINE).all():
+        return None
+    return rows
+
+def _field_columns(rows):
+    """
+    Column ranges of the right-aligned fields, taken from the first line.
+
+    Rows that do not follow this layout are rejected by the field parser.
+    """
+    blank = np.isin(rows[0], _BLANKS)
+    ends = np.flatnonzero(~blank[:-1] & blank[1:]) + 1
+    starts = np.concatenate(([0], ends[:-1]))
+    return list(zip(starts, ends))
+
+def _parse_digit_columns(columns):
+    """
+    Accumulate right-aligned digit columns into (integer, negative, bad) vectors.
+
+    Leading blanks and a sign are allowed; once a digit appears in a row the
+    remaining columns of that row must be digits.
+    """
+    integer = np.zeros(columns.shape[1], dtype=np.int64)
+    negative = np.zeros(columns.shape[1], dtype=bool)
+    started = np.zeros(columns.shape[1], dtype=bool)
+    bad = np.zeros(columns.shape[1], dtype=bool)
+    for column in columns:
+        digit = column - np.uint8(_ZERO)   # non-digits wrap around above 9
+        is_digit = digit <= 9
+        if is_digit.all():
+            integer = integer * 10 + digit
+            started[:] = True
+            continue
+        minus = column == _MINUS
+        negative |= minus
+        bad |= (started & ~is_digit) | ~(is_digit | minus | (column == _PLUS) | (column == _BLANK))
+        integer = integer * 10 + np.where(is_digit, digit, 0)
+        started |= is_digit
+    return integer, negative, bad
+
+def _parse_fixed_field(field):
+    """
+    Vectorized decimal parser for one fixed-width column ('-1.2345678E-01' or '-1.234567').
+
+    The field is walked column by column: mantissa digits are accumulated as an
+    exact integer and scaled by an exact power of ten, so every value is
+    correctly rounded, i.e. identical to the C parser used by np.loadtxt.
+    Returns None when the column does not have a fixed layout and the caller
+    must fall back to a generic parser.
+    """
+    first = field[0]
+    dots = np.flatnonzero(first == _DOT)
+    exps = np.flatnonzero(np.isin(first, _EXP_MARKERS))
+    if dots.size != 1 or exps.size > 1:
+        return None
+    dot = dots[0]
+    exp_col = exps[0] if exps.size else field.shape[1]
+    if exp_col - 1 > _MAX_EXACT_DIGITS:
+        return None
+
+    columns = np.ascontiguousarray(field.T)
+    integer, negative, bad = _parse_digit_columns(np.delete(columns[:exp_col], dot, axis=0))
+    bad |= columns[dot] != _DOT
+    scale = np.full(field.shape[0], -(exp_col - dot - 1), dtype=np.int64)
+    if exps.size:
+        bad |= np.isin(columns[exp_col], _EXP_MARKERS, invert=True)
+        exp_value, exp_negative, exp_bad = _parse_digit_columns(columns[exp_col + 1:])
+        bad |= exp_bad
+        scale += np.where(exp_negative, -exp_value, exp_value)
+    if bad.any():
+        return None
+
+    # Powers of ten up to 1e22 are exact in float64: one rounding per value
+    magnitude = integer.astype(np.float64)
+    power = 10.0 ** np.minimum(np.abs(scale), _MAX_EXACT_POW10)
+    magnitude = np.where(scale >= 0, magnitude * power, magnitude / power)
+    for i in np.flatnonzero(np.abs(scale) > _MAX_EXACT_POW10):
+        magnitude[i] = abs(float(field[i].tobytes().replace(b'D', b'E').replace(b'd', b'e')))
+    return np.where(negative, -magnitude, magnitude)
+
+def _parse_ascii(buf, file_path, time_rows=None):
+    """
+    Parse a two-column ASCII seismogram into float64 (time, amplitude) arrays.
+
+    Only the first `time_rows` time samples are parsed when given. SPECFEM
+    writes fixed-width lines, which are parsed in one vectorized pass;
+    anything else (comments, ragged lines) goes through np.loadtxt.
+    """
+    rows = _fixed_width_rows(buf) if b'#' not in buf else None
+    fields = _field_columns(rows) if rows is not None else None
+    if fields is not None and len(fields) == 2:
+        (t0_col, t1_col), (a0_col, a1_col) = fields
+        amplitude = _parse_fixed_field(rows[:, a0_col:a1_col])
+        time = _parse_fixed_field(rows[:time_rows, t0_col:t1_col])
+        if amplitude is not None and time is not None:
+            return time, amplitude
+
+    table = np.loadtxt(io.BytesIO(buf), dtype=np.float64, comments='#', ndmin=2)
+    if table.shape[1] != 2:
+        raise ValueError(f"{file_path} is not a two-column seismogram.")
+    return table[:time_rows, 0], table[:, 1]
+
+# --------------------- BINARY PARSING --------------------- #
+def _parse_binary(buf, file_path, real_size=4):
+    """
+    Read a binary seismogram into float64 (time, amplitude) arrays.
+
+    SPECFEM writes (time, amplitude) pairs of CUSTOM_REAL; depending on the
+    build they are either a plain stream or Fortran sequential records, one
+    per sample or one for the whole trace. Record markers are detected and
+    removed.
+    """
+    dtype = np.float32 if real_size == 4 else np.float64
+    raw = np.frombuffer(buf, dtype=np.uint8)
+    marker = raw[:4].view(np.int32)[0] if raw.size >= 4 else -1
+
+    if marker == 2 * real_size and raw.size % (2 * real_size + 8) == 0:
+        # One sequential record per sample: [marker][t][a][marker]
+        records = raw.reshape(-1, 2 * real_size + 8)[:, 4:4 + 2 * real_size]
+        values = np.ascontiguousarray(records).view(dtype).ravel()
+    elif marker == raw.size - 8:
+        # One sequential record for the whole trace
+        values = raw[4:-4].view(dtype)
+    else:
+        values = raw.view(dtype)
+
+    if values.size % 2:
+        raise ValueError(f"{file_path} is not a two-column binary seismogram.")
+    pairs = values.reshape(-1, 2).astype(np.float64)
+    return pairs[:, 0], pairs[:, 1]
+
+def _read_columns(file_path, binary=None, real_size=4, time_rows=None):
+    """
+    Read a seismogram file in one system call and parse its two columns.
+    """
+    with open(file_path, 'rb') as f:
+        buf = f.read()
+    if binary is None:
+        binary = _is_binary_buffer(buf)
+    if binary:
+        return _parse_binary(buf, file_path, real_size)
+    return _parse_ascii(buf, file_path, time_rows)
+
+# --------------------- PUBLIC READERS --------------------- #
+def read_seismogram(file_path, out=None, dtype=np.float32, binary=None, real_size=4):
+    """
+    Read one seismogram and return (amplitude, t0, dt).
+
+    The amplitude column is written into `out` when a preallocated buffer
+    (e.g. a row of a 2D array) is given, otherwise a new array of `dtype`
+    is returned. `binary=None` auto-detects the file format.
+    """
+    time, amplitude = _read_columns(file_path, binary, real_size, time_rows=2)
+    if out is None:
+        out = np.empty(amplitude.size, dtype=dtype)
+    elif out.shape != amplitude.shape:
+        raise ValueError(f"{file_path} has {amplitude.size} samples, buffer holds {out.shape}.")
+    np.copyto(out, amplitude, casting='unsafe')
+
+    dt = time[1] - time[0] if time.size > 1 else 0.0
+    return out, time[0], dt
+
+def read_time_axis(file_path, binary=None, real_size=4):
+    """
+    Return the time column of a seismogram as a float64 array.
+    """
+    return _read_columns(file_path, binary, real_size)[0]
+
+def read_seismograms(file_paths, dtype=np.float32, out=None, binary=None, real_size=4):
+    """
+    Read several seismograms of equal length into one 2D array (ntraces, nt).
+
+    Returns (data, t0, dt), with t0 and dt taken from the first file.
+    """
+    if len(file_paths) == 0:
+        raise ValueError("No seismogram files to read.")
+
+    first, t0, dt = read_seismogram(file_paths[0], dtype=dtype, binary=binary, real_size=real_size)
+    if out is None:
+        out = np.empty((len(file_paths), first.size), dtype=dtype)
+    out[0] = first
+    for row, file_path in zip(out[1:], file_paths[1:]):
+        read_seismogram(file_path, out=row, binary=binary, real_size=real_size)
+    return out, t0, dt
@@ -32,6 +32,14 @@ nstarty=3000                # start y location for noise sources
 nendy=81000                 # end y location for noise sources
 x_y_sampling_noise=1.501    # sampling for recievers at noise locatios in x and y directions relative to grid spacing
 
+#---------------- QC Figures --------------------
+make_plots=true             # false skips the station/noise figures (draw them later with Utils/qc_plots.py)
+
+if [[ "$make_plots" == true ]]; then
+    export PLOT_OPT=""
+else
+    export PLOT_OPT="--no-plot"
+fi
 
 #==================== Cleanup Old Files ===========================
 echo "  -Cleaning old station, force, and noise files"
@@ -51,7 +59,7 @@ echo "  -Check DATA/ for OBNs"
 #==================== Noise Distribution ==========================
 msg "Characterizing noise distribution"
 echo "  -Check parafile_noise.yaml in DATA/ for noise characterization parameters"
-python $UTILS_DIR/noise_distribution.py $EXAMPLE_DIR || exit 1
+python $UTILS_DIR/noise_distribution.py $EXAMPLE_DIR $PLOT_OPT ${PROFILE_DIR:+--profile $PROFILE_DIR/noise_distribution.json} || exit 1
 
 #==================== Source Setup ================================
 msg "Setting up virtual source"
@@ -0,0 +1,241 @@
+#!/usr/bin/env python
+"""
+Lazy access to the published OBN interferometry dataset (Zenodo .npy files).
+
+The Sections 3.3.1/3.3.2 files are pickled dicts ({'Crr': ..., 'Cvv': ...,
+'Crv': ...}), which NumPy can only load whole. `convert` rewrites such a file
+once as one plain .npy per component, and `open_dataset` memory-maps the
+result so tensors are read from disk only where they are sliced:
+
+    ds = open_dataset('file_name')                     # converted directory
+    ds = open_dataset('other_section.npy')             # plain arrays work too
+    gather = ds.window('Cvv', offset=(0, 4000), time=(0, 6))
+
+Axis text files (one coordinate vector per file, per column or per labelled
+line) give the coordinates used by `window`; they are matched to the array
+dimensions in order.
+
+Usage: python obn_dataset.py convert FILE.npy [OUT_DIR]
+       python obn_dataset.py info PATH [AXIS_FILE ...]
+"""
+
+import os
+import sys
+import json
+import glob
+import numpy as np
+
+META_FILE = 'meta.json'
+
+# --------------------- AXIS FILES --------------------- #
+def _numbers(tokens):
+    try:
+        return [float(token) for token in tokens]
+    except ValueError:
+        return None
+
+def read_axis_file(file_path):
+    """
+    Parse an axis text file into a list of (name, coordinates) pairs.
+
+    Accepted layouts: a plain column or row of numbers (named after the
+    file), columns under a header line of names, or labelled lines such
+    as 'offset: 0 25 50 ...' / 'time = 0.0 0.004 ...'.
+    """
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    with open(file_path, 'r') as f:
+        lines = [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+    if not lines:
+        raise ValueError(f"{file_path} holds no axis values.")
+
+    # Labelled lines: 'name: values' or 'name = values'
+    labelled = []
+    for line in lines:
+        for sep in (':', '='):
+            name, _, rest = line.partition(sep)
+            values = _numbers(rest.replace(',', ' ').split()) if rest else None
+            if values and _numbers([name]) is None:
+                labelled.append((name.strip(), np.array(values)))
+                break
+        else:
+            break
+    if len(labelled) == len(lines):
+        return labelled
+
+    header = None
+    if _numbers(lines[0].replace(',', ' ').split()) is None:
+        header, lines = lines[0].replace(',', ' ').split(), lines[1:]
+    table = np.array([_numbers(line.replace(',', ' ').split()) for line in lines], dtype=float)
+    if table.ndim != 2:
+        raise ValueError(f"{file_path} is not a table of numbers.")
+    if table.shape[1] == 1 or table.shape[0] == 1:
+        return [(header[0] if header else stem, table.ravel())]
+    names = header if header and len(header) == table.shape[1] else [f'{stem}{k}' for k in range(table.shape[1])]
+    return list(zip(names, table.T))
+
+def load_axes(axis_files):
+    """
+    Ordered {name: coordinates} from several axis files (in dimension order).
+    """
+    axes = {}
+    for file_path in axis_files:
+        for name, values in read_axis_file(file_path):
+            axes[name] = values
+    return axes
+
+def find_axis_files(path):
+    """
+    Axis text files of a dataset: <stem>*.txt next to it, plus *.txt inside a converted directory.
+    """
+    path = path.rstrip(os.sep)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    files = glob.glob(os.path.join(os.path.dirname(os.path.abspath(path)), glob.escape(stem) + '*.txt'))
+    if os.path.isdir(path):
+        files += glob.glob(os.path.join(path, '*.txt'))
+    return sorted(set(files))
+
+def coordinate_slice(values, lo=None, hi=None):
+    """
+    Index slice of a monotonic coordinate vector covering [lo, hi].
+    """
+    values = np.asarray(values)
+    keep = np.ones(values.size, dtype=bool)
+    if lo is not None:
+        keep &= values >= lo
+    if hi is not None:
+        keep &= values <= hi
+    idx = np.flatnonzero(keep)
+    if idx.size == 0:
+        return slice(0, 0)
+    if idx[-1] - idx[0] + 1 != idx.size:
+        raise ValueError("Axis coordinates are not monotonic.")
+    return slice(idx[0], idx[-1] + 1)
+
+# --------------------- CONVERSION --------------------- #
+def is_pickled_dict(npy_path):
+    """
+    True for .npy files holding a pickled object (e.g. a dict of tensors).
+    """
+    with open(npy_path, 'rb') as f:
+        version = np.lib.format.read_magic(f)
+        read_header = (np.lib.format.read_array_header_1_0 if version == (1, 0)
+                       else np.lib.format.read_array_header_2_0)
+        return read_header(f)[2] == np.dtype(object)
+
+def convert(npy_path, out_dir=None):
+    """
+    Split a pickled-dict .npy into <out_dir>/<key>.npy files that can be memory-mapped.
+
+    Non-array entries are kept in meta.json. The source file is loaded once;
+    returns the output directory.
+    """
+    out_dir = out_dir or os.path.splitext(npy_path)[0]
+    data = np.load(npy_path, allow_pickle=True)
+    if data.dtype == object and data.shape == ():
+        data = data.item()
+    if not isinstance(data, dict):
+        raise ValueError(f"{npy_path} is not a pickled dict of arrays; open it directly with open_dataset.")
+
+    os.makedirs(out_dir, exist_ok=True)
+    meta = {'source': os.path.basename(npy_path), 'arrays': [], 'values': {}}
+    for key, value in data.items():
+        if isinstance(value, np.ndarray) and value.dtype != object:
+            np.save(os.path.join(out_dir, f'{key}.npy'), np.ascontiguousarray(value))
+            meta['arrays'].append(str(key))
+        else:
+            meta['values'][str(key)] = value.tolist() if isinstance(value, np.ndarray) else value
+    with open(os.path.join(out_dir, META_FILE), 'w') as f:
+        json.dump(meta, f, indent=2, default=str)
+    return out_dir
+
+# --------------------- LAZY ACCESS --------------------- #
+class OBNDataset:
+    """
+    Memory-mapped components of one dataset file plus its axis coordinates.
+    """
+
+    def __init__(self, path, axis_files=None, mmap_mode='r'):
+        self.path = path
+        self.mmap_mode = mmap_mode
+        if os.path.isdir(path):
+            self.files = {os.path.splitext(name)[0]: os.path.join(path, name)
+                          for name in sorted(os.listdir(path)) if name.endswith('.npy')}
+            meta_path = os.path.join(path, META_FILE)
+            self.meta = {}
+            if os.path.exists(meta_path):
+                with open(meta_path, 'r') as f:
+                    self.meta = json.load(f)
+        elif is_pickled_dict(path):
+            raise ValueError(f"{path} is a pickled dict and cannot be memory-mapped; "
+                             f"run 'python obn_dataset.py convert {path}' first.")
+        else:
+            self.files = {os.path.splitext(os.path.basename(path))[0]: path}
+            self.meta = {}
+        self._arrays = {}
+        self.axes = load_axes(find_axis_files(path) if axis_files is None else axis_files)
+
+    def keys(self):
+        return list(self.files)
+
+    def __contains__(self, key):
+        return key in self.files
+
+    def __getitem__(self, key):
+        """
+        Memory-mapped array; nothing is read until it is sliced.
+        """
+        if key not in self._arrays:
+            self._arrays[key] = np.load(self.files[key], mmap_mode=self.mmap_mode)
+        return self._arrays[key]
+
+    def axis_for(self, name, ndim):
+        """
+        Dimension index of a named axis (case-insensitive substring match, axes in dimension order).
+        """
+        names = list(self.axes)[:ndim]
+        for dim, axis_name in enumerate(names):
+            if name.lower() in axis_name.lower():
+                return dim, axis_name
+        raise KeyError(f"No axis matching '{name}' among {names}.")
+
+    def window(self, key, **ranges):
+        """
+        Read a coordinate window, e.g. window('Cvv', offset=(0, 4000), time=(0, 6)).
+
+        Returns (array, {axis name: coordinates}) for the selected region only.
+        """
+        array = self[key]
+        index = [slice(None)] * array.ndim
+        for name, (lo, hi) in ranges.items():
+            dim, axis_name = self.axis_for(name, array.ndim)
+            index[dim] = coordinate_slice(self.axes[axis_name], lo, hi)
+        coords = {name: np.asarray(values)[index[dim]]
+                  for dim, (name, values) in enumerate(list(self.axes.items())[:array.ndim])}
+        return np.asarray(array[tuple(index)]), coords
+
+    def describe(self):
+        lines = [f"{self.path}:"]
+        for key in self.keys():
+            array = self[key]
+            lines.append(f"  {key}: {array.shape} {array.dtype}")
+        for name, values in self.axes.items():
+            values = np.asarray(values)
+            lines.append(f"  axis {name}: n={values.size} [{values.min():g}, {values.max():g}]")
+        return "\n".join(lines)
+
+def open_dataset(path, axis_files=None, mmap_mode='r'):
+    """
+    Open a converted directory or a plain .npy file without loading it.
+    """
+    return OBNDataset(path, axis_files, mmap_mode)
+
+# --------------------- ENTRY POINT --------------------- #
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] not in ('convert', 'info'):
+        raise ValueError("Usage: python obn_dataset.py convert FILE.npy [OUT_DIR] | info PATH [AXIS_FILE ...]")
+
+    if sys.argv[1] == 'convert':
+        out_dir = convert(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else None)
+        print(f"  -Wrote memory-mappable components to {out_dir}")
+    else:
+        print(open_dataset(sys.argv[2], sys.argv[3:] or None).describe())